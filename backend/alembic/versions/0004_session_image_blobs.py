@@ -0,0 +1,49 @@
+"""Move session images into the blob store, keep only their SHA-256
+
+Revision ID: 0004_session_image_blobs
+Revises: 0003_add_session_images
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_session_image_blobs'
+down_revision: Union[str, None] = '0003_add_session_images'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Sessions per backfill batch (each batch holds its base64 images in memory)
+BATCH_SIZE = 100
+
+
+def _blob_store():
+    if context.is_offline_mode():
+        raise RuntimeError("This migration copies images to the blob store; run it online, not with --sql")
+    from src.core.blobs import create_blob_store
+    return create_blob_store()
+
+
+def upgrade() -> None:
+    from src.services.session_images import backfill_session_images
+
+    op.add_column('sessions', sa.Column('handout_image_sha256', sa.String(length=64), nullable=True))
+    op.add_column('sessions', sa.Column('handover_image_sha256', sa.String(length=64), nullable=True))
+    backfill_session_images(op.get_bind(), _blob_store(), BATCH_SIZE)
+    op.drop_column('sessions', 'handover_image')
+    op.drop_column('sessions', 'handout_image')
+
+
+def downgrade() -> None:
+    from src.services.session_images import restore_session_images
+
+    op.add_column('sessions', sa.Column('handout_image', sa.Text(), nullable=True))
+    op.add_column('sessions', sa.Column('handover_image', sa.Text(), nullable=True))
+    # Blobs are left in the store; they are content-addressed and harmless
+    restore_session_images(op.get_bind(), _blob_store(), BATCH_SIZE)
+    op.drop_column('sessions', 'handover_image_sha256')
+    op.drop_column('sessions', 'handout_image_sha256')
@@ -0,0 +1,32 @@
+"""Add thumbnail hash and dimensions of session images
+
+Revision ID: 0005_session_image_derivatives
+Revises: 0004_session_image_blobs
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_session_image_derivatives'
+down_revision: Union[str, None] = '0004_session_image_blobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for stage in ('handout', 'handover'):
+        op.add_column('sessions', sa.Column(f'{stage}_thumb_sha256', sa.String(length=64), nullable=True))
+        op.add_column('sessions', sa.Column(f'{stage}_image_width', sa.Integer(), nullable=True))
+        op.add_column('sessions', sa.Column(f'{stage}_image_height', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    for stage in ('handover', 'handout'):
+        op.drop_column('sessions', f'{stage}_image_height')
+        op.drop_column('sessions', f'{stage}_image_width')
+        op.drop_column('sessions', f'{stage}_thumb_sha256')
@@ -0,0 +1,95 @@
+# Hot-path benchmark suite: python -m benchmarks.run --help
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .stages import IMAGE_SIZES, compare, run_suite
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "cpu.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from; baselines are only comparable on similar machines."""
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+
+def _write_json(data: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def _print_table(results: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    stages = list(next(iter(results.values())))
+    print(f"{'size':<6}" + "".join(f"{s:>15}" for s in stages))
+    for size, timings in results.items():
+        print(f"{size:<6}" + "".join(f"{timings[s]['median_ms']:>12.3f} ms" for s in stages))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Time the predict hot path per stage and compare with a stored baseline.",
+    )
+    parser.add_argument("--sizes", default=",".join(IMAGE_SIZES),
+                        help=f"Comma-separated image sizes (default: all of {', '.join(IMAGE_SIZES)})")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per stage (median is compared)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed slowdown of a stage median vs the baseline (0.3 = +30%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Also required absolute slowdown, so sub-millisecond stages do not fail on timer noise")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    sizes: List[str] = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in IMAGE_SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {unknown}")
+
+    report = {"environment": environment(), "repeats": args.repeats, "results": run_suite(sizes, args.repeats)}
+    _print_table(report["results"])
+    _write_json(report, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        _write_json(report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(report["results"], baseline["results"], args.tolerance, args.min_delta_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        return 1
+    print(f"No stage slower than baseline by more than {args.tolerance * 100:.0f}% and {args.min_delta_ms} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Per-stage timings of the predict hot path on synthetic board photos
+import base64
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.api.schemas.predict import PredictResponse
+from src.core.settings import settings
+from src.ml.backends import InferenceBackend
+from src.ml.imaging import _load_cv2, decode_base64_payload, decode_image
+from src.ml.tune import synthetic_tool_board
+from src.ml.yolo_service import YOLOInferenceService, load_class_mapping, models_dir
+from src.services.predictions import build_prediction
+
+# name -> (width, height); from a tablet preview frame up to a 12 MP phone photo
+IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    "vga": (640, 480),
+    "1mp": (1280, 960),
+    "5mp": (2592, 1944),
+    "12mp": (4000, 3000),
+}
+
+STAGES = ("base64_decode", "image_decode", "forward", "postprocess", "response")
+
+
+class TinyDetector:
+    """
+    Stand-in for the YOLO model, so the suite runs on a CPU-only box without weights.
+
+    Does the same kind of work per image as a real detector, scaled down: letterbox to
+    the input size, normalize to float32, one strided patch projection (a single conv
+    layer as a matmul) and top-k candidate selection. Output has the shape of an
+    ultralytics result: absolute xyxy boxes, confidences and class ids.
+    """
+
+    def __init__(self, names: Dict[int, str], imgsz: int = 640, stride: int = 32, max_det: int = 300, seed: int = 0):
+        self.names = names
+        self.imgsz = imgsz
+        self.stride = stride
+        self.max_det = max_det
+        rng = np.random.default_rng(seed)
+        self.weights = rng.standard_normal((3 * stride * stride, 4 + len(names))).astype(np.float32) * 0.02
+
+    def _letterbox(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        cv2 = _load_cv2()
+        h, w = image.shape[:2]
+        scale = self.imgsz / max(h, w)
+        resized = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_LINEAR)
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        canvas[:resized.shape[0], :resized.shape[1]] = resized
+        return canvas, scale
+
+    def __call__(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        canvas, scale = self._letterbox(image)
+        x = canvas.astype(np.float32) / 255.0
+        cells = self.imgsz // self.stride
+        patches = (
+            x.reshape(cells, self.stride, cells, self.stride, 3)
+            .transpose(0, 2, 4, 1, 3)
+            .reshape(cells * cells, -1)
+        )
+        out = 1.0 / (1.0 + np.exp(-(patches @ self.weights)))
+
+        scores = out[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        top = np.argpartition(-confidences, min(self.max_det, len(confidences)) - 1)[:self.max_det]
+
+        gy, gx = np.divmod(top, cells)
+        cx = (gx + out[top, 0]) * self.stride
+        cy = (gy + out[top, 1]) * self.stride
+        bw = out[top, 2] * self.imgsz / 4
+        bh = out[top, 3] * self.imgsz / 4
+        xyxy = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1) / scale
+        return xyxy.astype(np.float32), confidences[top], class_ids[top]
+
+
+class StandinBackend(InferenceBackend):
+    """
+    Backend holding a TinyDetector, so the real YOLOInferenceService can be built without weights.
+
+    The benchmark calls the detector directly (the forward stage) and uses the
+    service only for post-processing, so there is no model file to hash or export.
+    """
+
+    name = "standin"
+
+    def __init__(self, detector: TinyDetector, model_path: str):
+        self.source_path = model_path
+        self.artifact_path = model_path
+        self.model_sha256 = "standin"
+        self.model = detector
+
+    @property
+    def input_size(self) -> int:
+        return self.model.imgsz
+
+
+def standin_service(detector: TinyDetector) -> YOLOInferenceService:
+    """YOLOInferenceService around the stand-in model, for its real post-processing."""
+
+    backend = StandinBackend(detector, str(models_dir() / "model.pt"))
+    return YOLOInferenceService(backend=backend, batching=False)
+
+
+def make_payloads(width: int, height: int, seed: int = 0) -> Tuple[bytes, str]:
+    """Synthetic board photo as (JPEG bytes, base64 string), like a tablet upload."""
+
+    cv2 = _load_cv2()
+    image = synthetic_tool_board(np.random.default_rng(seed), height=height, width=width)
+    ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    data = jpeg.tobytes()
+    return data, base64.b64encode(data).decode("ascii")
+
+
+def _time(fn: Callable[[], Any], repeats: int) -> Tuple[Dict[str, float], Any]:
+    fn()  # first call pays one-off costs (allocations, lazy imports)
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "p90_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.9))], 4),
+    }, result
+
+
+def benchmark_size(
+    width: int,
+    height: int,
+    repeats: int,
+    detector: Optional[TinyDetector] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time each predict stage separately for one image size.
+
+    Stages run on the previous stage's output, in request order: base64 decode, image
+    decode (with DCT-domain reduction to the model input size), model forward,
+    post-processing, PredictResponse construction.
+
+    Returns:
+        {stage: {"median_ms", "p90_ms"}}
+    """
+
+    detector = detector or TinyDetector(_standin_names())
+    service = standin_service(detector)
+    _jpeg, b64 = make_payloads(width, height)
+    timings: Dict[str, Dict[str, float]] = {}
+
+    timings["base64_decode"], raw = _time(lambda: decode_base64_payload(b64), repeats)
+    timings["image_decode"], image = _time(lambda: decode_image(raw, detector.imgsz), repeats)
+    timings["forward"], (xyxy, conf, cls) = _time(lambda: detector(image), repeats)
+    h, w = image.shape[:2]
+    timings["postprocess"], detections = _time(
+        lambda: service._postprocess(xyxy, conf, cls, w, h, settings.YOLO_CONFIDENCE_THRESHOLD), repeats
+    )
+    info = {"stage": "full", "passes": ["full"], "cached": False, "model_version": "standin"}
+    timings["response"], _ = _time(
+        lambda: PredictResponse(**build_prediction(settings.CLASSES, detections, 0.98, info)), repeats
+    )
+    return timings
+
+
+def _standin_names() -> Dict[int, str]:
+    """YOLO-side class names of the production model (from class_mapping.json)."""
+
+    _version, mapping = load_class_mapping(str(models_dir() / "model.pt"))
+    names = list(mapping) or list(settings.CLASSES)
+    return dict(enumerate(names))
+
+
+def run_suite(sizes: List[str], repeats: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Benchmark every named size; returns {size: {stage: timings}}."""
+
+    detector = TinyDetector(_standin_names())
+    results = {}
+    for name in sizes:
+        width, height = IMAGE_SIZES[name]
+        results[name] = benchmark_size(width, height, repeats, detector)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    tolerance: float,
+    min_delta_ms: float = 0.5,
+) -> List[str]:
+    """
+    Find stages slower than the baseline.
+
+    A stage regresses when its median exceeds the baseline median by more than
+    ``tolerance`` (relative) and by more than ``min_delta_ms`` (absolute, so that
+    sub-millisecond stages do not fail on timer noise).
+
+    Returns:
+        Human-readable regression lines (empty if none)
+    """
+
+    regressions = []
+    for size, stages in results.items():
+        for stage, timing in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base:
+                continue
+            current, reference = timing["median_ms"], base["median_ms"]
+            if current > reference * (1.0 + tolerance) and current - reference > min_delta_ms:
+                regressions.append(
+                    f"{size}/{stage}: {current:.3f} ms vs baseline {reference:.3f} ms "
+                    f"(+{(current / reference - 1.0) * 100:.0f}%, budget +{tolerance * 100:.0f}%)"
+                )
+    return regressions
@@ -0,0 +1,114 @@
+# Streaming blob responses with ETag / If-None-Match (304) and single byte ranges (206)
+import re
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from ..core.blobs import BlobNotFound, BlobStore
+from ..services.session_images import image_content_type
+
+# A single byte range: "bytes=first-last", "bytes=first-" or "bytes=-suffix"
+_BYTE_RANGE = re.compile(r"bytes=\s*([0-9]*)-([0-9]*)", re.ASCII)
+
+# Revalidate on every use: the URL of a session image points at a new blob after a re-predict
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(digest: str) -> str:
+    """Strong ETag of a blob: its SHA-256, quoted."""
+
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, per RFC 9110): W/ prefixes are ignored."""
+
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range against the blob size.
+
+    Returns:
+        (start, end) inclusive, or None to serve the whole blob: no header, another
+        unit, several ranges, or a syntactically invalid range, which RFC 9110 says
+        to ignore
+
+    Raises:
+        HTTPException: 416 if a valid range cannot be satisfied (starts past the end)
+    """
+
+    match = _BYTE_RANGE.fullmatch(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not (first or last) or (first and last and int(last) < int(first)):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        start, end = (max(0, size - length), size - 1) if length > 0 else (size, size)
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _read_head(store: BlobStore, digest: str) -> bytes:
+    return b"".join(store.iter_range(digest, 0, 15))
+
+
+async def blob_response(request: Request, store: BlobStore, digest: str, media_type: Optional[str] = None) -> Response:
+    """
+    Stream a blob with conditional and range request support.
+
+    Answers 304 when If-None-Match matches the ETag and 206 for a single byte range
+    (honouring If-Range); the body is read from the store in chunks, off the event loop.
+
+    Args:
+        request: Incoming request (conditional and Range headers)
+        store: Blob store holding the blob
+        digest: SHA-256 of the blob
+        media_type: Content type; None sniffs it from the first bytes (images)
+    """
+
+    etag = etag_for(digest)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        size = await run_in_threadpool(store.size, digest)
+        if media_type is None:
+            media_type = image_content_type(await run_in_threadpool(_read_head, store, digest))
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None  # the client's partial copy is stale: send everything
+
+    byte_range = parse_range(range_header, size) if size else None
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(store.iter_range(digest), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        store.iter_range(digest, start, end), status_code=206, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from ..uploads import DEFAULT_THRESHOLD
+from ...core.settings import settings
+from ...ml.executor import InferenceQueueFull
+from ...ml.yolo_service import ModelNotReady
+from ...services.live import FrameError, LatestFrameSlot, PresenceSmoother, infer_frame
+from ...services.predictions import build_prediction
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["live"])
+
+async def _receive_frames(websocket: WebSocket, slot: LatestFrameSlot, options: dict) -> None:
+    """Read binary frames into the slot; text messages update options ({"threshold": 0.9})."""
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            frame = message.get("bytes")
+            if frame:
+                if len(frame) > settings.MAX_IMAGE_UPLOAD_BYTES:
+                    await websocket.send_json({"type": "error", "detail": "Frame too large"})
+                    continue
+                slot.put(frame)
+            elif message.get("text"):
+                try:
+                    threshold = float(json.loads(message["text"])["threshold"])
+                    if not 0.0 <= threshold <= 1.0:
+                        raise ValueError("threshold must be within [0, 1]")
+                    options["threshold"] = threshold
+                except (ValueError, KeyError, TypeError) as e:
+                    await websocket.send_json({"type": "error", "detail": f"Invalid message: {e}"})
+    finally:
+        slot.close()
+
+@router.websocket("/live")
+async def live(websocket: WebSocket, threshold: float = Query(DEFAULT_THRESHOLD, ge=0.0, le=1.0)):
+    """
+    Continuous recognition for a fixed camera.
+
+    - Client sends encoded frames (JPEG/PNG) as binary messages, and optionally
+      `{"threshold": 0.9}` as text to change the UI threshold.
+    - Inference always runs on the newest frame; frames that arrive while it is busy
+      are dropped (counted in `dropped`).
+    - For every processed frame the server sends `detections` (same format as
+      /predict), `summary`, and `presence`: per-class state smoothed over frames.
+    - A frame that cannot be decoded or analysed gets an `error` message and does
+      not change `presence` (there is no stub fallback here).
+    """
+
+    await websocket.accept()
+    slot = LatestFrameSlot()
+    options = {"threshold": threshold}
+    smoother = PresenceSmoother(
+        settings.CLASSES,
+        alpha=settings.LIVE_PRESENCE_ALPHA,
+        on_threshold=settings.LIVE_PRESENCE_ON,
+        off_threshold=settings.LIVE_PRESENCE_OFF,
+    )
+    receiver = asyncio.create_task(_receive_frames(websocket, slot, options))
+    logger.info("Live session started")
+
+    try:
+        while True:
+            item = await slot.take()
+            if item is None:
+                break
+            seq, frame = item
+            started = time.perf_counter()
+            try:
+                classes_catalog, candidates, inference = await infer_frame(frame)
+            except InferenceQueueFull:
+                # The next frame is tried once the executor has room
+                continue
+            except ModelNotReady as e:
+                await websocket.send_json({"type": "error", "detail": str(e), "state": e.state})
+                continue
+            except FrameError as e:
+                # The presence state is left as it was: a bad frame is not an empty board
+                await websocket.send_json({"type": "error", "frame": seq, "detail": f"Frame not processed: {e}"})
+                continue
+
+            prediction = build_prediction(classes_catalog, candidates, options["threshold"], inference)
+            passed = [d for d in prediction["detections"] if d["is_passed_conf_treshold"]]
+            await websocket.send_json({
+                "type": "detections",
+                "frame": seq,
+                "received": slot.received,
+                "dropped": slot.dropped,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "threshold": prediction["threshold"],
+                "detections": prediction["detections"],
+                "summary": prediction["summary"],
+                "presence": smoother.update(passed),
+                "inference": inference,
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
+        logger.info(f"Live session ended: {slot.received} frames received, {slot.dropped} dropped")
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from ..schemas.ml import ModelListResponse, ReloadRequest, ReloadResponse
+from ...core.auth import require_admin
+from ...core.profiler import SamplingProfiler, finish_capture, start_capture
+from ...core.settings import settings
+from ...ml import yolo_service
+from ...ml.yolo_service import ModelReloadInProgress, list_models, reload_yolo_service, resolve_model_name
+from ...models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/ml", tags=["ml"])
+
+@router.get("/models", response_model=ModelListResponse)
+async def get_models(current_user: User = Depends(require_admin)):
+    """List the .pt models available in backend/models and which one is serving (admin only)."""
+
+    service = yolo_service._yolo_service
+    return {
+        "active_version": service.model_version if service is not None else None,
+        "models": await run_in_threadpool(list_models),
+    }
+
+@router.post("/reload", response_model=ReloadResponse)
+async def reload_model(
+    payload: Optional[ReloadRequest] = None,
+    current_user: User = Depends(require_admin),
+):
+    """
+    Hot-reload the model without a restart (admin only).
+
+    The new model is loaded and warmed up next to the serving one; traffic switches
+    when it is ready and requests in progress finish on the old model.
+    """
+
+    model_name = payload.model if payload is not None else None
+    try:
+        model_path = resolve_model_name(model_name) if model_name else None
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    logger.info(f"Model reload requested by {current_user.employee_id}: {model_name or 'default'}")
+    try:
+        return await run_in_threadpool(reload_yolo_service, model_path)
+    except ModelReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        # Old model keeps serving
+        logger.error(f"Model reload failed: {e}")
+        raise HTTPException(status_code=422, detail=f"Model reload failed: {e}")
+
+@router.post("/profile")
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0, description="Capture length; with `requests`, the timeout"),
+    requests: Optional[int] = Query(None, ge=1, description="Stop after this many HTTP requests finished"),
+    format: Literal["collapsed", "speedscope"] = Query("collapsed"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Sampling interval"),
+    all_threads: bool = Query(False, description="Sample every thread, not only the event loop and inference threads"),
+    include_idle: bool = Query(False, description="Keep samples of threads waiting for work"),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Sample the stacks of the running service under live traffic (admin only).
+
+    Covers the event loop thread and the inference threads (executor, batcher).
+    Returns collapsed stacks (flamegraph.pl, speedscope) or a speedscope JSON file.
+    """
+
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=422, detail=f"seconds must be <= {settings.PROFILE_MAX_SECONDS:g}")
+
+    profiler = SamplingProfiler(
+        interval=interval_ms / 1000,
+        thread_ids=[threading.get_ident()],  # event loop thread
+        all_threads=all_threads,
+        include_idle=include_idle,
+        max_requests=requests,
+    )
+    if not start_capture(profiler):
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+
+    logger.info(f"Profile capture started by {current_user.employee_id}: {seconds:g}s, requests={requests}")
+    try:
+        deadline = time.perf_counter() + seconds
+        while not profiler.done.is_set():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(0.05, remaining))
+    finally:
+        finish_capture(profiler)
+
+    headers = {
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Profile-Requests": str(profiler.requests),
+        "X-Profile-Seconds": f"{profiler.duration:.3f}",
+    }
+    logger.info(f"Profile capture done: {profiler.samples} samples, {profiler.requests} requests")
+    if format == "speedscope":
+        headers["Content-Disposition"] = 'attachment; filename="profile.speedscope.json"'
+        return JSONResponse(profiler.speedscope(name=f"{profiler.duration:.1f}s, {profiler.requests} requests"), headers=headers)
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
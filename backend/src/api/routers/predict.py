@@ -1,34 +1,46 @@
-from typing import List, Tuple, Dict, Any
-from fastapi import APIRouter, HTTPException
+from typing import List, Tuple, Dict, Any, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Request
 from ..schemas.predict import PredictRequest, PredictResponse, AdjustRequest
-from ..schemas.common import Detection, Summary
+from ..uploads import read_image_upload, UPLOAD_OPENAPI
 from ...core.settings import settings
-from ...ml.yolo_service import infer_with_yolo
+from ...core.timing import timed
+from ...services.predictions import build_prediction, threshold_curve, threshold_grid
+from ...ml.imaging import decode_base64_payload
+from ...ml.yolo_service import infer_detailed_with_yolo, ensure_yolo_ready
+from ...ml.executor import run_inference, InferenceQueueFull
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def _infer_with_fallback(image_b64: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+async def _infer_with_fallback(image: Union[str, bytes]) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
     """
     Inference with fallback to stub if YOLO fails.
+
+    Inference runs on the dedicated inference executor, so the event loop stays free.
+    A full inference queue is not a model failure and is propagated as InferenceQueueFull.
     
     Args:
-        image_b64: Base64 encoded image
-        threshold: Confidence threshold
+        image: Base64 encoded image (JSON API) or raw image bytes (binary upload)
         
     Returns:
-        Tuple of (classes_catalog, detections)
+        Tuple of (classes_catalog, detections, inference info)
     """
+    # Waits while the model is warming up (503 if it takes too long)
+    if not await ensure_yolo_ready():
+        return _infer_stub(image)
+
     try:
         # Try YOLO inference first with base threshold
-        return infer_with_yolo(image_b64, settings.YOLO_CONFIDENCE_THRESHOLD)
+        return await run_inference(infer_detailed_with_yolo, image, settings.YOLO_CONFIDENCE_THRESHOLD)
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.warning(f"YOLO inference failed, falling back to stub: {e}")
         # Fallback to stub
-        return _infer_stub(image_b64)
+        return _infer_stub(image)
 
-def _infer_stub(image_b64: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+def _infer_stub(image: Union[str, bytes]) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
     """
     Fallback inference stub for when YOLO is not available.
     Returns:
@@ -43,60 +55,67 @@ def _infer_stub(image_b64: str) -> Tuple[List[str], List[Dict[str, Any]]]:
         {"class": "wrench_adjustable", "confidence": 0.74, "box": [0.246, 0.611, 0.204, 0.090]},
         {"class": "screwdriver_plus", "confidence": 0.981, "box": [0.300, 0.400, 0.150, 0.080]},
     ]
-    return classes_catalog, detections
+    return classes_catalog, detections, {"stage": "stub", "passes": ["stub"]}
+
+
+def _build_predict_response(
+    classes_catalog: List[str],
+    detections_raw: List[Dict[str, Any]],
+    threshold: float,
+    inference: Optional[Dict[str, Any]] = None,
+    curve_step: Optional[float] = None,
+) -> PredictResponse:
+    """Turn raw detections into the /predict response for a given UI threshold (and optional curve)."""
+
+    # Every candidate is returned, flagged by whether it passes the UI threshold
+    response = build_prediction(classes_catalog, detections_raw, threshold, inference)
+    if curve_step:
+        # Lets the UI slider move without another request
+        response["threshold_curve"] = threshold_curve(classes_catalog, detections_raw, threshold_grid(curve_step))
+    return PredictResponse(**response)
 
 
 @router.post("/predict", response_model=PredictResponse)
 async def predict(req: PredictRequest) -> PredictResponse:
     """
     One-off prediction endpoint.
-    - Accepts base64 image + threshold.
+    - Accepts base64 image + threshold; an image that is not valid base64 is rejected
+      with 422, as in session predict.
     - Produces detections with local IDs and threshold flags.
     - May return < 11 or > 11 detections; this is expected at this stage.
     """
 
+    # Decoded here, so malformed input is a client error and never reaches the stub fallback
+    try:
+        with timed("base64"):
+            image = decode_base64_payload(req.image)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     # Get all detections with base YOLO threshold
-    classes_catalog, detections_raw = _infer_with_fallback(req.image)
-
-    detections: List[Detection] = []
-    for i, d in enumerate(detections_raw, start=1):
-        # Compute threshold pass/fail. Keep numeric conversions explicit.
-        is_pass = float(d.get("confidence", 0.0)) >= float(req.threshold)
-
-        # Wrap raw dict into a validated Pydantic model
-        det = Detection(
-            detection_id=f"det-{i:03d}",
-            **{
-                "class": d.get("class", ""),
-                "confidence": d.get("confidence", 0.0),
-                "is_passed_conf_treshold": is_pass,
-                "box": d.get("box", [0.0, 0.0, 0.0, 0.0]),
-            },
-        )
-        detections.append(det)
-
-    # Classes with at least one candidate
-    found_classes = {det.class_ for det in detections}
-    not_found = [c for c in classes_catalog if c not in found_classes]
-
-    # Summarize the situation for the UI
-    summary = Summary(
-        expected_total=len(classes_catalog),
-        found_candidates=len(detections),
-        passed_above_threshold=sum(1 for d in detections if d.is_passed_conf_treshold),
-        requires_manual_count=int(
-            len(not_found) > 0 or any(not d.is_passed_conf_treshold for d in detections)
-        ),
-        not_found_count=len(not_found),
-    )
-
-    return PredictResponse(
-        threshold=req.threshold,
-        classes_catalog=classes_catalog,
-        detections=detections,
-        not_found=not_found,
-        summary=summary,
-    )
+    classes_catalog, detections_raw, inference = await _infer_with_fallback(image)
+    with timed("response"):
+        return _build_predict_response(classes_catalog, detections_raw, req.threshold, inference, req.curve_step)
+
+
+@router.post("/predict/upload", response_model=PredictResponse, openapi_extra=UPLOAD_OPENAPI)
+async def predict_upload(
+    request: Request,
+    curve_step: Optional[float] = Query(None, gt=0.0, le=0.5, description="Also return the threshold curve"),
+) -> PredictResponse:
+    """
+    Binary variant of /predict (same response).
+    - multipart/form-data: `image` file + optional `threshold` field.
+    - raw `image/jpeg` / `image/png` body with `?threshold=`.
+    - `?curve_step=` adds the threshold curve, like `curve_step` in /predict.
+    The image is never base64-encoded or validated as a JSON string.
+    """
+
+    with timed("body"):
+        image_bytes, threshold = await read_image_upload(request)
+    classes_catalog, detections_raw, inference = await _infer_with_fallback(image_bytes)
+    with timed("response"):
+        return _build_predict_response(classes_catalog, detections_raw, threshold, inference, curve_step)
 
 
 @router.post("/predict/adjust")
@@ -1,16 +1,17 @@
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional, Union
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
 from ...core.db import get_session
 from ...core.auth import get_current_user
 from ...models.user import User
 from ...models.session import Session as SessionModel
 from ..schemas.sessions import (
     CreateHandoutRequest, CreateHandoutResponse,
-    SessionPredictRequest, SessionPredictResponse,
+    SessionPredictRequest, SessionPredictResponse, SessionThresholdRequest,
     SessionAdjustRequest, SessionAdjustResponse,
     IssueRequest, IssueResponse,
     FinalizeRequest, FinalizeResponse,
@@ -19,29 +20,42 @@ from ..schemas.sessions import (
     DiffResponse
 )
 from ..schemas.predict import PredictResponse
+from ..uploads import read_image_upload, UPLOAD_OPENAPI
+from ..blob_responses import blob_response
+from ...core.blobs import get_blob_store
 from ...core.settings import settings
+from ...core.timing import timed
+from ...services.predictions import build_prediction, stage_status
+from ...services.session_images import image_to_bytes, process_stage_image, store_image
 import hashlib
 import json
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
 # Import YOLO inference
-from ...ml.yolo_service import infer_with_yolo
+from ...ml.yolo_service import infer_detailed_with_yolo, ensure_yolo_ready
+from ...ml.executor import run_inference, InferenceQueueFull
 import logging
 
 logger = logging.getLogger(__name__)
 
-def _infer_with_fallback(image_b64: str, threshold: float = 0.5) -> tuple[List[str], List[Dict[str, Any]]]:
-    """Inference with fallback to stub if YOLO fails."""
+async def _infer_with_fallback(image: Union[str, bytes], threshold: float = 0.5) -> tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+    """Inference (on the inference executor) with fallback to stub if YOLO fails."""
+    # Waits while the model is warming up (503 if it takes too long)
+    if not await ensure_yolo_ready():
+        return _infer_stub(image)
+
     try:
         # Try YOLO inference first
-        return infer_with_yolo(image_b64, threshold)
+        return await run_inference(infer_detailed_with_yolo, image, threshold)
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.warning(f"YOLO inference failed in session, falling back to stub: {e}")
         # Fallback to stub
-        return _infer_stub(image_b64)
+        return _infer_stub(image)
 
-def _infer_stub(image_b64: str) -> tuple[List[str], List[Dict[str, Any]]]:
+def _infer_stub(image: Union[str, bytes]) -> tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
     """Fallback inference stub for sessions."""
     
     classes_catalog = settings.CLASSES
@@ -50,7 +64,139 @@ def _infer_stub(image_b64: str) -> tuple[List[str], List[Dict[str, Any]]]:
         {"class": "wrench_adjustable", "confidence": 0.74, "box": [0.246, 0.611, 0.204, 0.090]},
         {"class": "screwdriver_plus", "confidence": 0.981, "box": [0.300, 0.400, 0.150, 0.080]},
     ]
-    return classes_catalog, detections
+    return classes_catalog, detections, {"stage": "stub", "passes": ["stub"]}
+
+
+# Statuses that allow running prediction for each stage
+_PREDICT_ALLOWED = {
+    "handout": (["draft", "handout_auto", "handout_needs_manual"],
+                "Session is not in a state that allows prediction"),
+    "handover": (["issued", "handover_auto", "handover_needs_manual"],
+                 "Session is not in a state that allows handover prediction"),
+}
+
+
+async def _get_predict_session(session_id: str, stage: str, current_user: User, db: AsyncSession) -> SessionModel:
+    """Load the caller's session and check it can accept a prediction for the stage."""
+
+    with timed("db_load"):
+        session = (await db.execute(
+            select(SessionModel).where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
+        )).scalar_one_or_none()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    allowed, error = _PREDICT_ALLOWED[stage]
+    if session.status not in allowed:
+        raise HTTPException(status_code=400, detail=error)
+    return session
+
+
+async def _run_stage_predict(
+    session: SessionModel,
+    stage: str,
+    image: Union[str, bytes],
+    threshold: float,
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+) -> SessionPredictResponse:
+    """
+    Run prediction for a session stage and store the snapshot, candidates, image and new status.
+
+    A base64 image that does not decode is rejected with 422. The image is stored as
+    uploaded; the ingest pipeline (re-encoding, thumbnail, dimensions) runs as a
+    background task after the response is sent.
+    """
+
+    # Decoded once here, so inference and storage see the same bytes
+    try:
+        with timed("base64"):
+            image = image_to_bytes(image)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # The model runs once at the base threshold; the full candidate set is stored so the
+    # session can be re-thresholded later without running it again
+    candidates_threshold = min(float(threshold), settings.YOLO_CONFIDENCE_THRESHOLD)
+    classes_catalog, candidates, inference = await _infer_with_fallback(image, candidates_threshold)
+
+    # Session snapshots list only the detections that pass the UI threshold
+    with timed("response"):
+        predict_response = build_prediction(
+            classes_catalog, candidates, threshold, inference, drop_below_threshold=True
+        )
+    
+    # The image goes to the blob store as raw bytes; the row keeps only its hash
+    with timed("blob_put"):
+        image_sha256 = await store_image(image)
+
+    # Update session with prediction data and image
+    setattr(session, f"{stage}_predict", {
+        **predict_response,
+        "candidates": candidates,
+        "candidates_threshold": candidates_threshold,
+    })
+    setattr(session, f"{stage}_image_sha256", image_sha256)
+    for column in ("thumb_sha256", "image_width", "image_height"):
+        setattr(session, f"{stage}_{column}", None)
+    session.status = stage_status(stage, predict_response["summary"])
+    session.updated_at = datetime.now(timezone.utc)
+    
+    with timed("db_commit"):
+        await db.commit()
+
+    background_tasks.add_task(process_stage_image, session.id, stage, image_sha256)
+    return SessionPredictResponse(**predict_response)
+
+
+async def _rethreshold_stage(
+    session_id: str,
+    stage: str,
+    threshold: float,
+    current_user: User,
+    db: AsyncSession,
+) -> SessionPredictResponse:
+    """Recompute a stage's detections, summary and status for a new threshold from the stored candidates."""
+
+    with timed("db_load"):
+        session = (await db.execute(
+            select(SessionModel)
+            .options(undefer(getattr(SessionModel, f"{stage}_predict")))
+            .where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
+        )).scalar_one_or_none()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if session.status not in [f"{stage}_auto", f"{stage}_needs_manual"]:
+        raise HTTPException(status_code=400, detail=f"Session is not in {stage} verification state")
+    
+    stored = getattr(session, f"{stage}_predict") or {}
+    if "candidates" not in stored:
+        raise HTTPException(status_code=400, detail="No stored candidates for this stage, run predict again")
+    if threshold < stored["candidates_threshold"]:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Candidates were stored down to {stored['candidates_threshold']}, run predict again for a lower threshold",
+        )
+
+    predict_response = build_prediction(
+        stored["classes_catalog"], stored["candidates"], threshold, stored.get("inference"),
+        drop_below_threshold=True,
+    )
+    setattr(session, f"{stage}_predict", {
+        **predict_response,
+        "candidates": stored["candidates"],
+        "candidates_threshold": stored["candidates_threshold"],
+    })
+    session.status = stage_status(stage, predict_response["summary"])
+    session.updated_at = datetime.now(timezone.utc)
+    
+    with timed("db_commit"):
+        await db.commit()
+    
+    return SessionPredictResponse(**predict_response)
 
 
 @router.post("/handout", response_model=CreateHandoutResponse, status_code=201)
@@ -83,72 +229,44 @@ async def create_handout_session(
 @router.post("/{session_id}/handout/predict", response_model=SessionPredictResponse)
 async def handout_predict(
     session_id: str,
+    background_tasks: BackgroundTasks,
     req: SessionPredictRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_session)
 ) -> SessionPredictResponse:
     """Run prediction within a session context."""
     
-    # Get session
-    session = (await db.execute(
-        select(SessionModel).where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
-    )).scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if session.status not in ["draft", "handout_auto", "handout_needs_manual"]:
-        raise HTTPException(status_code=400, detail="Session is not in a state that allows prediction")
-    
-    # Run inference with YOLO (fallback to stub)
-    classes_catalog, detections_raw = _infer_with_fallback(req.image, req.threshold)
-    
-    # Process detections (same logic as in predict.py)
-    detections = []
-    for i, d in enumerate(detections_raw, start=1):
-        is_pass = float(d.get("confidence", 0.0)) >= float(req.threshold)
-        
-        det = {
-            "detection_id": f"det-{i:03d}",
-            "class": d.get("class", ""),
-            "confidence": d.get("confidence", 0.0),
-            "is_passed_conf_treshold": is_pass,
-            "box": d.get("box", [0.0, 0.0, 0.0, 0.0]),
-        }
-        detections.append(det)
-    
-    # Calculate summary
-    found_classes = {det["class"] for det in detections}
-    not_found = [c for c in classes_catalog if c not in found_classes]
-    
-    summary = {
-        "expected_total": len(classes_catalog),
-        "found_candidates": len(detections),
-        "passed_above_threshold": sum(1 for d in detections if d["is_passed_conf_treshold"]),
-        "requires_manual_count": int(
-            len(not_found) > 0 or any(not d["is_passed_conf_treshold"] for d in detections)
-        ),
-        "not_found_count": len(not_found),
-    }
-    
-    # Create response
-    predict_response = {
-        "threshold": req.threshold,
-        "classes_catalog": classes_catalog,
-        "detections": detections,
-        "not_found": not_found,
-        "summary": summary,
-    }
-    
-    # Update session with prediction data and image
-    session.handout_predict = predict_response
-    session.handout_image = req.image  # Store the base64 image
-    session.status = "handout_needs_manual" if summary["requires_manual_count"] > 0 else "handout_auto"
-    session.updated_at = datetime.now(timezone.utc)
-    
-    await db.commit()
-    
-    return SessionPredictResponse(**predict_response)
+    session = await _get_predict_session(session_id, "handout", current_user, db)
+    return await _run_stage_predict(session, "handout", req.image, req.threshold, db, background_tasks)
+
+
+@router.post("/{session_id}/handout/predict/upload", response_model=SessionPredictResponse,
+             openapi_extra=UPLOAD_OPENAPI)
+async def handout_predict_upload(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> SessionPredictResponse:
+    """Binary variant of handout predict (multipart `image` file or raw image/jpeg body)."""
+
+    session = await _get_predict_session(session_id, "handout", current_user, db)
+    with timed("body"):
+        image_bytes, threshold = await read_image_upload(request)
+    return await _run_stage_predict(session, "handout", image_bytes, threshold, db, background_tasks)
+
+
+@router.post("/{session_id}/handout/threshold", response_model=SessionPredictResponse)
+async def handout_rethreshold(
+    session_id: str,
+    req: SessionThresholdRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> SessionPredictResponse:
+    """Re-apply a new threshold to the stored handout prediction (no inference)."""
+
+    return await _rethreshold_stage(session_id, "handout", req.threshold, current_user, db)
 
 
 @router.post("/{session_id}/handout/adjust", response_model=SessionAdjustResponse)
@@ -243,7 +361,8 @@ async def issue_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if session.status != "handout_auto" and session.handout_final is None:
+    # The final snapshot is loaded only when the status alone does not allow issuing
+    if session.status != "handout_auto" and await session.awaitable_attrs.handout_final is None:
         raise HTTPException(status_code=400, detail="Session must have final annotations before issuing")
     
     if not req.confirm:
@@ -277,7 +396,10 @@ async def finalize_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if session.status not in ["handover_auto", "handover_needs_manual"] and session.handover_final is None:
+    if (
+        session.status not in ["handover_auto", "handover_needs_manual"]
+        and await session.awaitable_attrs.handover_final is None
+    ):
         raise HTTPException(status_code=400, detail="Session must have handover final annotations before finalizing")
     
     if not req.confirm:
@@ -352,53 +474,117 @@ async def list_sessions(
     )
 
 
+# Parts of a stage snapshot that GET /sessions/{id}?fields= can select
+CARD_STAGES = ("handout", "handover")
+CARD_PARTS = ("predict", "final", "image")
+
+
+def parse_card_fields(fields: Optional[str]) -> Dict[str, set]:
+    """
+    Parse ``fields`` (e.g. ``handout.final,handover``) into {stage: parts}.
+
+    A bare stage selects all its parts; None or empty selects everything.
+    """
+
+    if not fields or not fields.strip():
+        return {stage: set(CARD_PARTS) for stage in CARD_STAGES}
+    selected: Dict[str, set] = {}
+    for token in (t.strip() for t in fields.split(",")):
+        if not token:
+            continue
+        stage, _, part = token.partition(".")
+        if stage not in CARD_STAGES or (part and part not in CARD_PARTS):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown field {token!r}; use a stage ({', '.join(CARD_STAGES)}) "
+                       f"or stage.part ({', '.join(CARD_PARTS)})",
+            )
+        selected.setdefault(stage, set()).update([part] if part else CARD_PARTS)
+    return selected
+
+
+def _stage_image_fields(request: Request, session: SessionModel, stage: str) -> Dict[str, Any]:
+    """Image fields of a stage snapshot: URLs of the photo and thumbnail, hashes and size."""
+
+    image_sha256 = getattr(session, f"{stage}_image_sha256")
+    thumb_sha256 = getattr(session, f"{stage}_thumb_sha256")
+    path_params = {"session_id": str(session.id), "stage": stage}
+    return {
+        "image_url": request.app.url_path_for("get_session_image", **path_params) if image_sha256 else None,
+        "image_sha256": image_sha256,
+        "thumbnail_url": request.app.url_path_for("get_session_thumbnail", **path_params) if thumb_sha256 else None,
+        "thumbnail_sha256": thumb_sha256,
+        "width": getattr(session, f"{stage}_image_width"),
+        "height": getattr(session, f"{stage}_image_height"),
+    }
+
+
+def _stage_snapshot(request: Request, session: SessionModel, stage: str, parts: set) -> Optional[HandStageSnapshot]:
+    """Snapshot of the selected parts of a stage, or None if the stage has not started."""
+
+    timestamp = session.issued_at if stage == "handout" else session.returned_at
+    values: Dict[str, Any] = {}
+    for part in ("predict", "final"):
+        if part in parts:
+            values[part] = getattr(session, f"{stage}_{part}")
+    if "image" in parts:
+        values.update(_stage_image_fields(request, session, stage))
+    if not (values.get("predict") or values.get("final") or values.get("image_sha256") or timestamp):
+        return None
+    return HandStageSnapshot(
+        **values,
+        issued_at=timestamp.isoformat() if stage == "handout" and timestamp else None,
+        returned_at=timestamp.isoformat() if stage == "handover" and timestamp else None,
+    )
+
+
 @router.get("/{session_id}", response_model=SessionCardResponse)
 async def get_session_details(
     session_id: str,
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated stages or stage parts to return, e.g. `handout.final,handover.image` "
+                    "(parts: predict, final, image; default: everything)",
+    ),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_session)
 ) -> SessionCardResponse:
-    """Get detailed session information. Admins can view any session, simple users only their own."""
-    
+    """
+    Get detailed session information. Admins can view any session, simple users only their own.
+
+    Stage snapshots link to the photo and thumbnail (GET /sessions/{id}/images/{stage}[/thumb]).
+    Only the JSON snapshots selected by ``fields`` are read from the database.
+    """
+
+    selected = parse_card_fields(fields)
+    snapshot_columns = [
+        undefer(getattr(SessionModel, f"{stage}_{part}"))
+        for stage, parts in selected.items()
+        for part in ("predict", "final")
+        if part in parts
+    ]
+
     # Build query based on user role
-    if current_user.role == "admin":
-        # Admins can view any session
-        query = select(SessionModel, User).join(User, SessionModel.user_id == User.id).where(SessionModel.id == uuid.UUID(session_id))
-    else:
+    query = (
+        select(SessionModel, User)
+        .join(User, SessionModel.user_id == User.id)
+        .options(*snapshot_columns)
+        .where(SessionModel.id == uuid.UUID(session_id))
+    )
+    if current_user.role != "admin":
         # Simple users can only view their own sessions
-        query = select(SessionModel, User).join(User, SessionModel.user_id == User.id).where(
-            SessionModel.id == uuid.UUID(session_id), 
-            SessionModel.user_id == current_user.id
-        )
+        query = query.where(SessionModel.user_id == current_user.id)
     
-    result = (await db.execute(query)).first()
+    with timed("db_load"):
+        result = (await db.execute(query)).first()
     
     if not result:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session, session_owner = result
-    
-    # Build handout snapshot
-    handout = None
-    if session.handout_predict or session.handout_final or session.issued_at or session.handout_image:
-        handout = HandStageSnapshot(
-            predict=session.handout_predict,
-            final=session.handout_final,
-            image=session.handout_image,
-            issued_at=session.issued_at.isoformat() if session.issued_at else None,
-            returned_at=None
-        )
-    
-    # Build handover snapshot
-    handover = None
-    if session.handover_predict or session.handover_final or session.returned_at or session.handover_image:
-        handover = HandStageSnapshot(
-            predict=session.handover_predict,
-            final=session.handover_final,
-            image=session.handover_image,
-            issued_at=None,
-            returned_at=session.returned_at.isoformat() if session.returned_at else None
-        )
+    handout = _stage_snapshot(request, session, "handout", selected["handout"]) if "handout" in selected else None
+    handover = _stage_snapshot(request, session, "handover", selected["handover"]) if "handover" in selected else None
     
     return SessionCardResponse(
         id=str(session.id),
@@ -414,75 +600,99 @@ async def get_session_details(
     )
 
 
+async def _stage_image_response(
+    session_id: str,
+    stage: str,
+    column: str,
+    request: Request,
+    current_user: User,
+    db: AsyncSession,
+) -> Response:
+    """Stream one stored image of a session stage; same access rules as the session card."""
+
+    image_column = getattr(SessionModel, f"{stage}_{column}")
+    query = select(image_column).where(SessionModel.id == uuid.UUID(session_id))
+    if current_user.role != "admin":
+        query = query.where(SessionModel.user_id == current_user.id)
+    with timed("db_load"):
+        found = (await db.execute(query)).first()
+
+    if not found:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not found[0]:
+        raise HTTPException(status_code=404, detail=f"No {stage} image")
+    return await blob_response(request, get_blob_store(), found[0])
+
+
+@router.get("/{session_id}/images/{stage}", response_class=Response,
+            responses={200: {"content": {"image/jpeg": {}, "image/webp": {}, "image/png": {}}}})
+async def get_session_image(
+    session_id: str,
+    stage: Literal["handout", "handover"],
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> Response:
+    """Stored photo of a stage, streamed with ETag, If-None-Match (304) and Range (206) support."""
+
+    return await _stage_image_response(session_id, stage, "image_sha256", request, current_user, db)
+
+
+@router.get("/{session_id}/images/{stage}/thumb", response_class=Response,
+            responses={200: {"content": {"image/jpeg": {}, "image/webp": {}}}})
+async def get_session_thumbnail(
+    session_id: str,
+    stage: Literal["handout", "handover"],
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> Response:
+    """Thumbnail of a stage photo (made by the ingest pipeline after predict)."""
+
+    return await _stage_image_response(session_id, stage, "thumb_sha256", request, current_user, db)
+
+
 @router.post("/{session_id}/handover/predict", response_model=SessionPredictResponse)
 async def handover_predict(
     session_id: str,
+    background_tasks: BackgroundTasks,
     req: SessionPredictRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_session)
 ) -> SessionPredictResponse:
     """Run prediction for handover stage."""
     
-    # Get session
-    session = (await db.execute(
-        select(SessionModel).where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
-    )).scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if session.status not in ["issued", "handover_auto", "handover_needs_manual"]:
-        raise HTTPException(status_code=400, detail="Session is not in a state that allows handover prediction")
-    
-    # Run inference with YOLO (fallback to stub)
-    classes_catalog, detections_raw = _infer_with_fallback(req.image, req.threshold)
-    
-    # Process detections (same logic as handout)
-    detections = []
-    for i, d in enumerate(detections_raw, start=1):
-        is_pass = float(d.get("confidence", 0.0)) >= float(req.threshold)
-        
-        det = {
-            "detection_id": f"det-{i:03d}",
-            "class": d.get("class", ""),
-            "confidence": d.get("confidence", 0.0),
-            "is_passed_conf_treshold": is_pass,
-            "box": d.get("box", [0.0, 0.0, 0.0, 0.0]),
-        }
-        detections.append(det)
-    
-    # Calculate summary
-    found_classes = {det["class"] for det in detections}
-    not_found = [c for c in classes_catalog if c not in found_classes]
-    
-    summary = {
-        "expected_total": len(classes_catalog),
-        "found_candidates": len(detections),
-        "passed_above_threshold": sum(1 for d in detections if d["is_passed_conf_treshold"]),
-        "requires_manual_count": int(
-            len(not_found) > 0 or any(not d["is_passed_conf_treshold"] for d in detections)
-        ),
-        "not_found_count": len(not_found),
-    }
-    
-    # Create response
-    predict_response = {
-        "threshold": req.threshold,
-        "classes_catalog": classes_catalog,
-        "detections": detections,
-        "not_found": not_found,
-        "summary": summary,
-    }
-    
-    # Update session with handover prediction data and image
-    session.handover_predict = predict_response
-    session.handover_image = req.image  # Store the base64 image
-    session.status = "handover_needs_manual" if summary["requires_manual_count"] > 0 else "handover_auto"
-    session.updated_at = datetime.now(timezone.utc)
-    
-    await db.commit()
-    
-    return SessionPredictResponse(**predict_response)
+    session = await _get_predict_session(session_id, "handover", current_user, db)
+    return await _run_stage_predict(session, "handover", req.image, req.threshold, db, background_tasks)
+
+
+@router.post("/{session_id}/handover/predict/upload", response_model=SessionPredictResponse,
+             openapi_extra=UPLOAD_OPENAPI)
+async def handover_predict_upload(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> SessionPredictResponse:
+    """Binary variant of handover predict (multipart `image` file or raw image/jpeg body)."""
+
+    session = await _get_predict_session(session_id, "handover", current_user, db)
+    with timed("body"):
+        image_bytes, threshold = await read_image_upload(request)
+    return await _run_stage_predict(session, "handover", image_bytes, threshold, db, background_tasks)
+
+
+@router.post("/{session_id}/handover/threshold", response_model=SessionPredictResponse)
+async def handover_rethreshold(
+    session_id: str,
+    req: SessionThresholdRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+) -> SessionPredictResponse:
+    """Re-apply a new threshold to the stored handover prediction (no inference)."""
+
+    return await _rethreshold_stage(session_id, "handover", req.threshold, current_user, db)
 
 
 @router.post("/{session_id}/handover/adjust", response_model=SessionAdjustResponse)
@@ -563,7 +773,9 @@ async def get_session_diff(
     """Get differences between handout and handover stages."""
     
     session = (await db.execute(
-        select(SessionModel).where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
+        select(SessionModel)
+        .options(undefer(SessionModel.handout_final), undefer(SessionModel.handover_final))
+        .where(SessionModel.id == uuid.UUID(session_id), SessionModel.user_id == current_user.id)
     )).scalar_one_or_none()
     
     if not session:
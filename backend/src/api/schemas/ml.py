@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class ModelInfo(BaseModel):
+    name: str = Field(..., description="File name in backend/models")
+    version: str = Field(..., description="Short SHA-256 of the weights")
+    size_bytes: int
+    modified_at: float = Field(..., description="File mtime (Unix time)")
+    active: bool = Field(..., description="Currently serving inference")
+
+class ModelListResponse(BaseModel):
+    active_version: Optional[str] = None
+    models: List[ModelInfo]
+
+class ReloadRequest(BaseModel):
+    model: Optional[str] = Field(
+        None, description="File name in backend/models (default: MODEL_PATH or the newest .pt)"
+    )
+
+class ReloadResponse(BaseModel):
+    model_path: str
+    model_version: Optional[str]
+    previous_version: Optional[str] = None
+    load_seconds: float
+    warmup: Optional[Dict[str, Any]] = None
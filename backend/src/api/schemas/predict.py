@@ -5,6 +5,23 @@ from .common import Detection, Summary, BBox
 class PredictRequest(BaseModel):
     image: str = Field(..., description="Image as base64 string")
     threshold: float = Field(0.98, ge=0.0, le=1.0, description="UI threshold for manual verification")
+    curve_step: Optional[float] = Field(
+        None, gt=0.0, le=0.5, description="Also return the threshold curve on a 0..1 grid with this step"
+    )
+
+class InferenceInfo(BaseModel):
+    stage: str = Field(..., description="Pass that produced the detections: coarse | full | tiled | stub")
+    passes: List[str] = Field(default_factory=list, description="All passes that ran, in order")
+    cached: bool = Field(False, description="Served from the inference result cache")
+    model_version: Optional[str] = Field(None, description="Short SHA-256 of the model weights (None for the stub)")
+
+class ThresholdCurve(BaseModel):
+    """Summary counts per UI threshold, from the same inference (columns share one index)."""
+
+    thresholds: List[float]
+    passed_above_threshold: List[int]
+    not_found_count: List[int]
+    requires_manual_count: List[int]
 
 class PredictResponse(BaseModel):
     threshold: float
@@ -12,6 +29,8 @@ class PredictResponse(BaseModel):
     detections: List[Detection]
     not_found: List[str]
     summary: Summary
+    inference: Optional[InferenceInfo] = None
+    threshold_curve: Optional[ThresholdCurve] = None
 
 class Annotation(BaseModel):
     class_: str = Field(..., alias="class")
@@ -17,6 +17,9 @@ class SessionPredictRequest(BaseModel):
     image: str
     threshold: float = Field(0.98, ge=0.0, le=1.0)
 
+class SessionThresholdRequest(BaseModel):
+    threshold: float = Field(..., ge=0.0, le=1.0)
+
 # Reuse PredictResponse for body; server updates internal status accordingly.
 SessionPredictResponse = PredictResponse
 
@@ -61,7 +64,12 @@ class SessionsListResponse(BaseModel):
 class HandStageSnapshot(BaseModel):
     predict: Optional[PredictResponse] = None
     final: Optional[Dict] = None  # use your final annotations structure
-    image: Optional[str] = None  # base64 encoded image
+    image_url: Optional[str] = None  # GET /sessions/{id}/images/{stage}
+    image_sha256: Optional[str] = None  # content address in the blob store (the image ETag)
+    thumbnail_url: Optional[str] = None  # GET .../thumb, set once the ingest pipeline ran
+    thumbnail_sha256: Optional[str] = None
+    width: Optional[int] = None  # stored photo size, px
+    height: Optional[int] = None
     issued_at: Optional[str] = None
     returned_at: Optional[str] = None
 
@@ -0,0 +1,120 @@
+# Binary image uploads (multipart/form-data and raw image bodies)
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from starlette.datastructures import UploadFile
+from ..core.settings import settings
+
+RAW_IMAGE_TYPES = ("image/jpeg", "image/png", "image/webp", "application/octet-stream")
+DEFAULT_THRESHOLD = 0.98
+_CHUNK_SIZE = 1 << 20
+
+# OpenAPI description of the request body (the endpoints read the body themselves)
+UPLOAD_OPENAPI: Dict[str, Any] = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["image"],
+                    "properties": {
+                        "image": {"type": "string", "format": "binary"},
+                        "threshold": {"type": "number", "minimum": 0, "maximum": 1, "default": DEFAULT_THRESHOLD},
+                    },
+                }
+            },
+            "image/jpeg": {"schema": {"type": "string", "format": "binary"}},
+            "image/png": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Image exceeds {settings.MAX_IMAGE_UPLOAD_BYTES} bytes",
+    )
+
+
+def _parse_threshold(value: Optional[Any]) -> float:
+    if value is None or value == "":
+        return DEFAULT_THRESHOLD
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="threshold must be a number")
+    if not 0.0 <= threshold <= 1.0:
+        raise HTTPException(status_code=422, detail="threshold must be within [0, 1]")
+    return threshold
+
+
+async def _read_raw_body(request: Request) -> bytes:
+    """Stream the request body into one buffer, enforcing the upload size limit."""
+
+    limit = settings.MAX_IMAGE_UPLOAD_BYTES
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise _too_large()
+
+    buf = bytearray()
+    async for chunk in request.stream():
+        buf += chunk
+        if len(buf) > limit:
+            raise _too_large()
+    return bytes(buf)
+
+
+async def _read_form_file(request: Request) -> Tuple[bytes, Optional[str]]:
+    form = await request.form(max_files=1, max_fields=4)
+    try:
+        upload = form.get("image")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=422, detail="multipart field 'image' (file) is required")
+        limit = settings.MAX_IMAGE_UPLOAD_BYTES
+        if upload.size is not None and upload.size > limit:
+            raise _too_large()
+        # The size is not always known, so the read itself stops one byte past the limit
+        buf = bytearray()
+        while len(buf) <= limit:
+            chunk = await upload.read(min(_CHUNK_SIZE, limit + 1 - len(buf)))
+            if not chunk:
+                break
+            buf += chunk
+        if len(buf) > limit:
+            raise _too_large()
+        threshold = form.get("threshold")
+        return bytes(buf), threshold if isinstance(threshold, str) else None
+    finally:
+        await form.close()
+
+
+async def read_image_upload(request: Request) -> Tuple[bytes, float]:
+    """
+    Read an uploaded image and UI threshold from a binary request.
+
+    Supported bodies:
+      - multipart/form-data with an ``image`` file field and optional ``threshold`` field
+      - raw image/jpeg, image/png, image/webp or application/octet-stream, with
+        ``?threshold=`` as a query parameter
+
+    Returns:
+        Tuple of (encoded image bytes, threshold)
+    """
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type == "multipart/form-data":
+        data, threshold = await _read_form_file(request)
+    elif content_type in RAW_IMAGE_TYPES:
+        data = await _read_raw_body(request)
+        threshold = request.query_params.get("threshold")
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Use multipart/form-data or a raw image/jpeg, image/png body",
+        )
+
+    if not data:
+        raise HTTPException(status_code=422, detail="Image is empty")
+    return data, _parse_threshold(threshold)
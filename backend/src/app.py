@@ -1,13 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .core.settings import settings
 from .core.logging import setup_logging
+from .core.timing import ServerTimingMiddleware, histograms
 from .api.routers import predict
 from .api.routers import sessions
+from .api.routers import ml as ml_router
+from .api.routers import live as live_router
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from .api.routers import auth as auth_router
-from .ml.yolo_service import initialize_yolo_service
+from .ml.yolo_service import ModelNotReady, start_yolo_warmup, shutdown_yolo_service, yolo_state
+from .ml.result_cache import get_result_cache
+from .ml.threads import apply_thread_profile
+from .ml.executor import InferenceQueueFull, get_inference_executor, shutdown_inference_executor
+from .services.session_images import run_blob_gc
 
 
 # init logging early
@@ -18,18 +27,25 @@ logger = logging.getLogger("app")
 async def lifespan(app: FastAPI):
     logger.info("Starting %s", settings.APP_NAME)
     
-    # Initialize YOLO model at startup
+    # Saved `python -m src.ml.tune` profile: worker count and threads per worker
+    apply_thread_profile()
+
+    # Load YOLO model in the background; requests are accepted right away and
+    # inference endpoints wait for it (see /ml/status "state")
     if settings.USE_YOLO:
-        logger.info("Initializing YOLO model...")
-        yolo_initialized = initialize_yolo_service()
-        if yolo_initialized:
-            logger.info("✅ YOLO model loaded and ready for inference!")
-        else:
-            logger.warning("⚠️ YOLO model failed to load, will fallback to stub")
+        logger.info("Warming up YOLO model in the background...")
     else:
         logger.info("YOLO disabled, using stub inference")
+    start_yolo_warmup()
+
+    # Periodic sweep of blobs no session references
+    blob_gc = asyncio.create_task(run_blob_gc()) if settings.BLOB_GC_INTERVAL_SECONDS > 0 else None
     
     yield
+    if blob_gc is not None:
+        blob_gc.cancel()
+    shutdown_inference_executor()
+    shutdown_yolo_service()
     logger.info("Shutting down %s", settings.APP_NAME)
 
 app = FastAPI(
@@ -48,6 +64,32 @@ app.add_middleware(
     allow_credentials=True,
 )
 
+# Per-stage timings in a Server-Timing header and the /metrics histograms (outermost, so "total" covers everything)
+app.add_middleware(ServerTimingMiddleware)
+
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full_handler(request: Request, exc: InferenceQueueFull):
+    """Shed load when the inference queue is full instead of stalling the worker."""
+
+    logger.warning("Rejecting %s: %s", request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Inference queue is full, retry later", "queue_depth": exc.queue_depth},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(ModelNotReady)
+async def model_not_ready_handler(request: Request, exc: ModelNotReady):
+    """Reject inference while the model is warming up (or unavailable without stub fallback)."""
+
+    logger.warning("Rejecting %s: %s", request.url.path, exc)
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "state": exc.state},
+        headers=headers,
+    )
+
 @app.get("/healthz")
 async def healthz():
     # DB не обязателен; если задан, можно добавить ping позже
@@ -57,29 +99,55 @@ async def healthz():
 async def version():
     return {"name": settings.APP_NAME, "version": "0.0.1"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms per route and stage, in Prometheus text format."""
+    return PlainTextResponse(histograms.prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/ml/status")
 async def ml_status():
     """Check ML model status."""
+    inference_queue = get_inference_executor().stats()
+    lifecycle = yolo_state()
+    cache = get_result_cache()
+    result_cache = cache.stats() if cache is not None else None
     try:
         from .ml.yolo_service import _yolo_service
-        if _yolo_service is not None and _yolo_service.model is not None:
+        if _yolo_service is not None and _yolo_service.is_loaded:
             return {
                 "yolo_enabled": settings.USE_YOLO,
                 "model_loaded": True,
                 "model_path": _yolo_service.model_path,
-                "model_classes": len(_yolo_service.model.names) if _yolo_service.model else 0,
-                "status": "ready"
+                "model_version": _yolo_service.model_version,
+                "backend": settings.YOLO_BACKEND,
+                "model_classes": len(_yolo_service.class_names),
+                "class_mapping_version": _yolo_service.class_mapping_version,
+                "batching": _yolo_service.batching_stats(),
+                "worker_pool": _yolo_service.pool_stats(),
+                "inference_queue": inference_queue,
+                "result_cache": result_cache,
+                "load_seconds": lifecycle["load_seconds"],
+                "warmup": _yolo_service.warmup_timings,
+                "threads": lifecycle["threads"],
+                "last_reload": lifecycle["last_reload"],
+                "status": lifecycle["state"]
             }
         else:
             return {
                 "yolo_enabled": settings.USE_YOLO,
                 "model_loaded": False,
-                "status": "using_stub"
+                "inference_queue": inference_queue,
+                "result_cache": result_cache,
+                "error": lifecycle["error"],
+                "stub_fallback": settings.ML_STUB_FALLBACK,
+                "status": lifecycle["state"]
             }
     except Exception as e:
         return {
             "yolo_enabled": settings.USE_YOLO,
             "model_loaded": False,
+            "inference_queue": inference_queue,
+            "result_cache": result_cache,
             "error": str(e),
             "status": "error"
         }
@@ -87,4 +155,6 @@ async def ml_status():
 # Routers
 app.include_router(predict.router, prefix="", tags=["predict"])
 app.include_router(auth_router.router)
-app.include_router(sessions.router)
\ No newline at end of file
+app.include_router(sessions.router)
+app.include_router(ml_router.router)
+app.include_router(live_router.router)
\ No newline at end of file
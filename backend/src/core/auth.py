@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.user import User
 from ..core.security import hash_password, verify_password, create_access_token, decode_access_token
 from ..core.db import get_session
+from ..core.timing import timed
 
 VALID_ROLES = {"simple", "admin"}
 
@@ -49,27 +50,39 @@ async def get_current_user(
 ) -> User:
     """FastAPI dependency to get current user from JWT token."""
     
-    try:
-        payload = decode_access_token(credentials.credentials)
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user ID"
-            )
+    # Token check and user lookup, as a Server-Timing stage
+    with timed("auth"):
+        try:
+            payload = decode_access_token(credentials.credentials)
+            user_id = payload.get("sub")
+            if user_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token: missing user ID"
+                )
+        
+            # Fetch user from database
+            user = (await db.execute(select(User).where(User.id == uuid.UUID(user_id)))).scalar_one_or_none()
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+        
+            return user
         
-        # Fetch user from database
-        user = (await db.execute(select(User).where(User.id == uuid.UUID(user_id)))).scalar_one_or_none()
-        if user is None:
+        except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
+                detail=f"Invalid token: {str(e)}"
             )
-        
-        return user
-        
-    except Exception as e:
+
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """FastAPI dependency that only lets admin users through (403 otherwise)."""
+
+    if current_user.role != "admin":
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid token: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin role required"
+        )
+    return current_user
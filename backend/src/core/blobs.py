@@ -0,0 +1,332 @@
+# Content-addressed blob store for session images (local filesystem or S3-compatible)
+import abc
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Read size when streaming a blob
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobNotFound(KeyError):
+    """No blob is stored under the requested hash."""
+
+
+def blob_digest(data: bytes) -> str:
+    """SHA-256 of the blob, its content address."""
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_key(digest: str) -> str:
+    """Relative object key of a blob, fanned out by hash prefix (``ab/cd/abcd...``)."""
+
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Not a SHA-256 hex digest: {digest!r}")
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class BlobStore(abc.ABC):
+    """
+    Immutable blobs addressed by their SHA-256.
+
+    Writing the same bytes twice stores them once, and a stored blob never changes,
+    so readers need no locking and the hash doubles as a strong ETag. Backends
+    implement the abstract methods; put() is shared.
+
+    Blobs are only removed by garbage collection of unreferenced blobs that have not
+    been written for a grace period (see services.session_images.collect_unreferenced_blobs).
+    """
+
+    def put(self, data: bytes) -> str:
+        """
+        Store the bytes and return their hash.
+
+        An already stored blob is not rewritten, but its modification time is
+        refreshed, so garbage collection sees it as new until the caller has had time
+        to record a reference to it.
+        """
+
+        digest = blob_digest(data)
+        key = blob_key(digest)
+        if not self._touch(key):
+            self._write(key, data)
+        return digest
+
+    @abc.abstractmethod
+    def get(self, digest: str) -> bytes:
+        """Return the blob; raises BlobNotFound if it is not stored."""
+
+    @abc.abstractmethod
+    def exists(self, digest: str) -> bool:
+        """Whether a blob is stored under the hash."""
+
+    @abc.abstractmethod
+    def size(self, digest: str) -> int:
+        """Size of the blob in bytes; raises BlobNotFound if it is not stored."""
+
+    @abc.abstractmethod
+    def modified(self, digest: str) -> float:
+        """Time of the last write or put() of the blob (Unix time); raises BlobNotFound."""
+
+    @abc.abstractmethod
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        """Every stored blob as (digest, modified)."""
+
+    @abc.abstractmethod
+    def delete(self, digest: str) -> None:
+        """Remove the blob; a blob that is not stored is ignored."""
+
+    @abc.abstractmethod
+    def iter_range(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Stream bytes ``start..end`` (inclusive; None = to the end) in chunks of CHUNK_SIZE."""
+
+    @abc.abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        """Store the bytes under the object key."""
+
+    @abc.abstractmethod
+    def _touch(self, key: str) -> bool:
+        """Refresh the modification time of a stored object; False if it is not stored."""
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / blob_key(digest)
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return self.path(digest).read_bytes()
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def size(self, digest: str) -> int:
+        try:
+            return self.path(digest).stat().st_size
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def modified(self, digest: str) -> float:
+        try:
+            return self.path(digest).stat().st_mtime
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        for path in self.root.glob("*/*/*"):
+            if len(path.name) != 64 or path.suffix:
+                continue  # temp files of writes in progress
+            try:
+                yield path.name, path.stat().st_mtime
+            except FileNotFoundError:
+                pass
+
+    def delete(self, digest: str) -> None:
+        self.path(digest).unlink(missing_ok=True)
+
+    def iter_range(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            f = self.path(digest).open("rb")
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+        with f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _touch(self, key: str) -> bool:
+        try:
+            os.utime(self.root / key)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs as objects in an S3-compatible bucket (AWS S3, MinIO, Ceph RGW, ...).
+
+    Uses a boto3 S3 client; credentials come from the standard AWS environment
+    variables / config files. Any object with the same get_object / put_object /
+    head_object / copy_object / delete_object / get_paginator methods can be passed
+    as ``client``.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        client: Optional[Any] = None,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+    ):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("BLOB_STORE_BACKEND=s3 requires boto3 (pip install -e '.[s3]')")
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+
+    def _object_key(self, digest: str) -> str:
+        return self.prefix + blob_key(digest)
+
+    @staticmethod
+    def _is_missing(error: Exception) -> bool:
+        code = str(getattr(error, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def get(self, digest: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(digest))
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFound(digest)
+            raise
+        return response["Body"].read()
+
+    def exists(self, digest: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(digest))
+            return True
+        except Exception as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    def size(self, digest: str) -> int:
+        try:
+            return int(self.client.head_object(Bucket=self.bucket, Key=self._object_key(digest))["ContentLength"])
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFound(digest)
+            raise
+
+    def modified(self, digest: str) -> float:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(digest))["LastModified"].timestamp()
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFound(digest)
+            raise
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        pages = self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix)
+        for page in pages:
+            for obj in page.get("Contents", []):
+                digest = obj["Key"].rsplit("/", 1)[-1]
+                if len(digest) == 64:
+                    yield digest, obj["LastModified"].timestamp()
+
+    def delete(self, digest: str) -> None:
+        # DeleteObject succeeds for missing keys
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(digest))
+
+    def iter_range(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(digest), Range=byte_range)
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFound(digest)
+            raise
+        body = response["Body"]
+        try:
+            while True:
+                chunk = body.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    def _write(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def _touch(self, key: str) -> bool:
+        # A server-side copy onto itself renews LastModified without uploading the bytes
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self.prefix + key,
+                CopySource={"Bucket": self.bucket, "Key": self.prefix + key},
+                MetadataDirective="REPLACE",
+            )
+            return True
+        except Exception as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+
+def default_blob_dir() -> Path:
+    """Default local blob directory (backend/data/blobs)."""
+
+    return Path(__file__).parent.parent.parent / "data" / "blobs"
+
+
+def create_blob_store() -> BlobStore:
+    """Build the blob store configured in settings."""
+
+    if settings.BLOB_STORE_BACKEND == "s3":
+        if not settings.BLOB_S3_BUCKET:
+            raise RuntimeError("BLOB_STORE_BACKEND=s3 requires BLOB_S3_BUCKET")
+        logger.info(f"Blob store: s3://{settings.BLOB_S3_BUCKET}/{settings.BLOB_S3_PREFIX}")
+        return S3BlobStore(
+            bucket=settings.BLOB_S3_BUCKET,
+            prefix=settings.BLOB_S3_PREFIX,
+            endpoint_url=settings.BLOB_S3_ENDPOINT_URL,
+            region=settings.BLOB_S3_REGION,
+        )
+    root = settings.BLOB_STORE_DIR or str(default_blob_dir())
+    logger.info(f"Blob store: {root}")
+    return LocalBlobStore(root)
+
+
+# Global store instance
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Get or create the global blob store."""
+
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = create_blob_store()
+    return _blob_store
@@ -3,6 +3,7 @@ from typing import AsyncGenerator, Optional
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
+    AsyncAttrs,
     AsyncEngine,
     AsyncSession,
     create_async_engine,
@@ -13,8 +14,13 @@ from sqlalchemy.orm import DeclarativeBase
 from .settings import settings
 
 # Declarative Base
-class Base(DeclarativeBase):
-    """SQLAlchemy Declarative Base used by models."""
+class Base(AsyncAttrs, DeclarativeBase):
+    """
+    SQLAlchemy Declarative Base used by models.
+
+    AsyncAttrs lets async code load deferred columns on demand
+    (``await obj.awaitable_attrs.column``).
+    """
     pass
 
 _engine: Optional[AsyncEngine] = None
@@ -34,6 +40,15 @@ def get_engine() -> AsyncEngine:
     return _engine
 
 
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory for work outside a request (background tasks)."""
+
+    if _session_factory is None:
+        get_engine()
+    assert _session_factory is not None
+    return _session_factory
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency: yields AsyncSession. Requires DATABASE_URL configured."""
 
@@ -0,0 +1,205 @@
+# Low-overhead statistical profiler for capturing live traffic (collapsed stacks / speedscope)
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Thread name prefixes sampled besides the event loop: inference executor, batcher, warm-up
+PROFILED_THREAD_PREFIXES = ("inference", "yolo-")
+
+# A thread whose innermost frame is in one of these files is blocked, waiting for work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename.replace(os.sep, "/")
+    for marker in ("/site-packages/", "/backend/"):
+        if marker in path:
+            path = path.split(marker, 1)[1]
+            break
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of selected threads every ``interval`` seconds.
+
+    Sampling runs in its own daemon thread through sys._current_frames(), so the
+    profiled code is not instrumented and the cost is one stack walk per thread and
+    tick. Identical stacks are aggregated as they are collected.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        thread_ids: Iterable[int] = (),
+        all_threads: bool = False,
+        include_idle: bool = False,
+        max_requests: Optional[int] = None,
+    ):
+        """
+        Args:
+            interval: Seconds between samples
+            thread_ids: Threads to sample besides the PROFILED_THREAD_PREFIXES ones
+                (the event loop thread)
+            all_threads: Sample every thread
+            include_idle: Keep samples of threads blocked waiting for work
+            max_requests: Stop after this many HTTP requests finished (None = no limit)
+        """
+
+        self.interval = max(0.001, interval)
+        self.thread_ids = set(thread_ids)
+        self.all_threads = all_threads
+        self.include_idle = include_idle
+        self.max_requests = max_requests
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()  # (thread name, *frames root first) -> sample count
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+        self.done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _selected(self) -> Dict[int, str]:
+        selected = {}
+        for thread in threading.enumerate():
+            if thread.ident is None or thread is self._thread:
+                continue
+            if (
+                self.all_threads
+                or thread.ident in self.thread_ids
+                or thread.name.startswith(PROFILED_THREAD_PREFIXES)
+            ):
+                selected[thread.ident] = thread.name
+        return selected
+
+    def _sample(self, names: Dict[int, str]) -> None:
+        frames = sys._current_frames()
+        for ident, name in names.items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            if not self.include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(name)
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        names = self._selected()
+        refreshed = time.perf_counter()
+        while not self.done.is_set():
+            now = time.perf_counter()
+            if now - refreshed > 0.5:
+                # Executor threads are created lazily
+                names, refreshed = self._selected(), now
+            self._sample(names)
+            self.done.wait(self.interval)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.done.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def request_finished(self) -> None:
+        """Count one finished HTTP request; stops sampling when max_requests is reached."""
+
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.done.set()
+
+    @property
+    def duration(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format (``thread;outer;inner count``), for flamegraph.pl."""
+
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self, name: str = "profile") -> Dict[str, Any]:
+        """Speedscope file (https://www.speedscope.app), one sampled profile per thread."""
+
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, str]] = []
+        by_thread: Dict[str, List[Tuple[List[int], int]]] = {}
+        for stack, count in self.stacks.items():
+            indices = []
+            for label in stack[1:]:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            by_thread.setdefault(stack[0], []).append((indices, count))
+
+        interval_ms = self.interval * 1000
+        profiles = []
+        for thread_name, entries in sorted(by_thread.items()):
+            total = sum(count for _, count in entries) * interval_ms
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [indices for indices, _ in entries],
+                "weights": [count * interval_ms for _, count in entries],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "backend sampling profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+# The capture in progress (one at a time)
+_active: Optional[SamplingProfiler] = None
+_active_lock = threading.Lock()
+
+
+def start_capture(profiler: SamplingProfiler) -> bool:
+    """Start a capture unless one is already running. Returns False if busy."""
+
+    global _active
+    with _active_lock:
+        if _active is not None:
+            return False
+        _active = profiler
+    profiler.start()
+    return True
+
+
+def finish_capture(profiler: SamplingProfiler) -> None:
+    """Stop a capture started with start_capture()."""
+
+    global _active
+    profiler.stop()
+    with _active_lock:
+        if _active is profiler:
+            _active = None
+
+
+def request_finished() -> None:
+    """Hook for the HTTP middleware: counts requests toward the active capture's limit."""
+
+    profiler = _active
+    if profiler is not None:
+        profiler.request_finished()
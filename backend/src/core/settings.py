@@ -1,4 +1,4 @@
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 from datetime import timedelta
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
@@ -33,6 +33,91 @@ class Settings(BaseSettings):
     MODEL_PATH: Optional[str] = None  # Path to YOLO .pt file (auto-detect if None)
     USE_YOLO: bool = True  # Enable/disable YOLO inference
     YOLO_CONFIDENCE_THRESHOLD: float = 0.25  # Base YOLO confidence threshold for all detections
+    YOLO_WARMUP_WAIT_SECONDS: float = 10.0  # How long inference requests wait for the model to load before 503
+    YOLO_WARMUP_SIZES: List[int] = []  # JSON list of input sizes pre-run at startup (empty = the model input size)
+    YOLO_WARMUP_RUNS: int = 2  # Synthetic runs per warm-up shape (0 disables warm-up)
+    ML_STUB_FALLBACK: bool = True  # Serve stub detections when the model is disabled/failed (false = 503)
+    YOLO_RELOAD_DRAIN_SECONDS: float = 60.0  # After a hot reload, wait this long for calls on the old model before closing it
+
+    # Inference runtime: "torch" (.pt as-is), "onnx" (ONNX Runtime) or "openvino".
+    # Non-torch backends export the .pt once and reuse the artifact cached by model hash.
+    YOLO_BACKEND: Literal["torch", "onnx", "openvino"] = "torch"
+    MODEL_CACHE_DIR: Optional[str] = None  # Exported artifacts (default: models/.cache)
+    YOLO_IMGSZ: Optional[int] = None  # Model input size (default: size the model was trained at)
+
+    # Inference result cache keyed by image hash + base threshold + model version
+    RESULT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # In-memory payload bound (0 disables the cache)
+    RESULT_CACHE_TTL_SECONDS: float = 600.0  # Entry lifetime (0 = no expiry)
+    RESULT_CACHE_DIR: Optional[str] = None  # Optional on-disk tier that survives restarts
+    RESULT_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024  # On-disk tier bound, oldest entries go first (0 = unbounded)
+
+    # Tiled (sliced) inference for high-resolution board photos: overlapping tiles are decoded
+    # at full resolution, run in batches and merged with cross-tile NMS. Slower, finds small tools.
+    YOLO_TILED: bool = False
+    YOLO_TILE_SIZE: Optional[int] = None  # Tile side in image pixels, also the model input size for tiles (default: model input size)
+    YOLO_TILE_OVERLAP: float = 0.2  # Fraction of a tile shared with its neighbour
+    YOLO_TILE_FULL_FRAME: bool = True  # Also run the whole image, for tools larger than a tile
+    YOLO_TILE_NMS_THRESHOLD: float = 0.6  # Merge boxes overlapping more than this (intersection / smaller box)
+    YOLO_TILE_BATCH_SIZE: int = 16  # Tiles per model call
+
+    # Cascade: cheap low-resolution pass first; the full (or tiled) pass runs only for images
+    # where some catalog class is missing or below YOLO_CASCADE_ACCEPT_CONF
+    YOLO_CASCADE: bool = False
+    YOLO_CASCADE_IMGSZ: int = 320  # Input size of the coarse pass
+    YOLO_CASCADE_ACCEPT_CONF: float = 0.8  # Every class must reach this to accept the coarse result
+
+    # Binary image uploads (/predict/upload, /sessions/{id}/*/predict/upload)
+    MAX_IMAGE_UPLOAD_BYTES: int = 50 * 1024 * 1024
+
+    # Session images: raw bytes in a content-addressed blob store, sessions keep the SHA-256.
+    # "local" writes files under BLOB_STORE_DIR; "s3" uses an S3-compatible bucket (boto3,
+    # credentials from the standard AWS_* variables)
+    BLOB_STORE_BACKEND: Literal["local", "s3"] = "local"
+    BLOB_STORE_DIR: Optional[str] = None  # default: data/blobs
+    BLOB_S3_BUCKET: Optional[str] = None
+    BLOB_S3_PREFIX: str = "session-images"
+    BLOB_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://minio:9000 for MinIO
+    BLOB_S3_REGION: Optional[str] = None
+    # Unreferenced blobs (replaced originals, images of deleted sessions) are removed by a
+    # periodic sweep once they have not been written for the grace period
+    BLOB_GC_INTERVAL_SECONDS: float = 3600.0  # 0 disables the sweep
+    BLOB_GC_GRACE_SECONDS: float = 24 * 3600.0
+
+    # Ingest pipeline, run in the background after a session predict: the stored photo is
+    # re-encoded with a size/quality cap and a thumbnail is made for the session card
+    IMAGE_STORE_FORMAT: Literal["jpeg", "webp"] = "jpeg"
+    IMAGE_STORE_MAX_SIDE: int = 2560  # Long side of the stored photo, px (boxes are normalized)
+    IMAGE_STORE_QUALITY: int = 85
+    IMAGE_THUMB_SIDE: int = 320  # Long side of the thumbnail, px
+    IMAGE_THUMB_QUALITY: int = 75
+
+    # Live camera WebSocket (/live): per-class presence is an exponential moving average of
+    # the best detection confidence, switched on/off with hysteresis
+    LIVE_PRESENCE_ALPHA: float = 0.3  # Weight of the newest frame
+    LIVE_PRESENCE_ON: float = 0.5  # Smoothed score at which a class becomes present
+    LIVE_PRESENCE_OFF: float = 0.3  # Smoothed score below which it becomes absent again
+
+    # Worker processes, each holding a model replica (0 = run the model in the API process)
+    YOLO_NUM_WORKERS: int = 0
+
+    # Micro-batching of concurrent inference requests
+    YOLO_BATCH_MAX_SIZE: int = 8  # Max images per batched model call (1 disables batching)
+    YOLO_BATCH_MAX_WAIT_MS: float = 5.0  # How long to wait for more images before running a batch
+
+    # CPU threads per inference worker (torch intra-/inter-op, OpenCV, OpenMP); None = library defaults.
+    # `python -m src.ml.tune` benchmarks workers x threads and saves a profile that is applied at
+    # startup; values set explicitly here win over the profile.
+    INFERENCE_THREADS: Optional[int] = None
+    INFERENCE_INTEROP_THREADS: Optional[int] = None
+    THREAD_PROFILE_PATH: Optional[str] = None  # default: models/thread_profile.json
+    THREAD_PROFILE_TARGET: Literal["throughput", "latency"] = "throughput"
+
+    # Inference executor (keeps blocking inference off the event loop)
+    INFERENCE_MAX_CONCURRENCY: int = 8  # Inference calls running at the same time
+    INFERENCE_MAX_QUEUE: int = 32  # Calls allowed to wait; beyond that requests get 503 + Retry-After
+
+    # On-demand sampling profiler (POST /ml/profile)
+    PROFILE_MAX_SECONDS: float = 120.0  # Upper bound of one capture
 
     YOLO_CONFIDENCE_THRESHOLD = 0.25
     # pydantic v2 settings config
@@ -0,0 +1,176 @@
+# Per-request stage timers, Server-Timing header and in-process latency histograms
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import profiler
+
+# Histogram bucket upper bounds in milliseconds (+Inf is implicit)
+BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class StageTimings:
+    """Milliseconds spent per named stage during one request (repeated stages add up)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        """Server-Timing header value, e.g. ``auth;dur=1.2, model;dur=35.0, total;dur=40.1``."""
+
+        entries = [f"{_TOKEN_RE.sub('_', name)};dur={ms:.1f}" for name, ms in self.stages.items()]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+def current_timings() -> Optional[StageTimings]:
+    """Timings of the request being handled, or None outside a request."""
+
+    return _current.get()
+
+
+def record(name: str, ms: float) -> None:
+    """Add ``ms`` to stage ``name`` of the current request (no-op outside a request)."""
+
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, ms)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Time a block as one stage of the current request.
+
+    Works in async code (``with timed("db_commit"): await db.commit()``) and in
+    executor threads, which run in a copy of the request context.
+    """
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - started) * 1000)
+
+
+@contextmanager
+def collect_timings() -> Iterator[StageTimings]:
+    """Collect timings in a fresh scope, e.g. inside the batcher thread for one batch."""
+
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+class LatencyHistograms:
+    """Cumulative latency histograms per (route, stage), exposed in Prometheus text format."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = BUCKETS_MS):
+        self.buckets = tuple(buckets_ms)
+        self._series: Dict[Tuple[str, str], List[float]] = {}  # counts per bucket + [+Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, stage: str, ms: float) -> None:
+        index = bisect.bisect_left(self.buckets, ms)
+        with self._lock:
+            series = self._series.get((route, stage))
+            if series is None:
+                series = self._series[(route, stage)] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += ms
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, object]]:
+        """{(route, stage): {"count", "sum_ms", "buckets": [(le, cumulative count), ...]}}"""
+
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        out = {}
+        for key, values in series.items():
+            cumulative, buckets = 0, []
+            for le, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += int(count)
+                buckets.append((le, cumulative))
+            out[key] = {"count": cumulative, "sum_ms": values[-1], "buckets": buckets}
+        return out
+
+    def prometheus(self, metric: str = "http_stage_duration_ms") -> str:
+        """Render all series in the Prometheus text exposition format."""
+
+        lines = [
+            f"# HELP {metric} Time spent per request stage, in milliseconds.",
+            f"# TYPE {metric} histogram",
+        ]
+        for (route, stage), data in sorted(self.snapshot().items()):
+            labels = f'route="{route}",stage="{stage}"'
+            for le, count in data["buckets"]:
+                bound = "+Inf" if le == float("inf") else f"{le:g}"
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {data['sum_ms']:.3f}")
+            lines.append(f"{metric}_count{{{labels}}} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+histograms = LatencyHistograms()
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware: collects stage timings for each HTTP request, returns them
+    in a ``Server-Timing`` header and adds them to the latency histograms.
+
+    The histogram route label is the route template (``/sessions/{session_id}``), not
+    the raw path, so it stays low-cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = StageTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(total_ms))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            for name, ms in timings.stages.items():
+                histograms.observe(route_path, name, ms)
+            histograms.observe(route_path, "total", total_ms)
+            profiler.request_finished()
@@ -0,0 +1,205 @@
+# Pluggable CPU inference backends for the YOLO model
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..core.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: no cross-process export lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a model file without reading it into memory at once."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """Directory for exported model artifacts (settings.MODEL_CACHE_DIR or models/.cache)."""
+
+    if settings.MODEL_CACHE_DIR:
+        return Path(settings.MODEL_CACHE_DIR)
+    return Path(__file__).parent.parent.parent / "models" / ".cache"
+
+
+@contextmanager
+def _export_lock(lock_path: Path):
+    """Serialize exports across worker processes sharing the cache directory."""
+
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class InferenceBackend:
+    """
+    Base class for model runtimes.
+
+    Every backend is driven through ultralytics, so ``predict`` returns the same
+    ``Results`` objects (boxes, orig_shape, names) regardless of the runtime, and
+    YOLOInferenceService post-processes them identically.
+    """
+
+    name = "base"
+    export_format: Optional[str] = None  # ultralytics export format, None = load .pt directly
+    required_module: Optional[str] = None
+
+    def __init__(self, model_path: str, cache_dir: Optional[Path] = None):
+        """
+        Args:
+            model_path: Path to the source .pt file
+            cache_dir: Where exported artifacts are kept (default: default_cache_dir())
+        """
+
+        self.source_path = model_path
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.model_sha256 = file_sha256(model_path)
+        self._check_runtime()
+        self.artifact_path = self._resolve_artifact()
+        self.model = self._load()
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    @property
+    def input_size(self) -> int:
+        """Model input size: settings.YOLO_IMGSZ, else the size the model was trained at."""
+
+        if settings.YOLO_IMGSZ:
+            return int(settings.YOLO_IMGSZ)
+        imgsz = (getattr(self.model, "overrides", None) or {}).get("imgsz", 640)
+        return int(max(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz)
+
+    def _check_runtime(self) -> None:
+        if self.required_module is None:
+            return
+        try:
+            __import__(self.required_module)
+        except ImportError as e:
+            raise RuntimeError(
+                f"Backend '{self.name}' needs the '{self.required_module}' package: {e}"
+            )
+
+    def _artifact_name(self) -> str:
+        stem = Path(self.source_path).stem
+        if self.export_format == "openvino":
+            return f"{stem}_openvino_model"
+        return f"{stem}.{self.export_format}"
+
+    def _resolve_artifact(self) -> str:
+        """Return the path to load, exporting into the cache on first use."""
+
+        if self.export_format is None:
+            return self.source_path
+
+        target_dir = self.cache_dir / self.model_sha256[:16] / self.name
+        artifact = target_dir / self._artifact_name()
+        if artifact.exists():
+            logger.info(f"Using cached {self.name} artifact: {artifact}")
+            return str(artifact)
+
+        with _export_lock(self.cache_dir / f"{self.model_sha256[:16]}.lock"):
+            # Another worker may have finished the export while we waited for the lock
+            if artifact.exists():
+                return str(artifact)
+            self._export(artifact)
+        return str(artifact)
+
+    def _export(self, artifact: Path) -> None:
+        """Export the .pt model to this backend's format and move it into the cache."""
+
+        from ultralytics import YOLO
+
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix="export-", dir=self.cache_dir))
+        try:
+            # Export from a private copy: ultralytics writes its output next to the source file
+            source_copy = workdir / Path(self.source_path).name
+            shutil.copy2(self.source_path, source_copy)
+            logger.info(f"Exporting {self.source_path} to {self.name} (one-time, cached by model hash)")
+            source_model = YOLO(str(source_copy))
+            exported = source_model.export(
+                format=self.export_format,
+                imgsz=settings.YOLO_IMGSZ or source_model.overrides.get("imgsz", 640),
+                dynamic=True,  # allow batched calls and several input sizes
+                verbose=False,
+            )
+            os.replace(exported, artifact)
+            logger.info(f"Cached {self.name} artifact at {artifact}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _load(self):
+        from ultralytics import YOLO
+
+        if self.export_format is None:
+            return YOLO(self.artifact_path)
+        return YOLO(self.artifact_path, task="detect")
+
+    def predict(self, images: List[np.ndarray], conf: float, **kwargs: Any):
+        """Run the model on a list of BGR images and return ultralytics Results."""
+
+        kwargs.setdefault("imgsz", self.input_size)
+        return self.model(images, conf=conf, verbose=False, **kwargs)
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager mode, loads the .pt file as-is."""
+
+    name = "torch"
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime (CPU execution provider)."""
+
+    name = "onnx"
+    export_format = "onnx"
+    required_module = "onnxruntime"
+
+
+class OpenVINOBackend(InferenceBackend):
+    """OpenVINO IR on the CPU plugin."""
+
+    name = "openvino"
+    export_format = "openvino"
+    required_module = "openvino"
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxBackend.name: OnnxBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+
+def create_backend(name: str, model_path: str, cache_dir: Optional[Path] = None) -> InferenceBackend:
+    """Instantiate the backend selected by name (see settings.YOLO_BACKEND)."""
+
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend '{name}'. Available: {sorted(BACKENDS)}")
+    return backend_cls(model_path, cache_dir=cache_dir)
@@ -0,0 +1,155 @@
+# Dynamic micro-batching for model inference
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent inference requests into small batches.
+
+    Callers submit single items and get a Future back. A background thread waits
+    for the first item, then keeps collecting until either ``max_batch_size`` items
+    are queued or ``max_wait_ms`` has elapsed, and hands the whole batch to
+    ``process_batch`` in one call. Each caller's Future receives its own result.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        """
+        Args:
+            process_batch: Function mapping a list of items to a list of results (same order/length)
+            max_batch_size: Upper bound on items per batch
+            max_wait_ms: How long to wait for more items after the first one arrives
+            name: Name of the background thread (shows up in logs and profiles)
+        """
+
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # Counters for /ml/status
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item for batched processing and return a Future for its result."""
+
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            self._queue.put((item, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting items, finish everything already queued and stop the thread."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching counters."""
+
+        batches = self._batches
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": self._queue.qsize(),
+            "batches": batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / batches, 2) if batches else 0.0,
+            "max_observed_batch_size": self._max_seen,
+        }
+
+    def _collect(self) -> Tuple[List[Tuple[Any, Future]], bool]:
+        """Block for the first item, then gather more until the size cap or deadline."""
+
+        entry = self._queue.get()
+        if entry is _STOP:
+            return [], True
+
+        batch = [entry]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+        # Drain whatever was queued before close() was called
+        leftovers = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                leftovers.append(entry)
+        for start in range(0, len(leftovers), self.max_batch_size):
+            self._dispatch(leftovers[start:start + self.max_batch_size])
+
+    def _dispatch(self, batch: List[Tuple[Any, Future]]) -> None:
+        """Run one batch and resolve the callers' futures."""
+
+        # Skip callers that gave up before we got to them
+        batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(items)} items"
+                )
+        except BaseException as e:
+            logger.error(f"Batch of {len(items)} failed: {e}")
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        self._batches += 1
+        self._items += len(items)
+        self._max_seen = max(self._max_seen, len(items))
+
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
@@ -0,0 +1,164 @@
+# Dedicated executor for blocking inference calls with bounded admission
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ..core.settings import settings
+from ..core.timing import record
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference executor cannot admit another request."""
+
+    def __init__(self, retry_after: int, queue_depth: int):
+        super().__init__(f"Inference queue is full ({queue_depth} waiting)")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+
+class InferenceExecutor:
+    """
+    Runs blocking inference off the asyncio event loop.
+
+    At most ``max_concurrency`` calls run at once in a dedicated thread pool and at
+    most ``max_queue`` more wait for a free slot. Anything beyond that is rejected
+    immediately with InferenceQueueFull so the event loop keeps serving other routes.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32):
+        """
+        Args:
+            max_concurrency: Number of inference calls allowed to run at the same time
+            max_queue: Number of calls allowed to wait for a free slot
+        """
+
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0  # admitted and not finished (running + waiting)
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_seconds = 0.0  # EMA of call duration, used for Retry-After
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of admitted calls waiting for a free slot."""
+
+        with self._lock:
+            return self._in_flight - self._running
+
+    def _retry_after(self) -> int:
+        """Estimate how long until a slot frees up (seconds, at least 1)."""
+
+        waves = (self._in_flight / self.max_concurrency) + 1
+        return max(1, math.ceil(self._avg_seconds * waves))
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_concurrency + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    retry_after=self._retry_after(),
+                    queue_depth=self._in_flight - self._running,
+                )
+            self._in_flight += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` in the inference pool and await its result.
+
+        Raises:
+            InferenceQueueFull: if both the running slots and the wait queue are full
+        """
+
+        self._admit()
+        ctx = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            with self._lock:
+                self._running += 1
+            started = time.perf_counter()
+            # Time spent waiting for a free inference slot, as a stage of the request
+            ctx.run(record, "queue", (started - submitted) * 1000)
+            try:
+                return ctx.run(fn, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._avg_seconds = (
+                        elapsed if self._completed == 1 else 0.8 * self._avg_seconds + 0.2 * elapsed
+                    )
+
+        try:
+            future = self._pool.submit(call)
+        except Exception:
+            self._release()
+            raise
+        # Runs on completion and on cancellation, so abandoned calls free their slot
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and counters."""
+
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._in_flight - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_latency_ms": round(self._avg_seconds * 1000.0, 1),
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the thread pool."""
+
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global executor instance
+_inference_executor: Optional[InferenceExecutor] = None
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get or create global inference executor."""
+
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = InferenceExecutor(
+            max_concurrency=settings.INFERENCE_MAX_CONCURRENCY,
+            max_queue=settings.INFERENCE_MAX_QUEUE,
+        )
+    return _inference_executor
+
+async def run_inference(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking inference callable on the global inference executor."""
+
+    return await get_inference_executor().run(fn, *args, **kwargs)
+
+def shutdown_inference_executor() -> None:
+    """Shut down the global executor (used on app shutdown)."""
+
+    global _inference_executor
+    if _inference_executor is not None:
+        _inference_executor.shutdown(wait=False)
+        _inference_executor = None
@@ -0,0 +1,118 @@
+# Image decoding for inference
+import base64
+import binascii
+import io
+import logging
+from typing import Any, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# OpenCV is imported on first decode; False when it is not installed
+_cv2: Any = None
+
+ImageBytes = Union[bytes, bytearray, memoryview]
+
+# JPEG can be decoded directly at 1/2, 1/4 or 1/8 scale (DCT-domain downscaling)
+_REDUCTION_FACTORS = (8, 4, 2)
+_CV2_REDUCED_FLAGS = {
+    8: "IMREAD_REDUCED_COLOR_8",
+    4: "IMREAD_REDUCED_COLOR_4",
+    2: "IMREAD_REDUCED_COLOR_2",
+}
+
+
+def _load_cv2() -> Any:
+    global _cv2
+    if _cv2 is None:
+        try:
+            import cv2
+            _cv2 = cv2
+        except ImportError:
+            logger.warning("OpenCV not available, decoding images with PIL")
+            _cv2 = False
+    return _cv2
+
+
+def decode_base64_payload(image_b64: str) -> bytes:
+    """Strip an optional data URL prefix and base64-decode the payload."""
+
+    # Base64 has no commas, so anything before one is a data URL header
+    _, sep, payload = image_b64.partition(",")
+    try:
+        return base64.b64decode(payload if sep else image_b64)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image data: {e}")
+
+
+def is_jpeg(data: ImageBytes) -> bool:
+    return bytes(data[:3]) == b"\xff\xd8\xff"
+
+
+def image_size(data: ImageBytes) -> Tuple[int, int]:
+    """Read (width, height) from the image header without decoding pixels."""
+
+    with Image.open(io.BytesIO(data)) as img:
+        return img.size
+
+
+def reduction_factor(width: int, height: int, target_size: Optional[int]) -> int:
+    """Largest JPEG scale factor that keeps the long side at or above target_size."""
+
+    if not target_size:
+        return 1
+    long_side = max(width, height)
+    for factor in _REDUCTION_FACTORS:
+        if long_side // factor >= target_size:
+            return factor
+    return 1
+
+
+def decode_image(data: ImageBytes, target_size: Optional[int] = None) -> np.ndarray:
+    """
+    Decode encoded image bytes straight into a BGR uint8 array.
+
+    For JPEG, when ``target_size`` is given, the decoder downscales in the DCT domain
+    (1/2, 1/4 or 1/8) so that the long side stays >= target_size. Decode time and peak
+    memory then follow the model input size rather than the camera resolution. Since
+    detections are returned in normalized coordinates, the reduced size is invisible
+    to callers.
+
+    Args:
+        data: Encoded image (JPEG, PNG, WebP, ...)
+        target_size: Model input size; None decodes at full resolution
+
+    Returns:
+        Image as (H, W, 3) BGR array
+    """
+
+    factor = 1
+    if target_size and is_jpeg(data):
+        try:
+            factor = reduction_factor(*image_size(data), target_size)
+        except Exception:
+            factor = 1
+
+    cv2 = _load_cv2()
+    if cv2:
+        # np.frombuffer wraps the bytes without copying; imdecode writes BGR directly
+        buf = np.frombuffer(data, dtype=np.uint8)
+        flags = getattr(cv2, _CV2_REDUCED_FLAGS[factor]) if factor > 1 else cv2.IMREAD_COLOR
+        # Keep pixels as stored (EXIF orientation is not applied), like the PIL path
+        image = cv2.imdecode(buf, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+        if image is not None:
+            return image
+
+    # Fallback: PIL with draft mode (JPEG only), then RGB -> BGR
+    try:
+        pil_image = Image.open(io.BytesIO(data))
+        if factor > 1:
+            width, height = pil_image.size
+            pil_image.draft("RGB", (width // factor, height // factor))
+        if pil_image.mode != "RGB":
+            pil_image = pil_image.convert("RGB")
+        return np.ascontiguousarray(np.asarray(pil_image)[:, :, ::-1])
+    except Exception as e:
+        raise ValueError(f"Cannot decode image data: {e}")
@@ -0,0 +1,492 @@
+# Multi-process inference engine with shared-memory image hand-off
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Message tags sent from workers to the parent
+_READY = "ready"
+_FAILED = "failed"
+_OK = "ok"
+_ERROR = "error"
+
+# A task that crashed its worker is retried once on another worker, then failed
+_MAX_ATTEMPTS = 2
+
+# A restarted worker that dies before loading its model is restarted after a growing
+# delay (seconds), and its slot is given up after this many failures in a row
+_RESTART_BACKOFF = 1.0
+_MAX_RESTART_BACKOFF = 30.0
+_MAX_LOAD_FAILURES = 3
+
+
+def configure_worker_threads():
+    """
+    Apply the thread limits exported to this process's environment.
+
+    They are read from os.environ rather than settings: the settings of a spawned
+    worker were loaded from the parent's environment/.env at import, while the
+    parent (or a factory wrapper such as the tuner's) exports the limits it chose
+    through configure_threads().
+    """
+
+    from .threads import configure_threads
+
+    def env_int(name: str):
+        value = os.environ.get(name)
+        return int(value) if value else None
+
+    return configure_threads(env_int("INFERENCE_THREADS"), env_int("INFERENCE_INTEROP_THREADS"))
+
+
+def _default_worker_factory(model_path: str):
+    """Build an in-process YOLO service inside a worker (no nested pool, no batcher thread)."""
+
+    from .yolo_service import YOLOInferenceService
+    from ..core.settings import settings
+
+    configure_worker_threads()
+    service = YOLOInferenceService(model_path, num_workers=0, batching=False)
+    if settings.YOLO_WARMUP_RUNS > 0:
+        service.warmup()
+    return service
+
+
+def _attach_image(shm_name: str, shape: Tuple[int, ...], dtype: str):
+    """Map a parent-owned shared memory block as an ndarray without copying."""
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # The parent owns and unlinks the block; stop this process's tracker from doing it too
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _worker_main(
+    worker_id: int,
+    model_path: str,
+    factory: Callable[[str], Any],
+    tasks: "mp.Queue",
+    results: "mp.Queue",
+    max_batch_size: int,
+) -> None:
+    """Worker process loop: hold one model replica and serve batches from the task queue."""
+
+    try:
+        service = factory(model_path)
+        info = {
+            "names": dict(getattr(getattr(service, "model", None), "names", {}) or {}),
+            "class_mapping_version": getattr(service, "class_mapping_version", None),
+            "warmup": getattr(service, "warmup_timings", None),
+        }
+    except Exception as e:
+        results.put((_FAILED, worker_id, str(e)))
+        return
+    results.put((_READY, worker_id, info))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        # Drain whatever else is already waiting so backlog turns into batches
+        batch = [task]
+        stop = False
+        while len(batch) < max_batch_size:
+            try:
+                extra = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if extra is None:
+                stop = True
+                break
+            batch.append(extra)
+
+        attached = []
+        try:
+            items = []
+            for _task_id, _attempt, shm_name, shape, dtype, conf in batch:
+                shm, image = _attach_image(shm_name, shape, dtype)
+                attached.append(shm)
+                items.append((image, conf))
+            outputs = service._infer_batch(items)
+            for (task_id, attempt, *_), output in zip(batch, outputs):
+                results.put((_OK, (task_id, attempt), output))
+        except Exception as e:
+            for task_id, attempt, *_ in batch:
+                results.put((_ERROR, (task_id, attempt), str(e)))
+        finally:
+            # Drop views before closing the mappings
+            items = None
+            for shm in attached:
+                try:
+                    shm.close()
+                except Exception:
+                    pass
+
+        if stop:
+            break
+
+
+class _Task:
+    """
+    Parent-side bookkeeping for one submitted image.
+
+    The task is kept, and its shared memory block stays mapped, until no attempt is
+    outstanding any more, even when the future was already resolved by another one.
+    """
+
+    __slots__ = ("task_id", "future", "shm", "shape", "dtype", "conf", "running", "attempts")
+
+    def __init__(self, task_id: int, future: Future, shm, shape, dtype: str, conf: float):
+        self.task_id = task_id
+        self.future = future
+        self.shm = shm
+        self.shape = shape
+        self.dtype = dtype
+        self.conf = conf
+        self.running: Dict[int, int] = {}  # outstanding attempt -> worker id
+        self.attempts = 0
+
+    def message(self, attempt: int):
+        return (self.task_id, attempt, self.shm.name, self.shape, self.dtype, self.conf)
+
+
+class ProcessInferenceEngine:
+    """
+    Pool of worker processes, each holding its own model replica.
+
+    Decoded images are copied once into a shared memory block and only the block's
+    name is sent to the worker, so frames are never pickled. Tasks go to the worker
+    with the fewest outstanding tasks. A supervisor thread collects results and
+    restarts workers that die; results a dead worker sent before exiting are still
+    used, and only its unanswered tasks are retried on another worker.
+    A worker that keeps dying while loading the model is restarted with backoff and
+    its slot is marked failed after _MAX_LOAD_FAILURES attempts.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_workers: int,
+        max_batch_size: int = 8,
+        factory: Callable[[str], Any] = _default_worker_factory,
+        start_timeout: float = 300.0,
+    ):
+        """
+        Args:
+            model_path: Path to the model file loaded by every worker
+            num_workers: Number of worker processes
+            max_batch_size: Max images a worker runs in one model call
+            factory: Picklable callable building the per-worker inference service
+            start_timeout: Seconds to wait for all workers to load their model
+        """
+
+        self.model_path = model_path
+        self.num_workers = max(1, int(num_workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.factory = factory
+        self.names: Dict[int, str] = {}
+        self.class_mapping_version: Optional[Any] = None
+        self.warmup_timings: Optional[Dict[str, Any]] = None  # as reported by the first worker
+
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._workers: Dict[int, Any] = {}
+        self._task_queues: Dict[int, Any] = {}
+        self._ready: Dict[int, bool] = {}
+        self._tasks: Dict[int, _Task] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._restarts = 0
+        self._start_error: Optional[str] = None
+        self._started = False
+        self._load_failures: Dict[int, int] = {}  # consecutive deaths before _READY, per slot
+        self._restart_at: Dict[int, float] = {}  # slots waiting out their backoff
+        self._failed: set = set()  # slots given up on
+
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+
+        self._supervisor = threading.Thread(
+            target=self._supervise, name="inference-pool-supervisor", daemon=True
+        )
+        self._supervisor.start()
+
+        deadline = time.monotonic() + start_timeout
+        while not all(self._ready.values()):
+            if self._start_error is not None:
+                self.close()
+                raise RuntimeError(f"Inference worker failed to start: {self._start_error}")
+            if any(not proc.is_alive() and not self._ready[wid] for wid, proc in self._workers.items()):
+                self.close()
+                raise RuntimeError("Inference worker exited before loading the model")
+            if time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError("Timed out waiting for inference workers to start")
+            time.sleep(0.05)
+        self._started = True
+        logger.info(f"Inference pool ready with {self.num_workers} worker processes")
+
+    def _spawn(self, worker_id: int) -> None:
+        task_queue = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.model_path, self.factory, task_queue, self._results, self.max_batch_size),
+            name=f"inference-worker-{worker_id}",
+            daemon=True,
+        )
+        proc.start()
+        self._workers[worker_id] = proc
+        self._task_queues[worker_id] = task_queue
+        self._ready[worker_id] = False
+
+    def _pick_worker(self) -> int:
+        """Choose the live worker with the fewest outstanding tasks."""
+
+        live = [wid for wid, proc in self._workers.items() if proc.is_alive()]
+        # Prefer workers that have finished loading; a restarting one would just queue tasks
+        load = {wid: 0 for wid in live if self._ready.get(wid)} or {wid: 0 for wid in live}
+        if not load:
+            raise RuntimeError("No live inference workers")
+        for task in self._tasks.values():
+            for worker_id in task.running.values():
+                if worker_id in load:
+                    load[worker_id] += 1
+        return min(load, key=load.get)
+
+    def _dispatch(self, task: _Task) -> None:
+        worker_id = self._pick_worker()
+        task.attempts += 1
+        task.running[task.attempts] = worker_id
+        self._task_queues[worker_id].put(task.message(task.attempts))
+
+    def submit(self, image: np.ndarray, confidence_threshold: float) -> Future:
+        """Send one decoded image to the pool and return a Future for the worker's output for it."""
+
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                self._free(shm)
+                raise RuntimeError("Inference pool is closed")
+            task = _Task(next(self._ids), future, shm, image.shape, image.dtype.str, confidence_threshold)
+            self._tasks[task.task_id] = task
+            try:
+                self._dispatch(task)
+            except Exception:
+                self._tasks.pop(task.task_id, None)
+                self._free(shm)
+                raise
+        return future
+
+    def infer_batch(self, items: List[Tuple[np.ndarray, float]]) -> List[Any]:
+        """Run several images through the pool and wait for all of them."""
+
+        futures = [self.submit(image, conf) for image, conf in items]
+        return [f.result() for f in futures]
+
+    @staticmethod
+    def _free(shm) -> None:
+        try:
+            shm.close()
+            shm.unlink()
+        except Exception:
+            pass
+
+    def _finish(self, task_id: int, attempt: int, ok: bool, payload: Any) -> None:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None or task.running.pop(attempt, None) is None:
+                return  # an attempt that was already accounted for
+            last = not task.running
+            if last:
+                del self._tasks[task_id]
+        # Another attempt may still be reading the image
+        if last:
+            self._free(task.shm)
+        if task.future.done():
+            return
+        if ok:
+            task.future.set_result(payload)
+        else:
+            task.future.set_exception(RuntimeError(f"Inference worker error: {payload}"))
+
+    def _supervise(self) -> None:
+        """Collect results and replace dead workers."""
+
+        while not self._closed:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                break
+            else:
+                self._handle_message(*message)
+            self._check_workers()
+
+    def _handle_message(self, tag: str, key: Any, payload: Any) -> None:
+        if tag == _READY:
+            self._ready[key] = True
+            self._load_failures[key] = 0
+            if not self.names:
+                self.names = payload["names"]
+                self.class_mapping_version = payload["class_mapping_version"]
+                self.warmup_timings = payload.get("warmup")
+        elif tag == _FAILED:
+            logger.error(f"Inference worker {key} failed to load model: {payload}")
+            # After startup the worker exits and _check_workers restarts it
+            if not self._started:
+                self._start_error = payload
+        elif tag in (_OK, _ERROR):
+            task_id, attempt = key
+            self._finish(task_id, attempt, tag == _OK, payload)
+
+    def _drain_results(self) -> None:
+        """Handle every message already in the results queue."""
+
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                return
+            except (EOFError, OSError):
+                return
+            self._handle_message(*message)
+
+    def _check_workers(self) -> None:
+        if self._started and any(
+            not proc.is_alive()
+            for worker_id, proc in list(self._workers.items())
+            if worker_id not in self._failed and worker_id not in self._restart_at
+        ):
+            # Results a worker sent before it exited count; only what is left gets retried
+            self._drain_results()
+
+        with self._lock:
+            if self._closed:
+                return
+            now = time.monotonic()
+            for worker_id, proc in list(self._workers.items()):
+                if worker_id in self._failed:
+                    continue
+                if worker_id in self._restart_at:
+                    if now >= self._restart_at[worker_id]:
+                        del self._restart_at[worker_id]
+                        self._restarts += 1
+                        self._spawn(worker_id)
+                    continue
+                # During startup a worker that never loaded is a configuration problem, reported by __init__
+                if proc.is_alive() or not self._started:
+                    continue
+                self._handle_death(worker_id, now)
+
+    def _handle_death(self, worker_id: int, now: float) -> None:
+        """Schedule the restart of a dead worker and retry or fail its tasks. Called with the lock held."""
+
+        exitcode = self._workers[worker_id].exitcode
+        if self._ready.get(worker_id):
+            # Crashed while serving: restart right away
+            self._load_failures[worker_id] = 0
+            delay = 0.0
+            logger.error(f"Inference worker {worker_id} died (exit code {exitcode}), restarting")
+        else:
+            failures = self._load_failures.get(worker_id, 0) + 1
+            self._load_failures[worker_id] = failures
+            delay = min(_RESTART_BACKOFF * 2 ** (failures - 1), _MAX_RESTART_BACKOFF)
+            if failures >= _MAX_LOAD_FAILURES:
+                self._failed.add(worker_id)
+                logger.error(
+                    f"Inference worker {worker_id} died while loading the model {failures} times in a row "
+                    f"(exit code {exitcode}), slot marked failed"
+                )
+            else:
+                logger.error(
+                    f"Inference worker {worker_id} died while loading the model (exit code {exitcode}), "
+                    f"restarting in {delay:.1f}s"
+                )
+        self._ready[worker_id] = False
+
+        if worker_id not in self._failed:
+            if delay > 0:
+                self._restart_at[worker_id] = now + delay
+            else:
+                self._restarts += 1
+                self._spawn(worker_id)
+
+        for task in list(self._tasks.values()):
+            lost = [attempt for attempt, wid in task.running.items() if wid == worker_id]
+            if not lost:
+                continue
+            for attempt in lost:
+                del task.running[attempt]
+            error = None
+            if not task.future.done():
+                if task.attempts >= _MAX_ATTEMPTS:
+                    error = f"Inference worker {worker_id} crashed while processing the image"
+                else:
+                    try:
+                        self._dispatch(task)
+                    except RuntimeError as e:
+                        error = str(e)
+            if not task.running:
+                self._tasks.pop(task.task_id, None)
+                self._free(task.shm)
+            if error is not None and not task.future.done():
+                task.future.set_exception(RuntimeError(error))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return worker and task counters."""
+
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "alive": sum(1 for proc in self._workers.values() if proc.is_alive()),
+                "ready": sum(1 for ready in self._ready.values() if ready),
+                "in_flight": len(self._tasks),
+                "restarts": self._restarts,
+                "restarting": sorted(self._restart_at),
+                "failed_workers": sorted(self._failed),
+            }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop workers and fail anything still in flight."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for task_queue in self._task_queues.values():
+                try:
+                    task_queue.put(None)
+                except Exception:
+                    pass
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+
+        for proc in self._workers.values():
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        for task in tasks:
+            self._free(task.shm)
+            if not task.future.done():
+                task.future.set_exception(RuntimeError("Inference pool is closed"))
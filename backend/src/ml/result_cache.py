@@ -0,0 +1,270 @@
+# Content-addressed cache of inference results
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds between TTL sweeps of the disk tier (sweeps also run whenever it is over its size bound)
+_DISK_PRUNE_INTERVAL = 300.0
+# A size sweep trims the disk tier to this fraction of its bound, so the next one is not due right away
+_DISK_LOW_WATER = 0.9
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """SHA-256 of the encoded image, the content address of a result."""
+
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class InferenceResultCache:
+    """
+    LRU cache of detections keyed by image content, base threshold and model version.
+
+    Entries are stored as compact JSON, so the memory bound is the exact payload size
+    and every hit returns fresh objects the caller may modify. Entries older than
+    ``ttl_seconds`` are treated as misses. With ``disk_dir`` set, entries are also
+    written to disk and survive restarts (the same TTL applies, by file mtime). The
+    disk tier is capped at ``disk_max_bytes``: writes that push it over the bound, and
+    a periodic sweep, remove expired files and then the oldest ones.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0,
+    ):
+        """
+        Args:
+            max_bytes: Upper bound on the in-memory payload size
+            ttl_seconds: Entry lifetime (0 = never expire)
+            disk_dir: Directory of the on-disk tier, None keeps the cache in memory only
+            disk_max_bytes: Upper bound on the on-disk tier size (0 = unbounded)
+        """
+
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = max(0.0, float(ttl_seconds))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._disk_bytes = 0
+        self._last_prune = 0.0
+
+        # Counters for /ml/status
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._prune_disk()
+
+    @staticmethod
+    def make_key(digest: str, confidence_threshold: float, model_version: str) -> str:
+        """Build a cache key from the image digest, base threshold and model version."""
+
+        return hashlib.sha256(f"{digest}|{confidence_threshold:.6f}|{model_version}".encode()).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, payload = entry
+                if self._expired(created, now):
+                    self._drop(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return json.loads(payload)
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            created, payload = entry
+            self._disk_hits += 1
+            # Keep the on-disk age, so promotion does not extend the entry's lifetime
+            self._store(key, payload, created)
+        return json.loads(payload)
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value (detections and their info) under key."""
+
+        payload = json.dumps(value, separators=(",", ":")).encode()
+        with self._lock:
+            self._store(key, payload, time.time())
+        self._write_disk(key, payload)
+
+    def _store(self, key: str, payload: bytes, created: float) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (created, payload)
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _created, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, bytes]]:
+        """Return (created, payload) of an unexpired on-disk entry."""
+
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            stat = path.stat()
+            if self._expired(stat.st_mtime, now):
+                path.unlink(missing_ok=True)
+                with self._lock:
+                    self._disk_bytes -= stat.st_size
+                return None
+            return stat.st_mtime, path.read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, payload: bytes) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry to disk: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._disk_bytes += len(payload)
+            due = (self.disk_max_bytes > 0 and self._disk_bytes > self.disk_max_bytes) or (
+                self.ttl > 0 and now - self._last_prune >= _DISK_PRUNE_INTERVAL
+            )
+        if due:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Remove expired on-disk entries, then the oldest ones while the tier is over disk_max_bytes."""
+
+        # One sweep at a time; a write that finds one running skips its own
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            kept = []
+            expired = 0
+            for path in self.disk_dir.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                    if self._expired(stat.st_mtime, now):
+                        path.unlink()
+                        expired += 1
+                    else:
+                        kept.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    pass
+
+            total = sum(size for _, size, _ in kept)
+            evicted = 0
+            if self.disk_max_bytes > 0 and total > self.disk_max_bytes:
+                target = self.disk_max_bytes * _DISK_LOW_WATER
+                for _, size, path in sorted(kept, key=lambda entry: entry[0]):
+                    if total <= target:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    evicted += 1
+
+            with self._lock:
+                self._disk_bytes = total
+                self._last_prune = now
+            if expired or evicted:
+                logger.info(
+                    f"Pruned {expired} expired and {evicted} oldest result cache entries from {self.disk_dir}"
+                )
+        finally:
+            self._prune_lock.release()
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is left alone)."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "disk_bytes": self._disk_bytes if self.disk_dir else 0,
+                "disk_max_bytes": self.disk_max_bytes,
+            }
+
+
+# Global cache instance (outlives service instances, keys carry the model version)
+_result_cache: Optional[InferenceResultCache] = None
+
+def get_result_cache() -> Optional[InferenceResultCache]:
+    """Get or create the global result cache, or None if disabled (RESULT_CACHE_MAX_BYTES=0)."""
+
+    global _result_cache
+    if settings.RESULT_CACHE_MAX_BYTES <= 0:
+        return None
+    if _result_cache is None:
+        _result_cache = InferenceResultCache(
+            max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            disk_dir=settings.RESULT_CACHE_DIR,
+            disk_max_bytes=settings.RESULT_CACHE_DISK_MAX_BYTES,
+        )
+    return _result_cache
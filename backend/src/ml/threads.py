@@ -0,0 +1,138 @@
+# CPU thread configuration for inference (torch, OpenCV, OpenMP)
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE = "thread_profile.json"
+
+# Read by OpenMP/MKL/OpenBLAS when they initialize; inherited by spawned workers
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Settings given in the environment/.env (taken before anything assigns to settings)
+_EXPLICIT_SETTINGS = frozenset(settings.model_fields_set)
+
+
+def default_profile_path() -> Path:
+    """Location of the tuning profile (settings.THREAD_PROFILE_PATH or models/thread_profile.json)."""
+
+    if settings.THREAD_PROFILE_PATH:
+        return Path(settings.THREAD_PROFILE_PATH)
+    return Path(__file__).parent.parent.parent / "models" / PROFILE_FILE
+
+
+def load_thread_profile(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Read the saved tuning profile, or None if there is none."""
+
+    path = Path(path) if path else default_profile_path()
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable thread profile {path}: {e}")
+        return None
+
+
+def save_thread_profile(profile: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """Write the tuning profile as JSON and return its path."""
+
+    path = Path(path) if path else default_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def apply_thread_profile(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Apply the saved profile for settings.THREAD_PROFILE_TARGET to the settings.
+
+    Values set explicitly in the environment/.env win over the profile. Nothing is
+    imported here; configure_threads() applies the thread counts when the model loads.
+
+    Returns:
+        The applied configuration ({"workers", "threads", "interop_threads"}), or None
+    """
+
+    profile = load_thread_profile(path)
+    if not profile:
+        return None
+    choice = profile.get(settings.THREAD_PROFILE_TARGET)
+    if not choice:
+        logger.warning(f"Thread profile has no '{settings.THREAD_PROFILE_TARGET}' entry")
+        return None
+
+    explicit = _EXPLICIT_SETTINGS
+    if "YOLO_NUM_WORKERS" not in explicit:
+        settings.YOLO_NUM_WORKERS = int(choice["workers"])
+    if "INFERENCE_THREADS" not in explicit:
+        settings.INFERENCE_THREADS = int(choice["threads"])
+    if "INFERENCE_INTEROP_THREADS" not in explicit and choice.get("interop_threads"):
+        settings.INFERENCE_INTEROP_THREADS = int(choice["interop_threads"])
+
+    logger.info(
+        f"Applied {settings.THREAD_PROFILE_TARGET} thread profile: "
+        f"{settings.YOLO_NUM_WORKERS} workers x {settings.INFERENCE_THREADS} threads"
+    )
+    return choice
+
+
+def configure_threads(threads: Optional[int] = None, interop_threads: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Set torch intra-/inter-op and OpenCV thread counts for the current process.
+
+    Call before the model is loaded. The counts are also exported to the environment,
+    so worker processes spawned afterwards start with the same limits.
+
+    Args:
+        threads: Threads per worker (default: settings.INFERENCE_THREADS; None keeps library defaults)
+        interop_threads: torch inter-op threads (default: settings.INFERENCE_INTEROP_THREADS)
+
+    Returns:
+        What was applied, for logging and /ml/status
+    """
+
+    threads = threads or settings.INFERENCE_THREADS
+    interop_threads = interop_threads or settings.INFERENCE_INTEROP_THREADS
+    if not threads:
+        return {}
+
+    applied: Dict[str, Any] = {"threads": threads}
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["INFERENCE_THREADS"] = str(threads)
+    if interop_threads:
+        os.environ["INFERENCE_INTEROP_THREADS"] = str(interop_threads)
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        applied["torch_threads"] = torch.get_num_threads()
+        if interop_threads:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                # Only allowed before the first parallel torch op in the process
+                logger.warning(f"Could not set torch inter-op threads: {e}")
+            applied["torch_interop_threads"] = torch.get_num_interop_threads()
+    except ImportError:
+        pass
+
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+        applied["cv2_threads"] = cv2.getNumThreads()
+    except ImportError:
+        pass
+
+    logger.info(f"Inference threads configured: {applied}")
+    return applied
@@ -0,0 +1,83 @@
+# Sliced inference helpers: tile grid and cross-tile merging of detections
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _axis_starts(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)  # last tile flush with the edge, no padding
+    return starts
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """
+    Cover an image with overlapping square tiles.
+
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Tile side in pixels (clipped to the image)
+        overlap: Fraction of the tile shared with its neighbour, in [0, 1)
+
+    Returns:
+        List of (x0, y0, x1, y1) tile rectangles in pixel coordinates
+    """
+
+    tile_size = max(1, int(tile_size))
+    step = max(1, int(round(tile_size * (1.0 - min(max(overlap, 0.0), 0.95)))))
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in _axis_starts(height, tile_size, step)
+        for x0 in _axis_starts(width, tile_size, step)
+    ]
+
+
+def nms_per_class(
+    xyxy: np.ndarray,
+    confidences: np.ndarray,
+    class_ids: np.ndarray,
+    overlap_threshold: float,
+) -> np.ndarray:
+    """
+    Greedy per-class non-maximum suppression across tiles.
+
+    Overlap is measured as intersection over the *smaller* box, so a tool cut in half
+    by a tile edge is suppressed by the complete detection from a neighbouring tile or
+    the full-frame pass, which plain IoU would keep as a second box.
+
+    Args:
+        xyxy: (N, 4) boxes in full-image pixel coordinates
+        confidences: (N,) scores
+        class_ids: (N,) class ids; boxes of different classes never suppress each other
+        overlap_threshold: Suppress a box when its overlap with a kept box exceeds this
+
+    Returns:
+        Indices of the kept boxes, highest confidence first
+    """
+
+    if len(confidences) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    areas = np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+    keep = []
+    for class_id in np.unique(class_ids):
+        order = np.flatnonzero(class_ids == class_id)
+        order = order[np.argsort(-confidences[order], kind="stable")]
+        while len(order):
+            best, rest = order[0], order[1:]
+            keep.append(best)
+            if not len(rest):
+                break
+            ix0 = np.maximum(xyxy[best, 0], xyxy[rest, 0])
+            iy0 = np.maximum(xyxy[best, 1], xyxy[rest, 1])
+            ix1 = np.minimum(xyxy[best, 2], xyxy[rest, 2])
+            iy1 = np.minimum(xyxy[best, 3], xyxy[rest, 3])
+            inter = np.clip(ix1 - ix0, 0, None) * np.clip(iy1 - iy0, 0, None)
+            smaller = np.maximum(np.minimum(areas[best], areas[rest]), 1e-9)
+            order = rest[inter / smaller <= overlap_threshold]
+
+    keep = np.array(keep, dtype=np.int64)
+    return keep[np.argsort(-confidences[keep], kind="stable")]
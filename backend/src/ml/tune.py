@@ -0,0 +1,207 @@
+# Thread topology tuner: python -m src.ml.tune --help
+import argparse
+import functools
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..core.settings import settings
+from .backends import file_sha256
+from .process_pool import ProcessInferenceEngine, _default_worker_factory
+from .threads import configure_threads, default_profile_path, save_thread_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+
+
+def synthetic_tool_board(rng: np.random.Generator, height: int = 750, width: int = 1000) -> np.ndarray:
+    """Draw a BGR image resembling a tool board: textured background with elongated tool shapes."""
+
+    board = rng.integers(90, 140, (height, width, 3), dtype=np.uint8)
+    for _ in range(11):
+        h = int(rng.integers(height // 20, height // 8))
+        w = int(rng.integers(width // 6, width // 3))
+        if rng.random() < 0.5:
+            h, w = w * height // width, h * width // height
+        y = int(rng.integers(0, max(1, height - h)))
+        x = int(rng.integers(0, max(1, width - w)))
+        board[y:y + h, x:x + w] = rng.integers(0, 255, 3, dtype=np.uint8)
+    return board
+
+
+def _tuning_worker_factory(model_path: str, threads: int, factory: Callable[[str], Any]):
+    """
+    Worker-side: limit threads before the model is built.
+
+    configure_threads() also exports the limits to the worker's environment, which is
+    where the default factory's configure_worker_threads() reads them back from.
+    """
+
+    configure_threads(threads, interop_threads=1)
+    return factory(model_path)
+
+
+def benchmark_config(
+    model_path: str,
+    workers: int,
+    threads: int,
+    duration: float,
+    images: List[np.ndarray],
+    factory: Callable[[str], Any] = _default_worker_factory,
+) -> Dict[str, Any]:
+    """
+    Measure throughput and latency for one (workers x threads) combination.
+
+    Each worker runs its model replica with ``threads`` intra-op threads. Two client
+    threads per worker keep the pool saturated for ``duration`` seconds.
+
+    Returns:
+        {"workers", "threads", "interop_threads", "images", "throughput", "p50_ms", "p99_ms"}
+    """
+
+    engine = ProcessInferenceEngine(
+        model_path,
+        num_workers=workers,
+        max_batch_size=1,
+        factory=functools.partial(_tuning_worker_factory, threads=threads, factory=factory),
+    )
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client(offset: int, deadline: float) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            engine.submit(images[i % len(images)], settings.YOLO_CONFIDENCE_THRESHOLD).result()
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            i += 1
+
+    try:
+        # Untimed pass so first-call costs do not count
+        engine.infer_batch([(images[0], settings.YOLO_CONFIDENCE_THRESHOLD)] * workers)
+        started = time.perf_counter()
+        clients = [
+            threading.Thread(target=client, args=(n, started + duration), daemon=True)
+            for n in range(workers * 2)
+        ]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        engine.close()
+
+    measured = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "workers": workers,
+        "threads": threads,
+        "interop_threads": 1,
+        "images": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(measured, 50)), 1),
+        "p99_ms": round(float(np.percentile(measured, 99)), 1),
+    }
+
+
+def tune(
+    model_path: str,
+    worker_options: Sequence[int],
+    thread_options: Sequence[int],
+    duration: float = 10.0,
+    cpu_count: Optional[int] = None,
+    factory: Callable[[str], Any] = _default_worker_factory,
+) -> Dict[str, Any]:
+    """
+    Benchmark every workers x threads combination that fits the CPU count.
+
+    Returns:
+        Profile with all results plus the best entries for "throughput" (images/s)
+        and "latency" (lowest p99)
+    """
+
+    cpu_count = cpu_count or os.cpu_count() or 1
+    rng = np.random.default_rng(0)
+    images = [synthetic_tool_board(rng) for _ in range(4)]
+
+    results = []
+    for workers in worker_options:
+        for threads in thread_options:
+            if workers * threads > cpu_count:
+                logger.info(f"Skipping {workers} workers x {threads} threads: exceeds {cpu_count} CPUs")
+                continue
+            logger.info(f"Benchmarking {workers} workers x {threads} threads for {duration:.0f}s")
+            result = benchmark_config(model_path, workers, threads, duration, images, factory)
+            logger.info(
+                f"  {result['throughput']} img/s, p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms"
+            )
+            results.append(result)
+
+    if not results:
+        raise ValueError(f"No combination fits {cpu_count} CPUs")
+
+    return {
+        "version": PROFILE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": cpu_count,
+        "model_sha256": file_sha256(model_path) if os.path.exists(model_path) else None,
+        "backend": settings.YOLO_BACKEND,
+        "throughput": max(results, key=lambda r: r["throughput"]),
+        "latency": min(results, key=lambda r: r["p99_ms"]),
+        "results": results,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _powers_of_two(limit: int) -> List[int]:
+    values, n = [], 1
+    while n <= limit:
+        values.append(n)
+        n *= 2
+    return values
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        prog="python -m src.ml.tune",
+        description="Benchmark inference worker x thread combinations and save the best profile.",
+    )
+    parser.add_argument("--model", help="Path to the .pt model (default: settings.MODEL_PATH or models/*.pt)")
+    parser.add_argument("--workers", type=_int_list, default=_powers_of_two(cpus),
+                        help="Comma-separated worker counts to try (default: powers of two up to CPU count)")
+    parser.add_argument("--threads", type=_int_list, default=_powers_of_two(cpus),
+                        help="Comma-separated threads per worker to try (default: powers of two up to CPU count)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per combination")
+    parser.add_argument("--output", default=None, help=f"Profile path (default: {default_profile_path()})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    model_path = args.model or settings.MODEL_PATH
+    if not model_path:
+        from .yolo_service import find_default_model_path
+        model_path = find_default_model_path()
+
+    profile = tune(model_path, args.workers, args.threads, duration=args.duration)
+    path = save_thread_profile(profile, args.output)
+    for target in ("throughput", "latency"):
+        best = profile[target]
+        print(
+            f"best {target}: {best['workers']} workers x {best['threads']} threads "
+            f"({best['throughput']} img/s, p99 {best['p99_ms']} ms)"
+        )
+    print(f"Profile saved to {path}; applied at startup (THREAD_PROFILE_TARGET={settings.THREAD_PROFILE_TARGET})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,182 +1,268 @@
-import base64
-import io
+import asyncio
+import importlib
+import json
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import Iterator, List, Dict, Any, Tuple, Optional, Union
 import numpy as np
-from PIL import Image
-
-# Try to import OpenCV and YOLO, fallback if not available
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError as e:
-    logger = logging.getLogger(__name__)
-    logger.warning(f"OpenCV not available: {e}")
-    CV2_AVAILABLE = False
-
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError as e:
-    logger = logging.getLogger(__name__)
-    logger.warning(f"YOLO not available: {e}")
-    YOLO_AVAILABLE = False
 
 from ..core.settings import settings
+from ..core.timing import collect_timings, record, timed
+from .batching import MicroBatcher
+from .process_pool import ProcessInferenceEngine
+from .backends import InferenceBackend, create_backend, file_sha256
+from .imaging import decode_base64_payload, decode_image
+from .result_cache import get_result_cache, image_digest
+from .threads import configure_threads
+from .tiling import nms_per_class, tile_grid
 
 logger = logging.getLogger(__name__)
 
+CLASS_MAPPING_FILE = "class_mapping.json"
+
+# Model lifecycle, reported on /ml/status
+STATE_IDLE = "idle"          # not started; the first inference call loads the model
+STATE_WARMING = "warming"    # loading in the background
+STATE_READY = "ready"
+STATE_FAILED = "failed"      # load failed; inference falls back to the stub (ML_STUB_FALLBACK)
+STATE_DISABLED = "disabled"  # USE_YOLO=false
+
+# Retry-After sent while the model is still warming up
+_WARMING_RETRY_AFTER = 5
+
+# (height, width) aspect ratios of warm-up images: landscape and portrait tablet photos, square.
+# Letterboxing keeps the aspect ratio, so each one is a different input tensor shape.
+_WARMUP_ASPECTS = ((3, 4), (4, 3), (1, 1))
+
+
+class ModelReloadInProgress(Exception):
+    """Raised when a hot reload is requested while another one is running."""
+
+    def __init__(self):
+        super().__init__("A model reload is already in progress")
+
+class ModelNotReady(Exception):
+    """Raised when inference is requested but the model cannot serve it (yet)."""
+
+    def __init__(self, state: str, retry_after: Optional[int] = None):
+        super().__init__(f"YOLO model is not ready (state: {state})")
+        self.state = state
+        self.retry_after = retry_after
+
+
+def _require_ml_libraries() -> None:
+    """
+    Import OpenCV and ultralytics on first use.
+
+    ultralytics pulls in torch, which takes seconds to import, so importing the app
+    (and the test suite) no longer pays for it; the background warm-up does.
+    """
+
+    for module, label in (("cv2", "OpenCV"), ("ultralytics", "YOLO (ultralytics)")):
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"{label} not available: {e}")
+            raise RuntimeError(f"{label} is not available. Cannot initialize YOLO service.")
+
+def load_class_mapping(model_path: str) -> Tuple[Optional[Any], Dict[str, str]]:
+    """
+    Load the versioned YOLO name -> catalog name mapping stored next to the model.
+
+    Looks for ``<model stem>.classes.json`` first, then ``class_mapping.json`` in the
+    model's directory. File format: {"version": ..., "mapping": {"yolo_name": "catalog_name"}}.
+
+    Returns:
+        Tuple of (mapping version or None, mapping dict; empty if no file was found)
+    """
+
+    model_file = Path(model_path)
+    candidates = [
+        model_file.with_name(f"{model_file.stem}.classes.json"),
+        model_file.with_name(CLASS_MAPPING_FILE),
+    ]
+    for path in candidates:
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            logger.info(f"Using class mapping {path} (version {data.get('version')})")
+            return data.get("version"), dict(data.get("mapping", {}))
+
+    logger.warning(f"No class mapping file next to {model_path}; expecting catalog class names")
+    return None, {}
+
+def models_dir() -> Path:
+    """Directory holding the .pt models (backend/models)."""
+
+    return Path(__file__).parent.parent.parent / "models"
+
+def find_default_model_path() -> str:
+    """Return the .pt file in the models directory (the newest one if there are several)."""
+
+    # Look for .pt files in models directory
+    directory = models_dir()
+    pt_files = sorted(directory.glob("*.pt"), key=lambda p: (p.stat().st_mtime, p.name), reverse=True)
+    
+    if not pt_files:
+        raise FileNotFoundError(
+            f"No .pt model files found in {directory}. "
+            "Please place your YOLO v11 model file there."
+        )
+    
+    if len(pt_files) > 1:
+        logger.warning(f"Multiple .pt files found: {pt_files}. Using the newest one: {pt_files[0]}")
+    
+    return str(pt_files[0])
+
+def resolve_model_name(name: str) -> str:
+    """
+    Map a model file name from the models directory to its path.
+
+    Only plain file names are accepted, so an API caller cannot load arbitrary files.
+
+    Raises:
+        FileNotFoundError: No such .pt file in the models directory
+    """
+
+    path = models_dir() / name
+    if Path(name).name != name or path.suffix != ".pt" or not path.is_file():
+        raise FileNotFoundError(f"No model named {name!r} in {models_dir()}")
+    return str(path)
+
+def list_models() -> List[Dict[str, Any]]:
+    """Describe the .pt files in the models directory, newest first, marking the active one."""
+
+    active = _yolo_service.model_path if _yolo_service is not None else None
+    models = []
+    for path in sorted(models_dir().glob("*.pt"), key=lambda p: (p.stat().st_mtime, p.name), reverse=True):
+        stat = path.stat()
+        models.append({
+            "name": path.name,
+            "version": file_sha256(str(path))[:12],
+            "size_bytes": stat.st_size,
+            "modified_at": stat.st_mtime,
+            "active": active is not None and Path(active).resolve() == path.resolve(),
+        })
+    return models
+
 class YOLOInferenceService:
     """Service for running YOLO v11 inference on tool detection."""
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, num_workers: Optional[int] = None,
+                 batching: bool = True, backend: Optional[InferenceBackend] = None):
         """
         Initialize YOLO service.
         
         Args:
-            model_path: Path to the .pt model file. If None, uses default path.
+            model_path: Path to the .pt model file. If None, uses the backend's source
+                path or the default path.
+            num_workers: Worker processes holding model replicas. 0 runs the model in this
+                process. If None, uses settings.YOLO_NUM_WORKERS.
+            batching: Merge concurrent calls into batched model calls (in-process mode only)
+            backend: Already loaded runtime to use instead of settings.YOLO_BACKEND; runs
+                in-process (num_workers is ignored) and needs no ML libraries. The class
+                mapping is still read next to model_path.
         """
 
         self.model = None
-        self.model_path = model_path or self._get_default_model_path()
+        self.backend: Optional[InferenceBackend] = None
+        self.class_mapping_version: Optional[Any] = None
+        self.model_version: Optional[str] = None  # short SHA-256 of the weights file
+        self.engine: Optional[ProcessInferenceEngine] = None
+        self.warmup_timings: Optional[Dict[str, Any]] = None
+        self._batcher: Optional[MicroBatcher] = None
+        self._inflight = 0  # calls in progress, so a replaced service can drain before close
+        self._idle = threading.Condition()
+        self.model_path = model_path or getattr(backend, "source_path", None) or self._get_default_model_path()
         self.classes_catalog = settings.CLASSES
         
-        # Check if required libraries are available
-        if not CV2_AVAILABLE:
-            raise RuntimeError("OpenCV is not available. Cannot initialize YOLO service.")
-        if not YOLO_AVAILABLE:
-            raise RuntimeError("YOLO (ultralytics) is not available. Cannot initialize YOLO service.")
-            
-        self._load_model()
+        if backend is None:
+            # Check if required libraries are available (imported lazily here, not at module load)
+            _require_ml_libraries()
+
+        num_workers = settings.YOLO_NUM_WORKERS if num_workers is None else num_workers
+        if num_workers > 0 and backend is None:
+            # Model replicas live in worker processes; this process only decodes and dispatches
+            self.engine = ProcessInferenceEngine(
+                self.model_path,
+                num_workers=num_workers,
+                max_batch_size=settings.YOLO_BATCH_MAX_SIZE,
+            )
+            self.class_mapping_version = self.engine.class_mapping_version
+            self.warmup_timings = self.engine.warmup_timings
+            self.model_version = file_sha256(self.model_path)[:12]
+            return
+
+        self._load_model(backend)
+
+        # Concurrent callers share one batched model call
+        if batching and settings.YOLO_BATCH_MAX_SIZE > 1:
+            self._batcher = MicroBatcher(
+                self._infer_batch,
+                max_batch_size=settings.YOLO_BATCH_MAX_SIZE,
+                max_wait_ms=settings.YOLO_BATCH_MAX_WAIT_MS,
+                name="yolo-batcher",
+            )
     
     def _get_default_model_path(self) -> str:
         """Get default model path."""
 
-        # Look for .pt files in models directory
-        models_dir = Path(__file__).parent.parent.parent / "models"
-        pt_files = list(models_dir.glob("*.pt"))
-        
-        if not pt_files:
-            raise FileNotFoundError(
-                f"No .pt model files found in {models_dir}. "
-                "Please place your YOLO v11 model file there."
-            )
-        
-        if len(pt_files) > 1:
-            logger.warning(f"Multiple .pt files found: {pt_files}. Using the first one: {pt_files[0]}")
-        
-        return str(pt_files[0])
+        return find_default_model_path()
     
-    def _load_model(self):
-        """Load YOLO model from file."""
+    def _load_model(self, backend: Optional[InferenceBackend] = None):
+        """Load YOLO model from file through the configured backend (settings.YOLO_BACKEND), or adopt an injected one."""
 
         try:
-            logger.info(f"Loading YOLO model from: {self.model_path}")
-            self.model = YOLO(self.model_path)
+            if backend is None:
+                logger.info(f"Loading YOLO model from: {self.model_path} (backend: {settings.YOLO_BACKEND})")
+                backend = create_backend(settings.YOLO_BACKEND, self.model_path)
+            self.backend = backend
+            self.model = self.backend.model
+            self.model_version = self.backend.model_sha256[:12]
             logger.info(f"Model loaded successfully. Classes: {self.model.names}")
+            self.class_mapping_version, class_mapping = load_class_mapping(self.model_path)
+            self._build_class_lut(class_mapping)
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
             raise RuntimeError(f"Could not load YOLO model from {self.model_path}: {e}")
     
-    def _base64_to_image(self, image_b64: str) -> np.ndarray:
-        """Convert base64 string to OpenCV image array."""
+    def _decode_image(self, image_bytes: bytes) -> np.ndarray:
+        """Decode image bytes to an OpenCV (BGR) array, downscaled near model input size."""
 
         try:
-            # Remove data URL prefix if present
-            if ',' in image_b64:
-                image_b64 = image_b64.split(',')[1]
-            
-            # Decode base64
-            image_bytes = base64.b64decode(image_b64)
-            
-            # Convert to PIL Image
-            pil_image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if needed
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # Convert to OpenCV format (BGR) if OpenCV is available
-            if CV2_AVAILABLE:
-                cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-                return cv_image
-            else:
-                # Fallback: return RGB numpy array
-                return np.array(pil_image)
-            
+            # Tiled mode needs the full resolution: that is where the small tools are
+            target_size = None if settings.YOLO_TILED else self.input_size
+            return decode_image(image_bytes, target_size=target_size)
         except Exception as e:
-            logger.error(f"Failed to decode base64 image: {e}")
-            raise ValueError(f"Invalid base64 image data: {e}")
+            logger.error(f"Failed to decode image: {e}")
+            raise ValueError(f"Invalid image data: {e}")
     
-    def _map_class_names(self, yolo_class_id: int) -> Optional[str]:
+    def _map_class_names(self, yolo_class_name: str, class_mapping: Dict[str, str]) -> Optional[str]:
         """
-        Map YOLO class ID to our standard class names.
+        Resolve one YOLO class name to our standard class name (used once per class at load).
         
         Args:
-            yolo_class_id: Class ID from YOLO model
+            yolo_class_name: Class name from the YOLO model
+            class_mapping: YOLO name -> catalog name, from the mapping file
             
         Returns:
             Mapped class name or None if not found
         """
 
-        # Get class name from YOLO model
-        yolo_class_name = self.model.names.get(yolo_class_id)
-        
         if not yolo_class_name:
             return None
-        
-        # Map YOLO class names to our standard names
-        # Based on your model's actual class names
-        # class_mapping = {
-        #     # Your YOLO model classes -> Our standard classes
-        #     '1_screw_driver_minus': 'screwdriver_minus',
-        #     '2_screw_driver_plus': 'screwdriver_plus', 
-        #     '3_screw_driver_cross': 'offset_cross',  # Cross screwdriver maps to offset_cross
-        #     '4_brace': 'brace',
-        #     '5_contouring_pliers': 'nippers',  # Contouring pliers maps to nippers
-        #     '6_pliers': 'pliers',
-        #     '7_slip_joint_pilers': 'lock_pliers',  # Slip joint pliers maps to lock_pliers
-        #     '8_wrench': 'wrench_adjustable',  # Wrench maps to adjustable wrench
-        #     '9_can_opener': 'oil_can_opener',  # Can opener maps to oil can opener
-        #     '10_spanner': 'ring_wrench_3_4',  # Spanner maps to ring wrench
-        #     '11_side_cutters': 'shernitsa',  # Side cutters maps to shernitsa
-        # }
-
-        # class_mapping = {
-        #     # Your YOLO model classes -> Our standard classes
-        #     '1_screw_driver_minus': 'screwdriver_minus',
-        #     '2_screw_driver_plus': 'offset_cross',
-        #     '3_screw_driver_cross': 'screwdriver_plus',  # Cross screwdriver maps to offset_cross ---
-        #     '4_brace': 'brace',
-        #     '5_contouring_pliers': 'ring_wrench_3_4', # Contouring pliers maps to nippers
-        #     '6_pliers': 'nippers',
-        #     '7_slip_joint_pilers': 'lock_pliers',  # Slip joint pliers maps to lock_pliers
-        #     '8_wrench': 'ring_wrench_3_4',  # Wrench maps to adjustable wrench
-        #     '9_can_opener': 'pliers',  # Can opener maps to oil can opener
-        #     '10_spanner': 'oil_can_opener',  # Spanner maps to ring wrench
-        #     '11_side_cutters': 'shernitsa',  # Side cutters maps to shernitsa
-        # }
-
-        class_mapping = {
-            "1_screw_driver_minus": "screwdriver_minus",
-            "2_screw_driver_plus": "screwdriver_plus",
-            "3_screw_driver_cross": "offset_cross",
-            "4_brace": "brace",
-            "5_contouring_pliers": "lock_pliers",
-            "6_pliers": "shernitsa",
-            "7_slip_joint_pilers": "wrench_adjustable",
-            "8_wrench": "oil_can_opener",
-            "9_can_opener": "pliers",
-            "10_spanner": "ring_wrench_3_4",
-            "11_side_cutters": "nippers"
-        }
 
-        
         # Try exact match first
         if yolo_class_name in class_mapping:
             return class_mapping[yolo_class_name]
         
+        # Model already uses catalog names
+        if yolo_class_name in self.classes_catalog:
+            return yolo_class_name
+
         # Try partial match (case insensitive)
         yolo_lower = yolo_class_name.lower()
         for yolo_name, standard_name in class_mapping.items():
@@ -185,36 +271,300 @@ class YOLOInferenceService:
         
         logger.warning(f"Unknown class name from YOLO: {yolo_class_name}")
         return None
-    
-    def _convert_bbox_format(self, bbox: List[float], img_width: int, img_height: int) -> List[float]:
+
+    def _build_class_lut(self, class_mapping: Dict[str, str]) -> None:
         """
-        Convert YOLO bbox format to normalized [x_center, y_center, width, height].
+        Precompute the YOLO class id -> catalog index lookup table.
+
+        Unknown ids map to -1 and are dropped by array masking in post-processing.
+        """
+
+        names = self.model.names
+        size = max(names) + 1 if names else 0
+        self._class_lut = np.full(size, -1, dtype=np.int64)
+        self._catalog_names = np.array(self.classes_catalog, dtype=object)
+        catalog_index = {name: i for i, name in enumerate(self.classes_catalog)}
+
+        for class_id, yolo_name in names.items():
+            standard_name = self._map_class_names(yolo_name, class_mapping)
+            if standard_name is None:
+                continue
+            if standard_name not in catalog_index:
+                logger.warning(f"Class mapping target '{standard_name}' is not in the classes catalog")
+                continue
+            self._class_lut[class_id] = catalog_index[standard_name]
+
+        mapped = int((self._class_lut >= 0).sum())
+        logger.info(f"Class lookup table built: {mapped}/{len(names)} model classes mapped")
+
+    def _convert_bbox_format(self, xyxy: np.ndarray, img_width: int, img_height: int) -> np.ndarray:
+        """
+        Convert YOLO boxes to normalized [x_center, y_center, width, height] (vectorized).
         
         Args:
-            bbox: YOLO bbox in format [x1, y1, x2, y2] (absolute coordinates)
+            xyxy: Array of shape (N, 4) with [x1, y1, x2, y2] absolute coordinates
             img_width: Image width
             img_height: Image height
             
         Returns:
-            Normalized bbox [x_center, y_center, width, height]
+            Array of shape (N, 4) with normalized [x_center, y_center, width, height]
         """
 
-        x1, y1, x2, y2 = bbox
-        
-        # Convert to center format
-        x_center = (x1 + x2) / 2
-        y_center = (y1 + y2) / 2
-        width = x2 - x1
-        height = y2 - y1
-        
-        # Normalize by image dimensions
-        x_center_norm = x_center / img_width
-        y_center_norm = y_center / img_height
-        width_norm = width / img_width
-        height_norm = height / img_height
-        
-        return [x_center_norm, y_center_norm, width_norm, height_norm]
-    
+        xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        scale = np.array([img_width, img_height, img_width, img_height], dtype=np.float64)
+        xywhn = np.empty_like(xyxy)
+        xywhn[:, :2] = (xyxy[:, :2] + xyxy[:, 2:]) / 2  # centers
+        xywhn[:, 2:] = xyxy[:, 2:] - xyxy[:, :2]        # sizes
+        return xywhn / scale
+
+    def _result_arrays(self, result) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pull boxes, confidences and class ids out of one ultralytics result in one pass.
+
+        Returns:
+            (xyxy (N, 4) float, confidences (N,) float, class ids (N,) int)
+        """
+
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+        # One device->host transfer for the whole [x1, y1, x2, y2, (track id), conf, cls] table
+        data = boxes.data.cpu().numpy()
+        return data[:, :4], data[:, -2], data[:, -1].astype(np.int64)
+
+    def _class_name_table(self, class_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map class ids to catalog names through the precomputed lookup table.
+
+        Returns:
+            (catalog names per id as object array, boolean mask of ids with a known mapping)
+        """
+
+        lut = self._class_lut
+        in_range = (class_ids >= 0) & (class_ids < len(lut))
+        catalog_idx = np.full(len(class_ids), -1, dtype=np.int64)
+        catalog_idx[in_range] = lut[class_ids[in_range]]
+        known = catalog_idx >= 0
+        return self._catalog_names[np.where(known, catalog_idx, 0)], known
+
+    def _postprocess(
+        self,
+        xyxy: np.ndarray,
+        confidences: np.ndarray,
+        class_ids: np.ndarray,
+        img_width: int,
+        img_height: int,
+        confidence_threshold: float,
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter and serialize detections using whole-array operations.
+
+        Python objects are only created for the detections that survive filtering.
+
+        Args:
+            xyxy: (N, 4) absolute boxes
+            confidences: (N,) scores
+            class_ids: (N,) YOLO class ids
+            img_width: Image width used for normalization
+            img_height: Image height used for normalization
+            confidence_threshold: Caller's threshold (the batch may have run at a lower one)
+
+        Returns:
+            List of detection dictionaries
+        """
+
+        if len(confidences) == 0:
+            return []
+
+        names, known = self._class_name_table(class_ids)
+        keep = known & (confidences >= confidence_threshold)
+        if not keep.any():
+            return []
+
+        boxes = self._convert_bbox_format(xyxy[keep], img_width, img_height).tolist()
+        return [
+            {"class": name, "confidence": conf, "box": box}
+            for name, conf, box in zip(names[keep].tolist(), confidences[keep].tolist(), boxes)
+        ]
+
+    def _process_result(self, result, confidence_threshold: float) -> List[Dict[str, Any]]:
+        """
+        Convert one ultralytics result into detection dicts.
+
+        Args:
+            result: Ultralytics result for a single image
+            confidence_threshold: Caller's threshold
+
+        Returns:
+            List of detection dictionaries
+        """
+
+        img_height, img_width = result.orig_shape[:2]
+        xyxy, confidences, class_ids = self._result_arrays(result)
+        return self._postprocess(xyxy, confidences, class_ids, img_width, img_height, confidence_threshold)
+
+    def _infer_batch(self, items: List[Tuple[np.ndarray, float]]) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Run the configured inference passes over several decoded images.
+
+        Args:
+            items: List of (image, confidence_threshold) pairs
+
+        Returns:
+            (detections, info) per image, in the same order as items. ``info["stage"]``
+            names the pass that produced the detections (coarse / full / tiled),
+            ``info["passes"]`` lists every pass that ran and ``info["timings"]`` has the
+            batch's milliseconds per stage (model, postprocess).
+        """
+
+        # Runs in the batcher thread or a worker process: the batch's model and
+        # post-processing times travel back to each caller in info["timings"]
+        with collect_timings() as batch_timings:
+            if settings.YOLO_CASCADE:
+                outputs = self._infer_cascade_batch(items)
+            else:
+                stage = self._fine_stage
+                outputs = [
+                    (detections, {"stage": stage, "passes": [stage]})
+                    for detections in self._infer_fine_batch(items)
+                ]
+        for _detections, info in outputs:
+            info["timings"] = dict(batch_timings.stages)
+        return outputs
+
+    @property
+    def _fine_stage(self) -> str:
+        return "tiled" if settings.YOLO_TILED else "full"
+
+    def _infer_fine_batch(self, items: List[Tuple[np.ndarray, float]]) -> List[List[Dict[str, Any]]]:
+        """Full-quality pass: tiled when YOLO_TILED is on, else the whole image at input size."""
+
+        if settings.YOLO_TILED:
+            return self._infer_tiled_batch(items)
+        return self._infer_full_batch(items)
+
+    def _infer_full_batch(
+        self,
+        items: List[Tuple[np.ndarray, float]],
+        imgsz: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run one model call over several decoded images.
+
+        The model runs at the lowest threshold in the batch; each image's detections
+        are then filtered with its own caller's threshold.
+
+        Args:
+            items: List of (image, confidence_threshold) pairs
+            imgsz: Model input size for this call (default: the backend's input size)
+
+        Returns:
+            Detections per image, in the same order as items
+        """
+
+        images = [image for image, _ in items]
+        batch_conf = min(conf for _, conf in items)
+        predict_kwargs = {"imgsz": imgsz} if imgsz else {}
+
+        if len(images) > 1:
+            logger.info(f"Running batched inference on {len(images)} images")
+        with timed("model"):
+            results = self.backend.predict(images, conf=batch_conf, **predict_kwargs)
+
+        with timed("postprocess"):
+            return [
+                self._process_result(result, conf)
+                for result, (_, conf) in zip(results, items)
+            ]
+
+    def _kit_complete(self, detections: List[Dict[str, Any]]) -> bool:
+        """True when every catalog class was found with at least YOLO_CASCADE_ACCEPT_CONF."""
+
+        confident = {d["class"] for d in detections if d["confidence"] >= settings.YOLO_CASCADE_ACCEPT_CONF}
+        return confident.issuperset(self.classes_catalog)
+
+    def _infer_cascade_batch(self, items: List[Tuple[np.ndarray, float]]) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Coarse-to-fine: a cheap low-resolution pass first, the full pass only when needed.
+
+        Most handout photos show the complete kit, and then the coarse pass at
+        YOLO_CASCADE_IMGSZ is already the answer. Images where a class is missing or
+        below YOLO_CASCADE_ACCEPT_CONF go through the full (or tiled) pass, batched
+        together, and that pass's detections replace the coarse ones.
+        """
+
+        coarse = self._infer_full_batch(items, imgsz=settings.YOLO_CASCADE_IMGSZ)
+        outputs: List[Any] = [None] * len(items)
+        pending = []
+        for index, detections in enumerate(coarse):
+            if self._kit_complete(detections):
+                outputs[index] = (detections, {"stage": "coarse", "passes": ["coarse"]})
+            else:
+                pending.append(index)
+
+        if pending:
+            stage = self._fine_stage
+            logger.info(f"Cascade: {len(pending)}/{len(items)} images need the {stage} pass")
+            fine = self._infer_fine_batch([items[i] for i in pending])
+            for index, detections in zip(pending, fine):
+                outputs[index] = (detections, {"stage": stage, "passes": ["coarse", stage]})
+        return outputs
+
+    def _infer_tiled_batch(self, items: List[Tuple[np.ndarray, float]]) -> List[List[Dict[str, Any]]]:
+        """
+        Sliced inference: run overlapping tiles of every image through the model in batches.
+
+        Each image is cut into tiles of tile_size (YOLO_TILE_SIZE, default the model input
+        size) overlapping by YOLO_TILE_OVERLAP, and tiles run with the model input set to
+        the tile size, so small tools are seen at native resolution. With
+        YOLO_TILE_FULL_FRAME the whole image also runs once at the normal input size, for
+        tools larger than a tile. Tile detections are shifted into image coordinates and
+        merged with per-class cross-tile NMS.
+
+        Args:
+            items: List of (full-resolution image, confidence_threshold) pairs
+
+        Returns:
+            Detections per image (normalized to the full image), in the same order as items
+        """
+
+        tile_size = self.tile_size
+        # (crop, owner image index, crop offset); full frames run separately at the normal input size
+        tiles, frames = [], []
+        for index, (image, _) in enumerate(items):
+            height, width = image.shape[:2]
+            grid = tile_grid(width, height, tile_size, settings.YOLO_TILE_OVERLAP)
+            for x0, y0, x1, y1 in grid:
+                tiles.append((image[y0:y1, x0:x1], index, (x0, y0)))
+            if settings.YOLO_TILE_FULL_FRAME and len(grid) > 1:
+                frames.append((image, index, (0, 0)))
+
+        batch_conf = min(conf for _, conf in items)
+        chunk = max(1, settings.YOLO_TILE_BATCH_SIZE)
+        logger.info(f"Running tiled inference: {len(tiles)} tiles of {tile_size}px and {len(frames)} full frames for {len(items)} images")
+        results = []
+        with timed("model"):
+            for jobs, predict_kwargs in ((tiles, {"imgsz": tile_size}), (frames, {})):
+                for start in range(0, len(jobs), chunk):
+                    crops = [crop for crop, _, _ in jobs[start:start + chunk]]
+                    results.extend(self.backend.predict(crops, conf=batch_conf, **predict_kwargs))
+
+        outputs = []
+        with timed("postprocess"):
+            parts: List[List[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = [[] for _ in items]
+            for result, (_, owner, (x0, y0)) in zip(results, tiles + frames):
+                xyxy, confidences, class_ids = self._result_arrays(result)
+                parts[owner].append((xyxy + np.array([x0, y0, x0, y0]), confidences, class_ids))
+
+            for (image, conf), part in zip(items, parts):
+                xyxy = np.concatenate([p[0] for p in part])
+                confidences = np.concatenate([p[1] for p in part])
+                class_ids = np.concatenate([p[2] for p in part])
+                keep = nms_per_class(xyxy, confidences, class_ids, settings.YOLO_TILE_NMS_THRESHOLD)
+                height, width = image.shape[:2]
+                outputs.append(self._postprocess(xyxy[keep], confidences[keep], class_ids[keep], width, height, conf))
+        return outputs
+
     def infer(self, image_b64: str, confidence_threshold: float = 0.5) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Run inference on base64 encoded image.
@@ -232,86 +582,484 @@ class YOLOInferenceService:
                 - box: List[float] (normalized [x_center, y_center, width, height])
         """
 
-        if not self.model:
+        classes_catalog, detections, _info = self.infer_detailed(image_b64, confidence_threshold)
+        return classes_catalog, detections
+
+    def infer_bytes(self, image_bytes: bytes, confidence_threshold: float = 0.5) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Run inference on encoded image bytes (JPEG/PNG/...), e.g. from a binary upload.
+
+        Args:
+            image_bytes: Encoded image file contents
+            confidence_threshold: Minimum confidence threshold for detections
+
+        Returns:
+            Tuple of (classes_catalog, detections), same format as infer()
+        """
+
+        classes_catalog, detections, _info = self.infer_detailed(image_bytes, confidence_threshold)
+        return classes_catalog, detections
+
+    def infer_detailed(
+        self,
+        image: Union[str, bytes],
+        confidence_threshold: float = 0.5,
+        use_cache: bool = True,
+    ) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run inference and also report how the answer was produced.
+
+        Args:
+            image: Base64 encoded image (str) or encoded image bytes
+            confidence_threshold: Minimum confidence threshold for detections
+            use_cache: Look up and store the result in the result cache; off for
+                images that never repeat (live camera frames)
+
+        Returns:
+            Tuple of (classes_catalog, detections, info); info has ``stage``, ``passes``,
+            ``cached`` and ``model_version``
+        """
+
+        if not self.is_loaded:
             raise RuntimeError("YOLO model not loaded")
+
+        if isinstance(image, str):
+            try:
+                with timed("base64"):
+                    image_bytes = decode_base64_payload(image)
+            except Exception as e:
+                logger.error(f"Failed to decode base64 image: {e}")
+                raise RuntimeError(f"YOLO inference failed: {e}")
+        else:
+            image_bytes = image
+
+        # The model runs (and results are cached) at the base threshold, so callers with
+        # different UI thresholds share one entry; each gets its own filtered view.
+        base_conf = min(confidence_threshold, settings.YOLO_CONFIDENCE_THRESHOLD)
+        cache = get_result_cache() if use_cache else None
+        cache_key = None
+        if cache is not None:
+            with timed("cache"):
+                cache_key = cache.make_key(image_digest(image_bytes), base_conf, self.cache_version)
+                cached = cache.get(cache_key)
+            if cached is not None:
+                detections, info = cached["detections"], cached["info"]
+                logger.info(f"Result cache hit ({len(detections)} candidate detections)")
+                return (
+                    self.classes_catalog,
+                    self._filter_confidence(detections, confidence_threshold),
+                    {**info, "cached": True, "model_version": self.model_version},
+                )
         
         try:
-            # Convert base64 to image
-            image = self._base64_to_image(image_b64)
-            img_height, img_width = image.shape[:2]
+            with timed("decode"):
+                decoded = self._decode_image(image_bytes)
+            img_height, img_width = decoded.shape[:2]
             
             logger.info(f"Running inference on image of size: {img_width}x{img_height}")
             
-            # Run YOLO inference
-            results = self.model(image, conf=confidence_threshold, verbose=False)
-            
-            detections = []
-            
-            # Process results
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        # Get class ID and confidence
-                        class_id = int(box.cls.item())
-                        confidence = float(box.conf.item())
-                        
-                        # Map class name
-                        class_name = self._map_class_names(class_id)
-                        if not class_name:
-                            continue  # Skip unknown classes
-                        
-                        # Get bbox coordinates (x1, y1, x2, y2)
-                        bbox_xyxy = box.xyxy[0].tolist()
-                        
-                        # Convert to normalized center format
-                        bbox_normalized = self._convert_bbox_format(bbox_xyxy, img_width, img_height)
-                        
-                        detection = {
-                            "class": class_name,
-                            "confidence": confidence,
-                            "box": bbox_normalized
-                        }
-                        detections.append(detection)
+            with timed("inference"):
+                detections, info = self._run_image(decoded, base_conf)
+            # Model/post-processing time measured where the batch ran
+            for stage, ms in info.pop("timings", {}).items():
+                record(stage, ms)
+            if cache_key is not None:
+                cache.put(cache_key, {"detections": detections, "info": info})
+            detections = self._filter_confidence(detections, confidence_threshold)
             
-            logger.info(f"Found {len(detections)} detections")
-            return self.classes_catalog, detections
+            logger.info(f"Found {len(detections)} detections ({info['stage']} pass)")
+            return self.classes_catalog, detections, {**info, "cached": False, "model_version": self.model_version}
             
         except Exception as e:
             logger.error(f"Inference failed: {e}")
             raise RuntimeError(f"YOLO inference failed: {e}")
 
+    @staticmethod
+    def _filter_confidence(detections: List[Dict[str, Any]], confidence_threshold: float) -> List[Dict[str, Any]]:
+        return [d for d in detections if d["confidence"] >= confidence_threshold]
+
+    @property
+    def cache_version(self) -> str:
+        """Everything besides the image that changes the detections: weights, runtime, input size, mapping."""
+
+        version = f"{self.model_version}:{settings.YOLO_BACKEND}:{self.input_size}:{self.class_mapping_version}"
+        if settings.YOLO_CASCADE:
+            version += f":cascade-{settings.YOLO_CASCADE_IMGSZ}-{settings.YOLO_CASCADE_ACCEPT_CONF}"
+        if settings.YOLO_TILED:
+            version += (
+                f":tiled-{self.tile_size}-{settings.YOLO_TILE_OVERLAP}"
+                f"-{settings.YOLO_TILE_FULL_FRAME}-{settings.YOLO_TILE_NMS_THRESHOLD}"
+            )
+        return version
+
+    def warmup(self, sizes: Optional[List[int]] = None, runs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run synthetic images through the model before it takes traffic.
+
+        The first calls at a given input shape pay for allocator growth, layer fusion
+        and kernel selection. Each size in ``sizes`` is run with landscape, portrait
+        and square images (and with a full batch when micro-batching is on), so real
+        requests start at steady-state latency.
+
+        Args:
+            sizes: Model input sizes (default: settings.YOLO_WARMUP_SIZES, else input_size)
+            runs: Runs per shape (default: settings.YOLO_WARMUP_RUNS)
+
+        Returns:
+            Timings per shape: first-run and last-run latency in ms, plus the total
+        """
+
+        if self.engine is not None:
+            # Every worker warmed up its own replica before reporting ready
+            return self.warmup_timings or {}
+
+        sizes = sizes or settings.YOLO_WARMUP_SIZES or [self.input_size]
+        if settings.YOLO_CASCADE and settings.YOLO_CASCADE_IMGSZ not in sizes:
+            sizes = [settings.YOLO_CASCADE_IMGSZ, *sizes]
+        runs = settings.YOLO_WARMUP_RUNS if runs is None else runs
+        rng = np.random.default_rng(0)
+        started = time.perf_counter()
+        shapes = []
+
+        batched = self._batcher.max_batch_size if self._batcher is not None else 1
+        for size in sizes:
+            for aspect_h, aspect_w in _WARMUP_ASPECTS:
+                scale = size / max(aspect_h, aspect_w)
+                height, width = int(aspect_h * scale), int(aspect_w * scale)
+                image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+                # Mixed-aspect batches are padded to a square input, so warm the batch shape once
+                batch_sizes = [1, batched] if aspect_h == aspect_w and batched > 1 else [1]
+                for batch in batch_sizes:
+                    latencies = []
+                    for _ in range(max(1, runs)):
+                        t0 = time.perf_counter()
+                        self.backend.predict([image] * batch, conf=settings.YOLO_CONFIDENCE_THRESHOLD, imgsz=size)
+                        latencies.append((time.perf_counter() - t0) * 1000)
+                    shapes.append({
+                        "imgsz": size,
+                        "image": [height, width],
+                        "batch": batch,
+                        "first_ms": round(latencies[0], 1),
+                        "last_ms": round(latencies[-1], 1),
+                    })
+
+        self.warmup_timings = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "runs_per_shape": max(1, runs),
+            "shapes": shapes,
+        }
+        logger.info(
+            f"Warm-up finished in {self.warmup_timings['total_ms']:.0f} ms over {len(shapes)} shapes"
+        )
+        return self.warmup_timings
+
+    def _run_image(self, image: np.ndarray, confidence_threshold: float) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Run one decoded image through the pool, the micro-batcher or the model directly; returns (detections, info)."""
+
+        if self.engine is not None:
+            return self.engine.submit(image, confidence_threshold).result()
+        if self._batcher is not None:
+            return self._batcher.submit((image, confidence_threshold)).result()
+        return self._infer_batch([(image, confidence_threshold)])[0]
+
+    @property
+    def is_loaded(self) -> bool:
+        """True when a model is available, in this process or in the worker pool."""
+
+        return self.model is not None or self.engine is not None
+
+    @property
+    def input_size(self) -> int:
+        """Model input size, used to decode images no larger than needed."""
+
+        if self.backend is not None:
+            return self.backend.input_size
+        return settings.YOLO_IMGSZ or 640
+
+    @property
+    def tile_size(self) -> int:
+        """Tile side for tiled inference: YOLO_TILE_SIZE, else the model input size."""
+
+        return settings.YOLO_TILE_SIZE or self.input_size
+
+    @property
+    def class_names(self) -> Dict[int, str]:
+        """YOLO class id -> name, from the local model or the worker replicas."""
+
+        if self.model is not None:
+            return self.model.names
+        return self.engine.names if self.engine is not None else {}
+
+    def batching_stats(self) -> Optional[Dict[str, Any]]:
+        """Return micro-batching counters, or None if batching is disabled."""
+
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """Return worker pool counters, or None when running in-process."""
+
+        return self.engine.stats() if self.engine is not None else None
+
+    def _enter(self) -> None:
+        with self._idle:
+            self._inflight += 1
+
+    def _exit(self) -> None:
+        with self._idle:
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no call is using this service. Returns False on timeout."""
+
+        with self._idle:
+            return self._idle.wait_for(lambda: self._inflight == 0, timeout)
+
+    def close(self) -> None:
+        """Release the batcher thread and worker processes."""
+
+        if self._batcher is not None:
+            self._batcher.close()
+        if self.engine is not None:
+            self.engine.close()
+
 
 # Global service instance
 _yolo_service: Optional[YOLOInferenceService] = None
+_state = STATE_IDLE
+_state_error: Optional[str] = None
+_load_seconds: Optional[float] = None
+_threads: Dict[str, Any] = {}
+_load_lock = threading.Lock()
+_swap_lock = threading.Lock()    # guards picking the current service vs. replacing it
+_reload_lock = threading.Lock()  # one hot reload at a time
+_last_reload: Optional[Dict[str, Any]] = None
+
+def _load_service() -> YOLOInferenceService:
+    """Create the global service, tracking the lifecycle state. Caller holds _load_lock."""
+
+    global _yolo_service, _state, _state_error, _load_seconds, _threads
+    _state, _state_error = STATE_WARMING, None
+    started = time.perf_counter()
+    try:
+        # Before the model (and any worker process) exists, so the limits apply everywhere
+        _threads = configure_threads()
+        service = YOLOInferenceService()
+    except Exception as e:
+        _state, _state_error = STATE_FAILED, str(e)
+        raise
+    try:
+        # Still "warming": the first shapes are run before the service takes traffic
+        if settings.YOLO_WARMUP_RUNS > 0:
+            service.warmup()
+    except Exception as e:
+        service.close()
+        _state, _state_error = STATE_FAILED, str(e)
+        raise
+    _yolo_service = service
+    _load_seconds = time.perf_counter() - started
+    _state = STATE_READY
+    return service
 
 def get_yolo_service() -> YOLOInferenceService:
     """Get or create global YOLO service instance."""
 
-    global _yolo_service
-    if _yolo_service is None:
-        _yolo_service = YOLOInferenceService()
-    return _yolo_service
+    if _yolo_service is not None:
+        return _yolo_service
+    if _state in (STATE_FAILED, STATE_DISABLED):
+        raise RuntimeError(f"YOLO model is {_state}" + (f": {_state_error}" if _state_error else ""))
+    # Waits for a background warm-up in progress instead of loading a second copy
+    with _load_lock:
+        if _yolo_service is not None:
+            return _yolo_service
+        return _load_service()
+
+@contextmanager
+def _use_service() -> Iterator[YOLOInferenceService]:
+    """
+    Hold the current service for one call.
+
+    A hot reload may replace the global service at any time; calls that already
+    hold the old one finish on it, and it is closed only after they are done.
+    """
+
+    service = get_yolo_service()
+    with _swap_lock:
+        service = _yolo_service or service
+        service._enter()
+    try:
+        yield service
+    finally:
+        service._exit()
+
+def _retire_service(service: YOLOInferenceService) -> None:
+    """Close a replaced service once its in-flight calls are done (runs in a thread)."""
+
+    if not service.drain(settings.YOLO_RELOAD_DRAIN_SECONDS):
+        logger.warning(
+            f"Model {service.model_version} still busy after {settings.YOLO_RELOAD_DRAIN_SECONDS}s, closing anyway"
+        )
+    service.close()
+    logger.info(f"Retired model {service.model_version} ({service.model_path})")
+
+def reload_yolo_service(model_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a model next to the serving one, warm it up, then switch traffic to it.
+
+    The current model keeps serving while the new one loads. The switch is a single
+    reference swap, so every call runs entirely on one model; calls in progress finish
+    on the old model, which is closed in the background once they are done. If the new
+    model fails to load or warm up, the old one stays active.
+
+    Args:
+        model_path: .pt file to load (default: settings.MODEL_PATH or the newest file in models/)
+
+    Returns:
+        {"model_path", "model_version", "previous_version", "load_seconds", "warmup"}
+
+    Raises:
+        ModelReloadInProgress: Another reload is running
+        ModelNotReady: YOLO is disabled (USE_YOLO=false)
+        RuntimeError/FileNotFoundError: The new model could not be loaded
+    """
+
+    global _yolo_service, _state, _state_error, _load_seconds, _last_reload
+    if not settings.USE_YOLO:
+        raise ModelNotReady(STATE_DISABLED)
+    if not _reload_lock.acquire(blocking=False):
+        raise ModelReloadInProgress()
+    try:
+        model_path = model_path or settings.MODEL_PATH or find_default_model_path()
+        logger.info(f"Hot reload: loading {model_path} next to the serving model")
+        started = time.perf_counter()
+        service = YOLOInferenceService(model_path)
+        try:
+            if settings.YOLO_WARMUP_RUNS > 0:
+                service.warmup()
+        except Exception:
+            service.close()
+            raise
+        load_seconds = time.perf_counter() - started
+
+        # The initial background load must not overwrite the reloaded model
+        with _load_lock:
+            with _swap_lock:
+                previous = _yolo_service
+                _yolo_service = service
+            _state, _state_error, _load_seconds = STATE_READY, None, load_seconds
+
+        if previous is not None:
+            threading.Thread(target=_retire_service, args=(previous,), name="yolo-retire", daemon=True).start()
+
+        _last_reload = {
+            "model_path": service.model_path,
+            "model_version": service.model_version,
+            "previous_version": previous.model_version if previous is not None else None,
+            "load_seconds": round(load_seconds, 3),
+            "warmup": service.warmup_timings,
+        }
+        logger.info(
+            f"Hot reload: now serving {service.model_version} "
+            f"(was {_last_reload['previous_version']}), loaded in {load_seconds:.1f}s"
+        )
+        return _last_reload
+    finally:
+        _reload_lock.release()
+
+def yolo_state() -> Dict[str, Any]:
+    """Return the model lifecycle state for /ml/status."""
+
+    return {
+        "state": _state,
+        "error": _state_error,
+        "load_seconds": round(_load_seconds, 3) if _load_seconds is not None else None,
+        "threads": _threads,
+        "reloading": _reload_lock.locked(),
+        "last_reload": _last_reload,
+    }
+
+def shutdown_yolo_service() -> None:
+    """Stop background threads/processes of the global service (used on app shutdown)."""
+
+    global _yolo_service, _state, _state_error
+    if _yolo_service is not None:
+        _yolo_service.close()
+        _yolo_service = None
+    _state, _state_error = STATE_IDLE, None
 
 def initialize_yolo_service() -> bool:
     """
-    Initialize YOLO service at startup.
+    Initialize YOLO service (blocking).
     
     Returns:
         True if initialization successful, False otherwise
     """
 
     try:
-        logger.info("Initializing YOLO service at startup...")
-        service = get_yolo_service()
-        logger.info("YOLO service initialized successfully!")
+        logger.info("Initializing YOLO service...")
+        with _load_lock:
+            if _yolo_service is None:
+                _load_service()
+        logger.info(f"YOLO service initialized successfully in {_load_seconds:.1f}s")
         return True
     except Exception as e:
         logger.error(f"Failed to initialize YOLO service: {e}")
         return False
 
+def start_yolo_warmup() -> None:
+    """
+    Load the model in a background thread, so the server accepts requests immediately.
+
+    Until it finishes, /ml/status reports ``warming`` and inference requests wait
+    (see ensure_yolo_ready).
+    """
+
+    global _state
+    if not settings.USE_YOLO:
+        _state = STATE_DISABLED
+        return
+    if _yolo_service is not None or _state == STATE_WARMING:
+        return
+    _state = STATE_WARMING
+    threading.Thread(target=initialize_yolo_service, name="yolo-warmup", daemon=True).start()
+
+async def ensure_yolo_ready(timeout: Optional[float] = None) -> bool:
+    """
+    Gate for inference endpoints.
+
+    Waits (without blocking the event loop) up to ``timeout`` seconds while the model
+    is warming up.
+
+    Returns:
+        True to run YOLO, False to use the stub (model disabled or failed and
+        ML_STUB_FALLBACK is on)
+
+    Raises:
+        ModelNotReady: Still warming after the timeout, or unavailable without stub fallback
+    """
+
+    timeout = settings.YOLO_WARMUP_WAIT_SECONDS if timeout is None else timeout
+    if _state == STATE_WARMING and timeout > 0:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while _state == STATE_WARMING and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    if _state == STATE_WARMING:
+        raise ModelNotReady(_state, retry_after=_WARMING_RETRY_AFTER)
+    if _state == STATE_READY or (_state == STATE_IDLE and settings.USE_YOLO):
+        return True
+    if settings.ML_STUB_FALLBACK:
+        return False
+    raise ModelNotReady(_state)
+
 def infer_with_yolo(image_b64: str, confidence_threshold: float = 0.5) -> Tuple[List[str], List[Dict[str, Any]]]:
     """
     Convenience function for YOLO inference.
+
+    Concurrent calls are merged into batched model calls by the service's micro-batcher
+    (see YOLO_BATCH_MAX_SIZE / YOLO_BATCH_MAX_WAIT_MS).
     
     Args:
         image_b64: Base64 encoded image
@@ -321,5 +1069,38 @@ def infer_with_yolo(image_b64: str, confidence_threshold: float = 0.5) -> Tuple[
         Tuple of (classes_catalog, detections)
     """
 
-    service = get_yolo_service()
-    return service.infer(image_b64, confidence_threshold)
\ No newline at end of file
+    with _use_service() as service:
+        return service.infer(image_b64, confidence_threshold)
+
+def infer_detailed_with_yolo(
+    image: Union[str, bytes], confidence_threshold: float = 0.5, use_cache: bool = True
+) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Convenience function for YOLO inference that also returns the inference info.
+
+    Args:
+        image: Base64 encoded image or encoded image bytes
+        confidence_threshold: Minimum confidence threshold
+        use_cache: Go through the result cache (see YOLOInferenceService.infer_detailed)
+
+    Returns:
+        Tuple of (classes_catalog, detections, info)
+    """
+
+    with _use_service() as service:
+        return service.infer_detailed(image, confidence_threshold, use_cache)
+
+def infer_bytes_with_yolo(image_bytes: bytes, confidence_threshold: float = 0.5) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Convenience function for YOLO inference on raw image bytes (binary uploads).
+
+    Args:
+        image_bytes: Encoded image file contents
+        confidence_threshold: Minimum confidence threshold
+
+    Returns:
+        Tuple of (classes_catalog, detections)
+    """
+
+    with _use_service() as service:
+        return service.infer_bytes(image_bytes, confidence_threshold)
\ No newline at end of file
@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Float, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import String, Float, Integer, DateTime, Text, JSON, ForeignKey
 from ..core.db import Base
 
 class Session(Base):
@@ -26,15 +26,24 @@ class Session(Base):
     issued_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     returned_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     
-    # Session data snapshots (JSON fields)
-    handout_predict: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
-    handout_final: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
-    handover_predict: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
-    handover_final: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    # Session data snapshots (JSON fields). Deferred: select(Session) loads only the small
+    # columns; queries that read a snapshot undefer() it or await obj.awaitable_attrs.<name>
+    handout_predict: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
+    handout_final: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
+    handover_predict: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
+    handover_final: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
     
-    # Images (base64 encoded)
-    handout_image: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    handover_image: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Images: SHA-256 of the raw bytes in the blob store (core/blobs.py)
+    handout_image_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    handover_image_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    # Derivatives from the ingest pipeline (services/session_images.py)
+    handout_thumb_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    handover_thumb_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    handout_image_width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    handout_image_height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    handover_image_width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    handover_image_height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     
     # Hash for integrity checking
     hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
\ No newline at end of file
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..core.settings import settings
+from ..ml.executor import run_inference, InferenceQueueFull
+from ..ml.yolo_service import ModelNotReady, ensure_yolo_ready, infer_detailed_with_yolo, yolo_state
+
+logger = logging.getLogger(__name__)
+
+
+class FrameError(Exception):
+    """A live frame could not be analysed (undecodable frame or inference failure)."""
+
+
+async def infer_frame(frame: bytes) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run inference on one live camera frame.
+
+    Unlike /predict there is no stub fallback: fake detections would be folded into
+    the presence state of the stream, so every failure is reported to the caller.
+    Frames bypass the result cache: a camera frame practically never repeats, and
+    caching them would only evict the entries of repeated uploads.
+
+    Args:
+        frame: Encoded frame (JPEG/PNG)
+
+    Returns:
+        Tuple of (classes_catalog, detections, inference info)
+
+    Raises:
+        InferenceQueueFull: The inference executor is saturated
+        ModelNotReady: The model is warming up, disabled or failed to load
+        FrameError: The frame did not decode or inference failed
+    """
+
+    if not await ensure_yolo_ready():
+        raise ModelNotReady(yolo_state()["state"])
+    try:
+        return await run_inference(infer_detailed_with_yolo, frame, settings.YOLO_CONFIDENCE_THRESHOLD, use_cache=False)
+    except (InferenceQueueFull, ModelNotReady):
+        raise
+    except Exception as e:
+        logger.warning(f"Live frame inference failed: {e}")
+        raise FrameError(str(e))
+
+
+class LatestFrameSlot:
+    """
+    Single-slot mailbox for camera frames.
+
+    The receiver overwrites the slot with every new frame; the inference loop takes
+    whatever is newest when it is free. Frames that arrive while inference is busy
+    replace each other, so the loop never works through a backlog of stale frames.
+    """
+
+    def __init__(self):
+        self._frame: Optional[bytes] = None
+        self._seq = 0
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame: bytes) -> None:
+        """Store a frame, dropping the previous one if it was not taken yet."""
+
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._seq += 1
+        self.received += 1
+        self._ready.set()
+
+    def close(self) -> None:
+        """Wake the consumer; take() returns None once the slot is empty."""
+
+        self._closed = True
+        self._ready.set()
+
+    async def take(self) -> Optional[Tuple[int, bytes]]:
+        """Wait for the newest frame and return (sequence number, frame), or None when closed."""
+
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return self._seq, frame
+
+
+class PresenceSmoother:
+    """
+    Per-class presence smoothed over frames.
+
+    Each frame scores a class by its best detection confidence (0 if absent). Scores
+    are smoothed with an exponential moving average, and presence switches on above
+    ``on_threshold`` and off below ``off_threshold`` (hysteresis), so one missed
+    or spurious frame does not flip the state.
+    """
+
+    def __init__(self, classes: List[str], alpha: float, on_threshold: float, off_threshold: float):
+        """
+        Args:
+            classes: Catalog classes to track
+            alpha: Weight of the newest frame in the moving average, in (0, 1]
+            on_threshold: Smoothed score at which a class becomes present
+            off_threshold: Smoothed score below which a present class becomes absent
+        """
+
+        self.classes = list(classes)
+        self._index = {c: i for i, c in enumerate(self.classes)}
+        self.alpha = alpha
+        self.on_threshold = on_threshold
+        self.off_threshold = min(off_threshold, on_threshold)
+        self._scores: Optional[np.ndarray] = None
+        self._present = np.zeros(len(self.classes), dtype=bool)
+
+    def update(self, detections: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Fold one frame's detections in and return {class: {"score", "present"}}."""
+
+        frame = np.zeros(len(self.classes))
+        for d in detections:
+            i = self._index.get(d.get("class"))
+            if i is not None:
+                frame[i] = max(frame[i], float(d.get("confidence", 0.0)))
+
+        if self._scores is None:
+            self._scores = frame
+        else:
+            self._scores = self.alpha * frame + (1.0 - self.alpha) * self._scores
+        self._present = np.where(
+            self._present, self._scores >= self.off_threshold, self._scores >= self.on_threshold
+        )
+        return {
+            c: {"score": round(float(self._scores[i]), 4), "present": bool(self._present[i])}
+            for i, c in enumerate(self.classes)
+        }
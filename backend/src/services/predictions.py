@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+
+def build_prediction(
+    classes_catalog: List[str],
+    candidates: List[Dict[str, Any]],
+    threshold: float,
+    inference: Optional[Dict[str, Any]] = None,
+    drop_below_threshold: bool = False,
+) -> Dict[str, Any]:
+    """
+    Turn raw model candidates into a predict payload for a UI threshold.
+
+    Pure function of the stored candidates, so a session can be re-thresholded
+    without running the model again.
+
+    Args:
+        classes_catalog: Expected classes
+        candidates: Raw detections ({"class", "confidence", "box"}) at the base threshold
+        threshold: UI threshold for manual verification
+        inference: How the candidates were produced (stage, passes, cached, model_version)
+        drop_below_threshold: Leave out candidates below the threshold instead of flagging them
+
+    Returns:
+        Dict with threshold, classes_catalog, detections, not_found, summary and inference
+        (the PredictResponse fields)
+    """
+
+    threshold = float(threshold)
+    detections = []
+    for d in candidates:
+        confidence = float(d.get("confidence", 0.0))
+        is_pass = confidence >= threshold
+        if drop_below_threshold and not is_pass:
+            continue
+        detections.append({
+            "detection_id": f"det-{len(detections) + 1:03d}",
+            "class": d.get("class", ""),
+            "confidence": d.get("confidence", 0.0),
+            "is_passed_conf_treshold": is_pass,
+            "box": d.get("box", [0.0, 0.0, 0.0, 0.0]),
+        })
+
+    # Classes with at least one candidate
+    found_classes = {det["class"] for det in detections}
+    not_found = [c for c in classes_catalog if c not in found_classes]
+    passed = sum(1 for d in detections if d["is_passed_conf_treshold"])
+
+    summary = {
+        "expected_total": len(classes_catalog),
+        "found_candidates": len(detections),
+        "passed_above_threshold": passed,
+        "requires_manual_count": int(len(not_found) > 0 or passed < len(detections)),
+        "not_found_count": len(not_found),
+    }
+
+    return {
+        "threshold": threshold,
+        "classes_catalog": classes_catalog,
+        "detections": detections,
+        "not_found": not_found,
+        "summary": summary,
+        "inference": inference,
+    }
+
+
+def stage_status(stage: str, summary: Dict[str, Any]) -> str:
+    """Session status after a prediction for the stage (handout|handover)."""
+
+    return f"{stage}_needs_manual" if summary["requires_manual_count"] > 0 else f"{stage}_auto"
+
+
+def threshold_grid(step: float) -> np.ndarray:
+    """Thresholds 0..1 (inclusive) with the given step, rounded so they compare like typed values."""
+
+    count = int(round(1.0 / step)) + 1
+    return np.round(np.linspace(0.0, 1.0, count), 6)
+
+
+def threshold_curve(
+    classes_catalog: List[str],
+    candidates: List[Dict[str, Any]],
+    thresholds: Sequence[float],
+    drop_below_threshold: bool = False,
+) -> Dict[str, List]:
+    """
+    Summary counts of build_prediction() for many thresholds from one set of candidates.
+
+    Confidences are sorted once; the count of candidates passing each threshold is a
+    binary search (searchsorted), so the whole grid costs O((N + T) log N).
+
+    Args:
+        classes_catalog: Expected classes
+        candidates: Raw detections at the base threshold
+        thresholds: Grid of UI thresholds
+        drop_below_threshold: Same meaning as in build_prediction()
+
+    Returns:
+        Columns {"thresholds", "passed_above_threshold", "not_found_count", "requires_manual_count"}
+    """
+
+    grid = np.asarray(thresholds, dtype=np.float64)
+    confidences = np.sort(np.array([float(d.get("confidence", 0.0)) for d in candidates], dtype=np.float64))
+    # confidence >= t  <=>  index at or after the left insertion point of t
+    passed = len(confidences) - np.searchsorted(confidences, grid, side="left")
+
+    if drop_below_threshold:
+        # Only passing candidates are listed: a class is found when its best candidate passes
+        best: Dict[str, float] = {}
+        for d in candidates:
+            best[d.get("class", "")] = max(best.get(d.get("class", ""), 0.0), float(d.get("confidence", 0.0)))
+        class_best = np.sort(np.array([best[c] for c in classes_catalog if c in best], dtype=np.float64))
+        found = len(class_best) - np.searchsorted(class_best, grid, side="left")
+        not_found = len(classes_catalog) - found
+        requires_manual = not_found > 0
+    else:
+        # Every candidate is listed, so the found classes do not depend on the threshold
+        found_classes = {d.get("class", "") for d in candidates}
+        not_found = np.full(len(grid), sum(1 for c in classes_catalog if c not in found_classes))
+        requires_manual = (not_found > 0) | (passed < len(confidences))
+
+    return {
+        "thresholds": grid.tolist(),
+        "passed_above_threshold": passed.tolist(),
+        "not_found_count": not_found.tolist(),
+        "requires_manual_count": requires_manual.astype(int).tolist(),
+    }
@@ -0,0 +1,355 @@
+from __future__ import annotations
+import asyncio
+import base64
+import io
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Union
+import numpy as np
+from PIL import Image
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+from ..core.blobs import BlobNotFound, BlobStore, get_blob_store
+from ..core.db import get_session_factory
+from ..core.settings import settings
+from ..ml.imaging import _load_cv2, decode_base64_payload, decode_image, image_size, is_jpeg
+from ..models.session import Session as SessionModel
+
+logger = logging.getLogger(__name__)
+
+
+def image_to_bytes(image: Union[str, bytes]) -> bytes:
+    """
+    Raw bytes of a session image as it is stored in the blob store.
+
+    Strings are decoded with the same base64 decoder as inference
+    (``decode_base64_payload``, optionally a data URL).
+
+    Raises:
+        ValueError: The string is not valid base64
+    """
+
+    if isinstance(image, bytes):
+        return image
+    return decode_base64_payload(image)
+
+
+async def store_image(image: Union[str, bytes]) -> str:
+    """Write a session image to the blob store and return its SHA-256."""
+
+    return await run_in_threadpool(get_blob_store().put, image_to_bytes(image))
+
+
+def is_webp(data: bytes) -> bool:
+    return data[:4] == b"RIFF" and data[8:12] == b"WEBP"
+
+
+def image_content_type(data: bytes) -> str:
+    """MIME type sniffed from the first bytes of a stored image."""
+
+    if is_jpeg(data):
+        return "image/jpeg"
+    if is_webp(data):
+        return "image/webp"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "application/octet-stream"
+
+
+def encode_image(image: np.ndarray, fmt: str, quality: int) -> bytes:
+    """Encode a BGR array as JPEG or WebP."""
+
+    cv2 = _load_cv2()
+    if cv2:
+        if fmt == "webp":
+            ok, buf = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+        else:
+            ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+        if ok:
+            return buf.tobytes()
+    out = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(image[:, :, ::-1])).save(
+        out, format="WEBP" if fmt == "webp" else "JPEG", quality=quality
+    )
+    return out.getvalue()
+
+
+def _fit(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale so the long side is at most max_side (never upscales)."""
+
+    h, w = image.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    cv2 = _load_cv2()
+    if cv2:
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    resized = Image.fromarray(np.ascontiguousarray(image[:, :, ::-1])).resize(size, Image.LANCZOS)
+    return np.asarray(resized)[:, :, ::-1]
+
+
+def build_derivatives(data: bytes) -> Dict[str, Any]:
+    """
+    Storage copy and thumbnail of an uploaded photo.
+
+    The photo is capped to IMAGE_STORE_MAX_SIDE and re-encoded as IMAGE_STORE_FORMAT.
+    An original that is already in that format, within the cap and no larger than the
+    re-encoded copy is kept byte for byte.
+
+    Returns:
+        {"image": bytes, "width", "height", "thumbnail": bytes}
+
+    Raises:
+        ValueError: The bytes are not a decodable image
+    """
+
+    fmt = settings.IMAGE_STORE_FORMAT
+    # Large JPEGs are decoded at 1/2..1/8 scale in the DCT domain, then resized to the cap
+    stored = _fit(decode_image(data, settings.IMAGE_STORE_MAX_SIDE), settings.IMAGE_STORE_MAX_SIDE)
+    height, width = stored.shape[:2]
+    encoded = encode_image(stored, fmt, settings.IMAGE_STORE_QUALITY)
+
+    same_format = is_webp(data) if fmt == "webp" else is_jpeg(data)
+    if same_format and len(data) <= len(encoded):
+        try:
+            if image_size(data) == (width, height):
+                encoded = data
+        except Exception:
+            pass
+
+    thumbnail = encode_image(_fit(stored, settings.IMAGE_THUMB_SIDE), fmt, settings.IMAGE_THUMB_QUALITY)
+    return {"image": encoded, "width": width, "height": height, "thumbnail": thumbnail}
+
+
+def _ingest(digest: str) -> Optional[Dict[str, Any]]:
+    store = get_blob_store()
+    try:
+        derived = build_derivatives(store.get(digest))
+    except BlobNotFound:
+        logger.warning(f"Session image blob {digest} is missing, no derivatives built")
+        return None
+    except ValueError as e:
+        logger.warning(f"Session image {digest} is not a decodable image, kept as uploaded: {e}")
+        return None
+    return {
+        "image_sha256": store.put(derived["image"]),
+        "thumb_sha256": store.put(derived["thumbnail"]),
+        "width": derived["width"],
+        "height": derived["height"],
+    }
+
+
+async def process_stage_image(session_id: uuid.UUID, stage: str, original_sha256: str) -> None:
+    """
+    Ingest pipeline for one stage photo, run as a background task after predict.
+
+    Builds the derivatives off the event loop, then points the session at the stored
+    copy, thumbnail and dimensions. The row is only updated if the stage still holds
+    the same original, so a newer predict is never overwritten. The uploaded original
+    is left in the store; once nothing references it, blob garbage collection removes
+    it (collect_unreferenced_blobs).
+    """
+
+    result = await run_in_threadpool(_ingest, original_sha256)
+    if result is None:
+        return
+    image_column = getattr(SessionModel, f"{stage}_image_sha256")
+    async with get_session_factory()() as db:
+        updated = await db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id, image_column == original_sha256)
+            .values({
+                f"{stage}_image_sha256": result["image_sha256"],
+                f"{stage}_thumb_sha256": result["thumb_sha256"],
+                f"{stage}_image_width": result["width"],
+                f"{stage}_image_height": result["height"],
+            })
+        )
+        await db.commit()
+
+    if updated.rowcount:
+        logger.info(f"Session {session_id} {stage} image stored as {result['width']}x{result['height']} with thumbnail")
+
+
+# Columns that reference blobs; a blob none of them points at is garbage
+_BLOB_COLUMNS = (
+    "handout_image_sha256", "handover_image_sha256", "handout_thumb_sha256", "handover_thumb_sha256",
+)
+
+# Digests checked against the sessions table per query
+_GC_BATCH_SIZE = 500
+
+
+async def _referenced(db, digests: List[str]) -> Set[str]:
+    """The digests that some session row still points at."""
+
+    found: Set[str] = set()
+    for column in _BLOB_COLUMNS:
+        column = getattr(SessionModel, column)
+        rows = await db.execute(select(column).where(column.in_(digests)).distinct())
+        found.update(rows.scalars())
+    return found
+
+
+def _delete_if_idle(store: BlobStore, digest: str, cutoff: float) -> bool:
+    """Delete the blob unless a put() renewed it after cutoff."""
+
+    try:
+        if store.modified(digest) > cutoff:
+            return False
+    except BlobNotFound:
+        return False
+    store.delete(digest)
+    return True
+
+
+async def collect_unreferenced_blobs(grace_seconds: Optional[float] = None) -> int:
+    """
+    Delete blobs that no session references and that nobody has written for the grace period.
+
+    Cleanup never runs in the request path: a predict stores its photo (put() refreshes
+    an existing blob's age) and commits the row a moment later, so a blob is only
+    collected after it has been both unreferenced and untouched for ``grace_seconds``.
+    Its age is read again right before the delete, after the reference check.
+
+    Args:
+        grace_seconds: Minimum age of a deleted blob (default: BLOB_GC_GRACE_SECONDS)
+
+    Returns:
+        Number of blobs deleted
+    """
+
+    grace = settings.BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    store = get_blob_store()
+    cutoff = time.time() - grace
+    candidates = await run_in_threadpool(
+        lambda: [digest for digest, modified in store.iter_blobs() if modified <= cutoff]
+    )
+
+    deleted = 0
+    async with get_session_factory()() as db:
+        for start in range(0, len(candidates), _GC_BATCH_SIZE):
+            batch = candidates[start:start + _GC_BATCH_SIZE]
+            referenced = await _referenced(db, batch)
+            for digest in batch:
+                if digest not in referenced and await run_in_threadpool(_delete_if_idle, store, digest, cutoff):
+                    deleted += 1
+    if deleted:
+        logger.info(f"Blob GC deleted {deleted} unreferenced blobs")
+    return deleted
+
+
+async def run_blob_gc() -> None:
+    """Collect unreferenced blobs every BLOB_GC_INTERVAL_SECONDS (app lifespan task)."""
+
+    while True:
+        await asyncio.sleep(settings.BLOB_GC_INTERVAL_SECONDS)
+        try:
+            await collect_unreferenced_blobs()
+        except Exception as e:
+            logger.error(f"Blob GC failed: {e}")
+
+
+def backfill_session_images(connection: Connection, store: BlobStore, batch_size: int = 100) -> int:
+    """
+    Move base64 images from the sessions table into the blob store, in batches.
+
+    Each batch reads ``batch_size`` rows that still hold an image, writes the decoded
+    bytes to the store, records the hashes and clears the base64 columns, so memory
+    use is bounded by one batch and an interrupted run can simply be repeated.
+    Values that are not valid base64 cannot be images: they are dropped, each with a
+    warning, and the total is logged at the end.
+
+    Args:
+        connection: Sync connection (the Alembic migration's)
+        store: Destination blob store
+        batch_size: Rows per batch
+
+    Returns:
+        Number of rows moved
+    """
+
+    moved = 0
+    dropped = []  # ids of sessions whose image was dropped
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, handout_image, handover_image FROM sessions "
+                "WHERE handout_image IS NOT NULL OR handover_image IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"limit": batch_size},
+        ).all()
+        if not rows:
+            break
+        def put(row_id, image: Optional[str]) -> Optional[str]:
+            if image is None:
+                return None
+            try:
+                return store.put(image_to_bytes(image))
+            except ValueError as e:
+                logger.warning(f"Session {row_id} image is not valid base64, dropped: {e}")
+                dropped.append(row_id)
+                return None
+
+        updates = [
+            {"id": row.id, "handout": put(row.id, row.handout_image), "handover": put(row.id, row.handover_image)}
+            for row in rows
+        ]
+        connection.execute(
+            text(
+                "UPDATE sessions SET "
+                "handout_image_sha256 = COALESCE(:handout, handout_image_sha256), "
+                "handover_image_sha256 = COALESCE(:handover, handover_image_sha256), "
+                "handout_image = NULL, handover_image = NULL "
+                "WHERE id = :id"
+            ),
+            updates,
+        )
+        moved += len(rows)
+        logger.info(f"Moved images of {moved} sessions to the blob store")
+    if dropped:
+        logger.warning(
+            f"Dropped {len(dropped)} session images that were not valid base64 "
+            f"(sessions {', '.join(str(row_id) for row_id in dropped)})"
+        )
+    return moved
+
+
+def restore_session_images(connection: Connection, store: BlobStore, batch_size: int = 100) -> int:
+    """Reverse of backfill_session_images(): copy blobs back into the base64 columns."""
+
+    restored = 0
+    last_id = None
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, handout_image_sha256, handover_image_sha256 FROM sessions "
+                "WHERE (handout_image_sha256 IS NOT NULL OR handover_image_sha256 IS NOT NULL)"
+                + (" AND id > :last_id" if last_id is not None else "")
+                + " ORDER BY id LIMIT :limit"
+            ),
+            {"limit": batch_size, "last_id": last_id},
+        ).all()
+        if not rows:
+            break
+
+        def b64(digest: Optional[str]) -> Optional[str]:
+            if digest is None:
+                return None
+            try:
+                return base64.b64encode(store.get(digest)).decode("ascii")
+            except BlobNotFound:
+                logger.warning(f"Session image blob {digest} is missing, leaving the image empty")
+                return None
+
+        connection.execute(
+            text("UPDATE sessions SET handout_image = :handout, handover_image = :handover WHERE id = :id"),
+            [{"id": row.id, "handout": b64(row.handout_image_sha256), "handover": b64(row.handover_image_sha256)} for row in rows],
+        )
+        restored += len(rows)
+        last_id = rows[-1].id
+    return restored
@@ -7,6 +7,16 @@ from src.app import app
 # Configure pytest-asyncio to use function scope for event loop
 pytest_asyncio.fixture_scope = "function"
 
+@pytest.fixture(scope="session", autouse=True)
+def blob_store(tmp_path_factory):
+    """Keep session images written by tests in a temporary blob store."""
+
+    from src.core import blobs
+
+    blobs._blob_store = blobs.LocalBlobStore(str(tmp_path_factory.mktemp("blobs")))
+    yield blobs._blob_store
+    blobs._blob_store = None
+
 @pytest_asyncio.fixture(scope="function")
 async def client():
     """Basic async HTTP client for testing."""
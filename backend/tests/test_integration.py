@@ -1,3 +1,4 @@
+import base64
 import pytest
 from httpx import AsyncClient, ASGITransport
 from src.app import app
@@ -43,7 +44,7 @@ async def test_complete_workflow():
         r = await client.post(f"/sessions/{session_id}/handout/predict",
                             headers=headers,
                             json={
-                                "image": "base64_workflow_test",
+                                "image": base64.b64encode(b"workflow test").decode(),
                                 "threshold": 0.95
                             })
         assert r.status_code == 200
@@ -78,7 +79,7 @@ async def test_complete_workflow():
         r = await client.post(f"/sessions/{session_id}/handover/predict",
                             headers=headers,
                             json={
-                                "image": "base64_handover_test",
+                                "image": base64.b64encode(b"handover test").decode(),
                                 "threshold": 0.95
                             })
         assert r.status_code == 200
@@ -301,7 +302,7 @@ async def test_concurrent_operations():
             # Run prediction
             await client.post(f"/sessions/{session_id}/handout/predict",
                             headers=headers,
-                            json={"image": f"test_{session_id}", "threshold": 0.95})
+                            json={"image": base64.b64encode(f"test_{session_id}".encode()).decode(), "threshold": 0.95})
             
             # Adjust annotations
             classes = [
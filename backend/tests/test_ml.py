@@ -0,0 +1,952 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import pytest
+from src.ml.batching import MicroBatcher
+from src.ml.executor import InferenceExecutor, InferenceQueueFull
+from src.ml.process_pool import ProcessInferenceEngine
+from src.ml.yolo_service import load_class_mapping
+from src.core.settings import settings
+
+MODELS_DIR = Path(__file__).parent.parent / "models"
+
+
+class _FakeWorkerService:
+    """Stand-in for YOLOInferenceService inside pool workers."""
+
+    class model:
+        names = {0: "fake"}
+
+    def _infer_batch(self, items):
+        out = []
+        for image, conf in items:
+            if conf == -2.0:
+                threading.Timer(0.5, os._exit, (1,)).start()  # answer, then die
+            elif conf < 0:
+                os._exit(1)  # simulate a hard crash (segfault, OOM kill)
+            out.append([{"class": "fake", "confidence": conf, "box": [float(image.sum()), *image.shape[:2], 0.0]}])
+        return out
+
+
+def _fake_worker_factory(model_path):
+    return _FakeWorkerService()
+
+
+def _flaky_worker_factory(model_path):
+    """Worker factory whose loading is steered by the environment inherited at spawn."""
+
+    mode = os.environ.get("FAKE_WORKER_LOAD")
+    if mode == "slow":
+        time.sleep(60)
+    elif mode == "fail":
+        raise RuntimeError("model file is corrupt")
+    return _FakeWorkerService()
+
+
+class _ThreadReportingService(_FakeWorkerService):
+    """Reports the thread counts the worker process ended up with."""
+
+    def _infer_batch(self, items):
+        import cv2
+        try:
+            import torch
+            torch_threads = torch.get_num_threads()
+        except ImportError:
+            torch_threads = None
+        return [[{"cv2_threads": cv2.getNumThreads(), "torch_threads": torch_threads}] for _ in items]
+
+
+def _thread_reporting_worker_factory(model_path):
+    """Applies the worker thread limits like the default factory, without loading a model."""
+
+    from src.ml.process_pool import configure_worker_threads
+
+    configure_worker_threads()
+    return _ThreadReportingService()
+
+
+def test_micro_batcher_groups_concurrent_items():
+    """Concurrent submissions are merged into one batch and each caller gets its own result."""
+
+    seen_batches = []
+    release = threading.Event()
+
+    def process(items):
+        release.wait(1.0)
+        seen_batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        release.set()
+        assert [f.result(timeout=2) for f in futures] == [0, 10, 20, 30]
+        assert seen_batches == [[0, 1, 2, 3]]
+        stats = batcher.stats()
+        assert stats["batches"] == 1
+        assert stats["items"] == 4
+    finally:
+        batcher.close()
+
+
+def test_micro_batcher_respects_size_cap():
+    """Batches never exceed max_batch_size."""
+
+    sizes = []
+    gate = threading.Event()
+
+    def process(items):
+        gate.wait(1.0)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(i) for i in range(5)]
+        gate.set()
+        assert [f.result(timeout=2) for f in futures] == [0, 1, 2, 3, 4]
+        assert max(sizes) <= 2
+        assert sum(sizes) == 5
+    finally:
+        batcher.close()
+
+
+def test_micro_batcher_propagates_errors():
+    """A failing batch fails every caller in it."""
+
+    def process(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=1)
+    try:
+        future = batcher.submit(1)
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
+    finally:
+        batcher.close()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(2)
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_rejects_when_queue_full():
+    """Calls beyond concurrency + queue are rejected instead of queued."""
+
+    executor = InferenceExecutor(max_concurrency=1, max_queue=1)
+    gate = threading.Event()
+    try:
+        running = asyncio.ensure_future(executor.run(gate.wait, 2))
+        waiting = asyncio.ensure_future(executor.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+
+        stats = executor.stats()
+        assert stats["running"] == 1
+        assert stats["queue_depth"] == 1
+
+        with pytest.raises(InferenceQueueFull) as exc_info:
+            await executor.run(lambda: None)
+        assert exc_info.value.retry_after >= 1
+
+        gate.set()
+        assert await running is True
+        assert await waiting == "done"
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["queue_depth"] == 0
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+def test_process_pool_shared_memory_and_restart():
+    """Workers read images from shared memory and are restarted after a crash."""
+
+    engine = ProcessInferenceEngine("unused.pt", num_workers=2, factory=_fake_worker_factory, start_timeout=60)
+    try:
+        assert engine.names == {0: "fake"}
+
+        image = np.full((4, 6, 3), 2, dtype=np.uint8)
+        detections = engine.submit(image, 0.5).result(timeout=30)
+        assert detections == [{"class": "fake", "confidence": 0.5, "box": [144.0, 4, 6, 0.0]}]
+
+        # A poison image crashes every worker it reaches and is failed after a retry
+        with pytest.raises(RuntimeError):
+            engine.submit(image, -1.0).result(timeout=60)
+        assert engine.stats()["restarts"] >= 1
+
+        # The pool keeps serving after restarting workers
+        results = engine.infer_batch([(image, 0.1), (image, 0.2)])
+        assert [r[0]["confidence"] for r in results] == [0.1, 0.2]
+    finally:
+        engine.close()
+
+
+def _wait_for(predicate, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.05)
+
+
+def test_process_pool_restarts_worker_that_dies_while_loading(monkeypatch):
+    """A respawned worker killed before _READY fails its tasks, is restarted, and is given up after repeated failures."""
+
+    import src.ml.process_pool as process_pool
+
+    monkeypatch.setattr(process_pool, "_RESTART_BACKOFF", 0.1)
+    monkeypatch.delenv("FAKE_WORKER_LOAD", raising=False)
+    engine = ProcessInferenceEngine("unused.pt", num_workers=1, factory=_flaky_worker_factory, start_timeout=60)
+    try:
+        image = np.full((4, 6, 3), 2, dtype=np.uint8)
+
+        # Crash the ready worker; the replacement hangs while loading and takes the retried task
+        monkeypatch.setenv("FAKE_WORKER_LOAD", "slow")
+        poison = engine.submit(image, -1.0)
+        _wait_for(lambda: engine.stats()["restarts"] == 1)
+        engine._workers[0].kill()
+
+        # The retried task is failed instead of hanging on the dead replacement
+        with pytest.raises(RuntimeError):
+            poison.result(timeout=30)
+
+        # The slot comes back after the backoff and serves again
+        monkeypatch.setenv("FAKE_WORKER_LOAD", "ok")
+        _wait_for(lambda: engine.stats()["ready"] == 1)
+        assert engine.submit(image, 0.5).result(timeout=30)[0]["confidence"] == 0.5
+
+        # A worker that cannot load the model any more is given up after a few attempts
+        monkeypatch.setenv("FAKE_WORKER_LOAD", "fail")
+        with pytest.raises(RuntimeError):
+            engine.submit(image, -1.0).result(timeout=30)
+        _wait_for(lambda: engine.stats()["failed_workers"] == [0])
+        stats = engine.stats()
+        assert stats["alive"] == 0 and stats["restarting"] == []
+        with pytest.raises(RuntimeError):
+            engine.submit(image, 0.5)
+    finally:
+        engine.close()
+
+
+def test_process_pool_uses_results_sent_before_a_worker_died():
+    """An answer still queued when its worker's death is noticed resolves the task instead of a retry."""
+
+    import queue
+
+    engine = ProcessInferenceEngine("unused.pt", num_workers=1, factory=_fake_worker_factory, start_timeout=60)
+    results_get = engine._results.get
+    held, reading = threading.Event(), threading.Event()
+
+    def held_back_get(block=True, timeout=None):
+        # The supervisor's blocking reads see nothing, so the death is noticed before the answer
+        if block and not reading.is_set():
+            held.set()
+            time.sleep(timeout or 0)
+            raise queue.Empty
+        return results_get(block, timeout)
+
+    engine._results.get = held_back_get
+    try:
+        assert held.wait(5)
+        image = np.full((4, 6, 3), 2, dtype=np.uint8)
+        future = engine.submit(image, -2.0)
+        _wait_for(lambda: engine.stats()["restarts"] == 1)
+        assert future.result(timeout=1)[0]["confidence"] == -2.0
+        _wait_for(lambda: engine.stats()["in_flight"] == 0)
+
+        reading.set()
+        _wait_for(lambda: engine.stats()["ready"] == 1)
+        assert engine.submit(image, 0.5).result(timeout=30)[0]["confidence"] == 0.5
+        assert engine.stats()["restarts"] == 1
+    finally:
+        engine.close()
+
+
+def test_backend_artifact_cache_is_keyed_by_model_hash(tmp_path):
+    """Exported artifacts are created once per model hash and reused afterwards."""
+
+    from src.ml.backends import InferenceBackend, create_backend
+
+    exports = []
+
+    class FakeExportBackend(InferenceBackend):
+        name = "fake"
+        export_format = "onnx"
+
+        def _export(self, artifact):
+            exports.append(artifact)
+            artifact.parent.mkdir(parents=True, exist_ok=True)
+            artifact.write_bytes(b"exported")
+
+        def _load(self):
+            return object()
+
+    model_a = tmp_path / "a.pt"
+    model_a.write_bytes(b"weights-a")
+    cache = tmp_path / "cache"
+
+    first = FakeExportBackend(str(model_a), cache_dir=cache)
+    second = FakeExportBackend(str(model_a), cache_dir=cache)
+    assert len(exports) == 1
+    assert first.artifact_path == second.artifact_path
+    assert first.model_sha256[:16] in first.artifact_path
+
+    # New weights under the same file name get a new artifact
+    model_a.write_bytes(b"weights-b")
+    third = FakeExportBackend(str(model_a), cache_dir=cache)
+    assert len(exports) == 2
+    assert third.artifact_path != first.artifact_path
+
+    with pytest.raises(ValueError):
+        create_backend("tensorrt", str(model_a), cache_dir=cache)
+
+
+class _FakeNamesModel:
+    names = {0: "1_screw_driver_minus", 1: "4_brace", 2: "mystery_tool"}
+
+
+class _FakeNamesBackend:
+    """Injected backend: the fake model's names, no weights or runtime."""
+
+    model_sha256 = "test-model"
+    input_size = 640
+
+    def __init__(self):
+        self.model = _FakeNamesModel()
+
+
+def _bare_service():
+    """YOLOInferenceService built around a fake backend, without loading a model."""
+
+    from src.ml.yolo_service import YOLOInferenceService
+
+    return YOLOInferenceService(str(MODELS_DIR / "model.pt"), backend=_FakeNamesBackend(), batching=False)
+
+
+def test_postprocess_is_vectorized_and_filters():
+    """Boxes are normalized, thresholded and unknown classes dropped in one pass."""
+
+    service = _bare_service()
+    xyxy = np.array([
+        [0, 0, 100, 50],     # kept
+        [10, 10, 30, 30],    # below threshold
+        [50, 25, 150, 75],   # unknown class
+        [100, 50, 200, 100], # kept
+    ], dtype=np.float32)
+    conf = np.array([0.9, 0.2, 0.95, 0.5], dtype=np.float32)
+    cls = np.array([0, 1, 2, 1])
+
+    detections = service._postprocess(xyxy, conf, cls, 200, 100, 0.3)
+    assert [d["class"] for d in detections] == ["screwdriver_minus", "brace"]
+    assert detections[0]["box"] == pytest.approx([0.25, 0.25, 0.5, 0.5])
+    assert detections[1]["box"] == pytest.approx([0.75, 0.75, 0.5, 0.5])
+    assert all(isinstance(d["confidence"], float) for d in detections)
+
+    assert service._postprocess(xyxy[:0], conf[:0], cls[:0], 200, 100, 0.3) == []
+
+
+def test_class_mapping_file_and_lookup_table(tmp_path):
+    """The mapping is read from the versioned file next to the model and resolved once."""
+
+    version, mapping = load_class_mapping(str(MODELS_DIR / "model.pt"))
+    assert version is not None
+    assert set(mapping.values()) <= set(settings.CLASSES)
+
+    # A model-specific file wins over the shared one
+    (tmp_path / "custom.classes.json").write_text('{"version": "x1", "mapping": {"a": "brace"}}')
+    assert load_class_mapping(str(tmp_path / "custom.pt")) == ("x1", {"a": "brace"})
+    assert load_class_mapping(str(tmp_path / "other.pt")) == (None, {})
+
+    service = _bare_service()
+    names, known = service._class_name_table(np.array([0, 1, 2, 7, -1]))
+    assert known.tolist() == [True, True, False, False, False]
+    assert names[known].tolist() == ["screwdriver_minus", "brace"]
+
+
+def test_decode_image_reduces_large_jpeg_in_dct_domain():
+    """Large JPEGs are decoded at a reduced scale that still covers the model input size."""
+
+    import cv2
+    from src.ml.imaging import decode_image, decode_base64_payload, reduction_factor
+
+    board = np.zeros((3000, 4000, 3), dtype=np.uint8)
+    board[:, :, 2] = 255  # pure red in BGR
+    ok, jpeg = cv2.imencode(".jpg", board)
+    assert ok
+
+    image = decode_image(jpeg.tobytes(), target_size=640)
+    assert image.shape == (750, 1000, 3)
+    assert image[375, 500, 2] > 200 and image[375, 500, 0] < 50  # still BGR
+
+    assert decode_image(jpeg.tobytes()).shape == (3000, 4000, 3)
+    assert reduction_factor(4000, 3000, 640) == 4
+    assert reduction_factor(800, 600, 640) == 1
+
+    ok, png = cv2.imencode(".png", board[:100, :200])
+    assert decode_image(png.tobytes(), target_size=640).shape == (100, 200, 3)
+
+    import base64
+    payload = "data:image/png;base64," + base64.b64encode(png.tobytes()).decode()
+    assert decode_base64_payload(payload) == png.tobytes()
+
+    with pytest.raises(ValueError):
+        decode_image(b"not an image", target_size=640)
+
+
+def test_result_cache_lru_ttl_and_disk_tier(tmp_path, monkeypatch):
+    """Entries are evicted by size and age, and the disk tier survives a new instance."""
+
+    from src.ml import result_cache
+    from src.ml.result_cache import InferenceResultCache, image_digest
+
+    detections = [{"class": "brace", "confidence": 0.9, "box": [0.5, 0.5, 0.1, 0.1]}]
+    cache = InferenceResultCache(max_bytes=100, ttl_seconds=60)
+    key_a = cache.make_key(image_digest(b"a"), 0.25, "v1")
+    key_b = cache.make_key(image_digest(b"b"), 0.25, "v1")
+    assert key_a != cache.make_key(image_digest(b"a"), 0.25, "v2")
+    assert key_a != cache.make_key(image_digest(b"a"), 0.5, "v1")
+
+    assert cache.get(key_a) is None
+    cache.put(key_a, detections)
+    hit = cache.get(key_a)
+    assert hit == detections
+    hit[0]["class"] = "mutated"
+    assert cache.get(key_a) == detections  # hits are independent copies
+
+    cache.put(key_b, detections)  # two entries exceed 100 bytes: the older one goes
+    assert cache.get(key_a) is None
+    assert cache.get(key_b) == detections
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 2
+    assert stats["bytes"] <= 100
+
+    now = time.time()
+    monkeypatch.setattr(result_cache.time, "time", lambda: now + 120)
+    assert cache.get(key_b) is None  # expired
+    monkeypatch.undo()
+
+    disk = tmp_path / "results"
+    InferenceResultCache(max_bytes=1 << 20, ttl_seconds=60, disk_dir=str(disk)).put(key_a, detections)
+    restarted = InferenceResultCache(max_bytes=1 << 20, ttl_seconds=60, disk_dir=str(disk))
+    assert restarted.get(key_a) == detections
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get(key_a) == detections
+    assert restarted.stats()["hits"] == 1  # promoted to memory
+
+    # Promotion keeps the on-disk age: the entry still expires 60 s after it was written
+    later = InferenceResultCache(max_bytes=1 << 20, ttl_seconds=60, disk_dir=str(disk))
+    monkeypatch.setattr(result_cache.time, "time", lambda: now + 50)
+    assert later.get(key_a) == detections
+    monkeypatch.setattr(result_cache.time, "time", lambda: now + 70)
+    assert later.get(key_a) is None
+    monkeypatch.undo()
+
+
+def test_result_cache_disk_tier_is_bounded(tmp_path):
+    """Writes past disk_max_bytes remove the oldest disk entries."""
+
+    from src.ml.result_cache import InferenceResultCache, image_digest
+
+    detections = [{"class": "brace", "confidence": 0.9, "box": [0.5, 0.5, 0.1, 0.1]}]
+    entry_size = len(json.dumps(detections, separators=(",", ":")))
+    cache = InferenceResultCache(
+        max_bytes=1 << 20, ttl_seconds=0, disk_dir=str(tmp_path), disk_max_bytes=entry_size * 5
+    )
+    keys = [cache.make_key(image_digest(bytes([i])), 0.25, "v1") for i in range(8)]
+    for age, key in enumerate(keys):
+        cache.put(key, detections)
+        written = time.time() - 1000 + age
+        os.utime(cache._disk_path(key), (written, written))
+
+    on_disk = {path.stem for path in tmp_path.glob("*/*.json")}
+    assert len(on_disk) <= 5
+    assert keys[-1] in on_disk and keys[0] not in on_disk
+    assert cache.stats()["disk_bytes"] <= entry_size * 5
+
+
+def test_infer_bytes_uses_result_cache(monkeypatch):
+    """Repeated images skip decode and inference; each caller's threshold is applied on top."""
+
+    import cv2
+    from src.ml import yolo_service
+    from src.ml.result_cache import InferenceResultCache
+
+    cache = InferenceResultCache(max_bytes=1 << 20, ttl_seconds=60)
+    monkeypatch.setattr(yolo_service, "get_result_cache", lambda: cache)
+
+    service = _bare_service()
+    calls = []
+
+    def run_image(image, conf):
+        calls.append(conf)
+        return [
+            {"class": "brace", "confidence": 0.95, "box": [0.5, 0.5, 0.1, 0.1]},
+            {"class": "pliers", "confidence": 0.4, "box": [0.2, 0.2, 0.1, 0.1]},
+        ], {"stage": "full", "passes": ["full"]}
+
+    service._run_image = run_image
+    ok, png = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))
+    image_bytes = png.tobytes()
+
+    _, strict, info = service.infer_detailed(image_bytes, 0.9)
+    _, loose = service.infer_bytes(image_bytes, 0.3)
+    assert info == {"stage": "full", "passes": ["full"], "cached": False, "model_version": "test-model"}
+    assert [d["class"] for d in strict] == ["brace"]
+    assert [d["class"] for d in loose] == ["brace", "pliers"]
+    assert calls == [min(0.9, settings.YOLO_CONFIDENCE_THRESHOLD)]
+    assert cache.stats()["hits"] == 1
+
+    # A different model version does not reuse the entry
+    service.model_version = "other-model"
+    service.infer_bytes(image_bytes, 0.9)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_live_frames_bypass_result_cache(monkeypatch):
+    """Live camera frames are inferred without reading or filling the result cache."""
+
+    import cv2
+    from src.ml import yolo_service
+    from src.ml.result_cache import InferenceResultCache
+    from src.services import live as live_service
+
+    cache = InferenceResultCache(max_bytes=1 << 20, ttl_seconds=60)
+    monkeypatch.setattr(yolo_service, "get_result_cache", lambda: cache)
+    service = _bare_service()
+    calls = []
+
+    def run_image(image, conf):
+        calls.append(conf)
+        return [{"class": "brace", "confidence": 0.95, "box": [0.5, 0.5, 0.1, 0.1]}], {"stage": "full", "passes": ["full"]}
+
+    service._run_image = run_image
+    monkeypatch.setattr(yolo_service, "_yolo_service", service)
+
+    async def ready():
+        return True
+
+    monkeypatch.setattr(live_service, "ensure_yolo_ready", ready)
+    upload = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+    service.infer_bytes(upload, 0.5)
+    before = cache.stats()
+
+    frame = cv2.imencode(".jpg", np.full((8, 8, 3), 128, dtype=np.uint8))[1].tobytes()
+    for _ in range(2):
+        _, detections, info = await live_service.infer_frame(frame)
+        assert [d["class"] for d in detections] == ["brace"] and info["cached"] is False
+    assert len(calls) == 3
+    assert cache.stats() == before
+
+    # The same image as an upload still goes through the cache
+    service.infer_bytes(upload, 0.5)
+    assert cache.stats()["hits"] == before["hits"] + 1
+
+
+def test_app_import_defers_heavy_ml_modules():
+    """Importing the app does not import OpenCV / ultralytics / torch; the warm-up does."""
+
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, src.app; "
+        "print(sorted(m for m in ('cv2', 'ultralytics', 'torch') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_warmup_runs_each_size_and_shape():
+    """Warm-up covers every configured size in landscape/portrait/square and the batch shape."""
+
+    from types import SimpleNamespace
+
+    calls = []
+
+    class FakeBackend:
+        input_size = 640
+
+        def predict(self, images, conf, imgsz):
+            calls.append((len(images), imgsz, images[0].shape[:2]))
+            return []
+
+    service = _bare_service()
+    service.backend = FakeBackend()
+    service._batcher = SimpleNamespace(max_batch_size=4)
+
+    timings = service.warmup(sizes=[320, 640], runs=2)
+    assert service.warmup_timings is timings
+    assert len(timings["shapes"]) == 8  # 2 sizes x (3 aspects + 1 batched)
+    assert len(calls) == 16
+    assert (1, 320, (240, 320)) in calls and (1, 640, (640, 480)) in calls
+    assert (4, 640, (640, 640)) in calls
+    assert all(s["first_ms"] >= 0 and s["last_ms"] >= 0 for s in timings["shapes"])
+
+
+def test_thread_tuner_profile_is_saved_and_applied(tmp_path, monkeypatch):
+    """The tuner ranks combinations by throughput and p99, and the saved profile feeds the settings."""
+
+    from src.ml.threads import apply_thread_profile, save_thread_profile, load_thread_profile
+    from src.ml.tune import tune, synthetic_tool_board
+
+    board = synthetic_tool_board(np.random.default_rng(1))
+    assert board.shape == (750, 1000, 3) and board.dtype == np.uint8
+
+    profile = tune("unused.pt", [1, 4], [1, 2], duration=0.3, cpu_count=2, factory=_fake_worker_factory)
+    assert {(r["workers"], r["threads"]) for r in profile["results"]} == {(1, 1), (1, 2)}  # 4 workers oversubscribe
+    assert profile["throughput"]["throughput"] == max(r["throughput"] for r in profile["results"])
+    assert profile["latency"]["p99_ms"] == min(r["p99_ms"] for r in profile["results"])
+    assert all(r["images"] > 0 for r in profile["results"])
+
+    path = save_thread_profile(
+        {"throughput": {"workers": 3, "threads": 2}, "latency": {"workers": 1, "threads": 4}},
+        tmp_path / "profile.json",
+    )
+    assert load_thread_profile(path)["latency"]["threads"] == 4
+
+    monkeypatch.setattr(settings, "THREAD_PROFILE_TARGET", "latency")
+    monkeypatch.setattr(settings, "YOLO_NUM_WORKERS", 0)
+    monkeypatch.setattr(settings, "INFERENCE_THREADS", None)
+    assert apply_thread_profile(path) == {"workers": 1, "threads": 4}
+    assert (settings.YOLO_NUM_WORKERS, settings.INFERENCE_THREADS) == (1, 4)
+    assert apply_thread_profile(tmp_path / "missing.json") is None
+
+
+def test_tuner_thread_count_reaches_the_worker(monkeypatch):
+    """The tuned thread count wins over INFERENCE_THREADS from the environment inside the worker."""
+
+    import functools
+    from src.ml.process_pool import ProcessInferenceEngine
+    from src.ml.tune import _tuning_worker_factory
+
+    # What the worker's settings would load from the inherited environment / .env
+    monkeypatch.setenv("INFERENCE_THREADS", "3")
+    engine = ProcessInferenceEngine(
+        "unused.pt",
+        num_workers=1,
+        max_batch_size=1,
+        factory=functools.partial(_tuning_worker_factory, threads=2, factory=_thread_reporting_worker_factory),
+    )
+    try:
+        [report] = engine.submit(np.zeros((4, 4, 3), dtype=np.uint8), 0.5).result(timeout=60)
+    finally:
+        engine.close()
+    assert report["cv2_threads"] == 2
+    if report["torch_threads"] is not None:  # torch is an optional dependency
+        assert report["torch_threads"] == 2
+
+
+def test_tile_grid_and_cross_tile_nms():
+    """Tiles cover the image edge to edge, and duplicates from overlapping tiles are merged."""
+
+    from src.ml.tiling import nms_per_class, tile_grid
+
+    tiles = tile_grid(4000, 3000, 1280, 0.2)
+    assert tiles[0] == (0, 0, 1280, 1280)
+    assert max(t[2] for t in tiles) == 4000 and max(t[3] for t in tiles) == 3000
+    assert all(t[2] - t[0] == 1280 and t[3] - t[1] == 1280 for t in tiles)
+    assert len(tiles) == 4 * 3
+    assert tile_grid(500, 400, 1280, 0.2) == [(0, 0, 500, 400)]
+
+    xyxy = np.array([
+        [100, 100, 300, 200],   # full tool
+        [100, 100, 180, 200],   # same tool cut by a tile edge
+        [105, 98, 302, 201],    # same tool from the neighbouring tile, lower score
+        [100, 100, 300, 200],   # other class at the same place
+        [900, 900, 1000, 1000], # separate tool
+    ], dtype=np.float64)
+    conf = np.array([0.9, 0.95, 0.6, 0.5, 0.7])
+    cls = np.array([0, 0, 0, 1, 0])
+    keep = nms_per_class(xyxy, conf, cls, 0.6)
+    assert keep.tolist() == [1, 4, 3]
+    assert nms_per_class(xyxy[:0], conf[:0], cls[:0], 0.6).tolist() == []
+
+
+class _FakeBoxes:
+    def __init__(self, data):
+        self.data = self
+        self._data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+    def __len__(self):
+        return len(self._data)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._data
+
+
+def test_tiled_inference_merges_tiles_into_full_image_boxes(monkeypatch):
+    """Tile detections are shifted to image coordinates, merged, and normalized to the full image."""
+
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(settings, "YOLO_TILED", True)
+    monkeypatch.setattr(settings, "YOLO_TILE_SIZE", 100)
+    monkeypatch.setattr(settings, "YOLO_TILE_OVERLAP", 0.5)
+    monkeypatch.setattr(settings, "YOLO_TILE_FULL_FRAME", True)
+    monkeypatch.setattr(settings, "YOLO_TILE_BATCH_SIZE", 2)
+
+    calls = []
+    input_sizes = []
+
+    class FakeBackend:
+        input_size = 640
+
+        def predict(self, images, conf, **kwargs):
+            calls.append(len(images))
+            input_sizes.extend([kwargs.get("imgsz")] * len(images))
+            out = []
+            for image in images:
+                rows = []
+                if image.shape[:2] == (100, 100) and image[0, 0, 0] == 1:
+                    # The tool at image (60..90, 10..40) as seen from the tile starting at x=50
+                    rows.append([10, 10, 40, 40, 0.9, 0])
+                if image.shape[:2] == (100, 100) and image[0, 0, 0] == 0:
+                    rows.append([60, 10, 90, 40, 0.8, 0])  # same tool from the tile at x=0
+                out.append(SimpleNamespace(boxes=_FakeBoxes(rows), orig_shape=image.shape[:2]))
+            return out
+
+    service = _bare_service()
+    service.backend = FakeBackend()
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    image[:, :, 0] = np.arange(200) // 50  # lets the fake model tell tiles apart (x0 // 50)
+
+    ((detections, info),) = service._infer_batch([(image, 0.5)])
+    assert info.pop("timings").keys() == {"model", "postprocess"}
+    assert info == {"stage": "tiled", "passes": ["tiled"]}
+    assert sum(calls) == 3 + 1  # 3 tiles + full frame
+    assert max(calls) <= 2
+    assert len(detections) == 1
+    assert detections[0]["class"] == "screwdriver_minus"
+    assert detections[0]["confidence"] == pytest.approx(0.9)
+    assert detections[0]["box"] == pytest.approx([0.375, 0.25, 0.15, 0.3])
+    # Tiles run with the input size set to the tile size (not downscaled); the full frame at the default
+    assert input_sizes == [100, 100, 100, None]
+
+    # Without YOLO_TILE_SIZE, tiles are as large as the model input
+    monkeypatch.setattr(settings, "YOLO_TILE_SIZE", None)
+    service.backend.input_size = 100
+    input_sizes.clear()
+    ((detections, _),) = service._infer_batch([(image, 0.5)])
+    assert input_sizes == [100, 100, 100, None]
+    assert len(detections) == 1
+
+
+def test_cascade_runs_fine_pass_only_for_incomplete_kits(monkeypatch):
+    """Complete kits are answered by the coarse pass; the rest go through the full pass together."""
+
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(settings, "YOLO_CASCADE", True)
+    monkeypatch.setattr(settings, "YOLO_CASCADE_IMGSZ", 320)
+    monkeypatch.setattr(settings, "YOLO_CASCADE_ACCEPT_CONF", 0.8)
+    monkeypatch.setattr(settings, "YOLO_TILED", False)
+
+    service = _bare_service()
+    service.model = SimpleNamespace(names={i: name for i, name in enumerate(settings.CLASSES)})
+    service._build_class_lut({})
+    calls = []
+
+    class FakeBackend:
+        input_size = 640
+
+        def predict(self, images, conf, imgsz=640):
+            calls.append((imgsz, len(images)))
+            out = []
+            for image in images:
+                complete = image[0, 0, 0] == 1
+                score = 0.9 if complete or imgsz == 640 else 0.5
+                rows = [[10, 10, 20, 20, score, class_id] for class_id in range(len(settings.CLASSES))]
+                out.append(SimpleNamespace(boxes=_FakeBoxes(rows), orig_shape=image.shape[:2]))
+            return out
+
+    service.backend = FakeBackend()
+    complete = np.ones((40, 40, 3), dtype=np.uint8)
+    uncertain = np.zeros((40, 40, 3), dtype=np.uint8)
+
+    outputs = service._infer_batch([(complete, 0.25), (uncertain, 0.25), (uncertain, 0.25)])
+    assert calls == [(320, 3), (640, 2)]
+    assert [info["stage"] for _, info in outputs] == ["coarse", "full", "full"]
+    assert outputs[1][1]["passes"] == ["coarse", "full"]
+    assert all(len(detections) == len(settings.CLASSES) for detections, _ in outputs)
+    assert outputs[1][0][0]["confidence"] == pytest.approx(0.9)
+
+
+def test_hot_reload_switches_model_after_inflight_calls_finish(monkeypatch):
+    """A reload swaps the serving model; a call already running finishes on the old one."""
+
+    from src.ml import yolo_service
+
+    def fake_service(version, model_path="model.pt"):
+        service = _bare_service()
+        service.model_version = version
+        service.model_path = model_path
+        service.warmup_timings = None
+        service.closed = threading.Event()
+        service.close = service.closed.set
+        service.infer_detailed = lambda image, conf, use_cache=True: (settings.CLASSES, [], {"model_version": version})
+        return service
+
+    old, new = fake_service("old"), fake_service("new", "new.pt")
+    started, release = threading.Event(), threading.Event()
+
+    def slow_infer(image, conf, use_cache=True):
+        started.set()
+        release.wait(5)
+        return settings.CLASSES, [], {"model_version": "old"}
+
+    old.infer_detailed = slow_infer
+    monkeypatch.setattr(settings, "USE_YOLO", True)
+    monkeypatch.setattr(settings, "YOLO_WARMUP_RUNS", 0)
+    monkeypatch.setattr(yolo_service, "_yolo_service", old)
+    monkeypatch.setattr(yolo_service, "_state", yolo_service.STATE_READY)
+    monkeypatch.setattr(yolo_service, "_last_reload", None)
+    monkeypatch.setattr(yolo_service, "YOLOInferenceService", lambda path: new)
+
+    inflight = {}
+    caller = threading.Thread(
+        target=lambda: inflight.update(result=yolo_service.infer_detailed_with_yolo(b"img", 0.5))
+    )
+    caller.start()
+    assert started.wait(5)
+
+    result = yolo_service.reload_yolo_service("new.pt")
+    assert result["model_version"] == "new"
+    assert result["previous_version"] == "old"
+    assert yolo_service.yolo_state()["last_reload"]["model_path"] == "new.pt"
+
+    # New calls go to the new model while the old one is still draining
+    assert yolo_service.infer_detailed_with_yolo(b"img", 0.5)[2]["model_version"] == "new"
+    assert not old.closed.wait(0.2)
+
+    release.set()
+    caller.join(5)
+    assert inflight["result"][2]["model_version"] == "old"
+    assert old.closed.wait(5)
+
+    # One reload at a time
+    with yolo_service._reload_lock:
+        with pytest.raises(yolo_service.ModelReloadInProgress):
+            yolo_service.reload_yolo_service("other.pt")
+
+
+@pytest.mark.asyncio
+async def test_model_admin_endpoints_require_admin(client, admin_user_token, simple_user_token):
+    """/ml/models and /ml/reload are admin-only; unknown model names are rejected."""
+
+    for token, expected in ((simple_user_token, 403), (admin_user_token, 200)):
+        r = await client.get("/ml/models", headers={"authorization": f"Bearer {token}"})
+        assert r.status_code == expected
+    assert isinstance(r.json()["models"], list)
+
+    r = await client.post("/ml/reload", json={"model": "x.pt"}, headers={"authorization": f"Bearer {simple_user_token}"})
+    assert r.status_code == 403
+    for name in ("missing.pt", "../secrets.pt", "class_mapping.json"):
+        r = await client.post("/ml/reload", json={"model": name}, headers={"authorization": f"Bearer {admin_user_token}"})
+        assert r.status_code == 404
+
+
+def test_benchmark_suite_times_every_stage_and_flags_regressions():
+    """The stand-in benchmark runs without weights; slow stages beyond the budget are reported."""
+
+    from benchmarks.stages import STAGES, compare, run_suite
+
+    results = run_suite(["vga"], repeats=1)
+    assert list(results["vga"]) == list(STAGES)
+    assert all(t["median_ms"] > 0 for t in results["vga"].values())
+
+    baseline = {"vga": {stage: {"median_ms": 10.0} for stage in STAGES}}
+    current = {"vga": {stage: {"median_ms": 10.0} for stage in STAGES}}
+    current["vga"]["forward"]["median_ms"] = 12.0
+    assert compare(current, baseline, tolerance=0.3) == []
+    current["vga"]["forward"]["median_ms"] = 14.0
+    regressions = compare(current, baseline, tolerance=0.3)
+    assert len(regressions) == 1 and regressions[0].startswith("vga/forward")
+
+    # A sub-millisecond stage doubling by timer noise is not a regression
+    baseline["vga"]["postprocess"]["median_ms"] = 0.15
+    current["vga"]["postprocess"]["median_ms"] = 0.3
+    assert len(compare(current, baseline, tolerance=0.3)) == 1
+    assert len(compare(current, baseline, tolerance=0.3, min_delta_ms=0.1)) == 2
+
+
+def test_sampling_profiler_collapses_inference_thread_stacks():
+    """Busy inference threads are sampled, idle ones skipped; both output formats agree."""
+
+    from src.core.profiler import SamplingProfiler
+
+    stop = threading.Event()
+
+    def busy_forward():
+        while not stop.is_set():
+            sum(i * i for i in range(1000))
+
+    busy = threading.Thread(target=busy_forward, name="inference_0")
+    idle = threading.Thread(target=stop.wait, name="inference_1")
+    other = threading.Thread(target=busy_forward, name="unrelated")
+    for t in (busy, idle, other):
+        t.start()
+    profiler = SamplingProfiler(interval=0.002, max_requests=3)
+    try:
+        profiler.start()
+        time.sleep(0.2)
+        for _ in range(3):
+            profiler.request_finished()
+        assert profiler.done.is_set()
+    finally:
+        profiler.stop()
+        stop.set()
+        for t in (busy, idle, other):
+            t.join()
+
+    lines = profiler.collapsed().splitlines()
+    assert profiler.samples > 0 and lines
+    assert all(line.startswith("inference_0;") for line in lines)
+    assert any("busy_forward" in line for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profiler.stacks.values())
+
+    doc = profiler.speedscope()
+    (profile,) = doc["profiles"]
+    assert profile["name"] == "inference_0" and profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"]) == len(lines)
+    assert all(0 <= i < len(doc["shared"]["frames"]) for s in profile["samples"] for i in s)
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_is_admin_only_and_stops_after_requests(client, admin_user_token, simple_user_token):
+    """POST /ml/profile captures until N requests finished and returns speedscope JSON."""
+
+    r = await client.post("/ml/profile?seconds=1", headers={"authorization": f"Bearer {simple_user_token}"})
+    assert r.status_code == 403
+
+    async def traffic():
+        await asyncio.sleep(0.05)
+        for _ in range(2):
+            await client.get("/healthz")
+
+    started = time.perf_counter()
+    r, _ = await asyncio.gather(
+        client.post(
+            "/ml/profile?seconds=30&requests=2&format=speedscope&interval_ms=2",
+            headers={"authorization": f"Bearer {admin_user_token}"},
+        ),
+        traffic(),
+    )
+    assert r.status_code == 200
+    assert time.perf_counter() - started < 10
+    assert r.headers["x-profile-requests"] == "2"
+    doc = r.json()
+    assert doc["$schema"].startswith("https://www.speedscope.app") and "profiles" in doc
+
+    r = await client.post("/ml/profile?seconds=100000", headers={"authorization": f"Bearer {admin_user_token}"})
+    assert r.status_code == 422
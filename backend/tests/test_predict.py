@@ -1,7 +1,11 @@
+import base64
 import pytest
 from httpx import AsyncClient, ASGITransport
 from src.app import app
 
+# JSON predict takes base64; in stub mode the bytes need not decode as an image
+TEST_IMAGE = base64.b64encode(b"test image").decode()
+
 @pytest.mark.asyncio
 async def test_healthz():
     """Test health check endpoint."""
@@ -16,7 +20,7 @@ async def test_predict_contract():
     """Test predict endpoint contract and response format."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
-        body = {"image": "base64-abc", "threshold": 0.98}
+        body = {"image": TEST_IMAGE, "threshold": 0.98}
         r = await client.post("/predict", json=body)
         assert r.status_code == 200
         data = r.json()
@@ -35,6 +39,9 @@ async def test_predict_contract():
         assert "summary" in data
         assert isinstance(data["summary"], dict)
 
+        # Which inference pass produced the answer
+        assert data["inference"]["stage"] in {"coarse", "full", "tiled", "stub"}
+
         # Each detection corresponds to the contract
         for det in data["detections"]:
             assert {"detection_id", "class", "confidence", "is_passed_conf_treshold", "box"} <= det.keys()
@@ -96,4 +103,318 @@ async def test_predict_adjust_validation_fails_on_duplicates():
 
         # Текст ошибок может отличаться — ищем ключевые слова
         issues_text = " ".join(body.get("issues", [])).lower()
-        assert any(kw in issues_text for kw in ["duplicate", "duplicates", "missing", "exactly once"])
\ No newline at end of file
+        assert any(kw in issues_text for kw in ["duplicate", "duplicates", "missing", "exactly once"])
+
+@pytest.mark.asyncio
+async def test_predict_returns_503_when_inference_queue_full(monkeypatch):
+    """Test that /predict sheds load with 503 + Retry-After when the inference queue is full."""
+    import asyncio
+    import threading
+    from src.ml import executor as executor_module
+    from src.ml import yolo_service
+
+    # Route the request to the YOLO path even if an earlier test marked the model as failed
+    monkeypatch.setattr(yolo_service, "_state", yolo_service.STATE_IDLE)
+    small = executor_module.InferenceExecutor(max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(executor_module, "_inference_executor", small)
+    gate = threading.Event()
+    blocker = asyncio.ensure_future(small.run(gate.wait, 2))
+    await asyncio.sleep(0.05)
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.98})
+            assert r.status_code == 503
+            assert int(r.headers["retry-after"]) >= 1
+
+            # Other routes keep working
+            r = await client.get("/healthz")
+            assert r.status_code == 200
+    finally:
+        gate.set()
+        await blocker
+        small.shutdown()
+
+@pytest.mark.asyncio
+async def test_predict_rejects_invalid_base64():
+    """An image that is not valid base64 is a 422, never a stub prediction."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/predict", json={"image": "base64-abc", "threshold": 0.98})
+        assert r.status_code == 422
+        assert "Invalid base64" in r.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_predict_upload_accepts_binary_bodies():
+    """Test /predict/upload with multipart and raw image bodies."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(
+            "/predict/upload",
+            files={"image": ("photo.jpg", b"\xff\xd8\xff-jpeg-bytes", "image/jpeg")},
+            data={"threshold": "0.5"},
+        )
+        assert r.status_code == 200
+        data = r.json()
+        assert data["threshold"] == 0.5
+        assert len(data["classes_catalog"]) == 11
+        assert data["summary"]["found_candidates"] == len(data["detections"])
+
+        r = await client.post(
+            "/predict/upload?threshold=0.7",
+            content=b"\xff\xd8\xff-jpeg-bytes",
+            headers={"content-type": "image/jpeg"},
+        )
+        assert r.status_code == 200
+        assert r.json()["threshold"] == 0.7
+
+@pytest.mark.asyncio
+async def test_predict_upload_rejects_bad_bodies(monkeypatch):
+    """Test /predict/upload content type, size and threshold validation."""
+    from src.core.settings import settings
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/predict/upload", content=b"abc", headers={"content-type": "text/plain"})
+        assert r.status_code == 415
+
+        r = await client.post("/predict/upload", content=b"", headers={"content-type": "image/jpeg"})
+        assert r.status_code == 422
+
+        r = await client.post(
+            "/predict/upload?threshold=2", content=b"abc", headers={"content-type": "image/png"}
+        )
+        assert r.status_code == 422
+
+        r = await client.post("/predict/upload", data={"threshold": "0.5"}, files={"other": ("a", b"x")})
+        assert r.status_code == 422
+
+        monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_BYTES", 4)
+        r = await client.post("/predict/upload", content=b"12345", headers={"content-type": "image/jpeg"})
+        assert r.status_code == 413
+        r = await client.post("/predict/upload", files={"image": ("a.jpg", b"12345", "image/jpeg")})
+        assert r.status_code == 413
+
+@pytest.mark.asyncio
+async def test_form_upload_limit_holds_without_declared_size(monkeypatch):
+    """A multipart file without a known size is read only up to the limit, then rejected with 413."""
+    import io
+    from fastapi import HTTPException
+    from starlette.datastructures import FormData, UploadFile
+    from src.api import uploads
+    from src.core.settings import settings
+
+    class File(io.BytesIO):
+        read_bytes = 0
+
+        def read(self, size=-1):
+            chunk = super().read(size)
+            self.read_bytes += len(chunk)
+            return chunk
+
+    class FormRequest:
+        def __init__(self, data):
+            self.file = File(data)
+
+        async def form(self, max_files, max_fields):
+            return FormData([("image", UploadFile(self.file, size=None)), ("threshold", "0.5")])
+
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_BYTES", 4)
+    assert await uploads._read_form_file(FormRequest(b"1234")) == (b"1234", "0.5")
+
+    request = FormRequest(b"12345678")
+    with pytest.raises(HTTPException) as excinfo:
+        await uploads._read_form_file(request)
+    assert excinfo.value.status_code == 413
+    assert request.file.read_bytes == 5  # limit + 1, not the whole file
+
+@pytest.mark.asyncio
+async def test_predict_waits_for_model_warmup(monkeypatch):
+    """Test that inference is rejected with 503 while the model is still warming up."""
+    from src.core.settings import settings
+    from src.ml import yolo_service
+
+    monkeypatch.setattr(yolo_service, "_state", yolo_service.STATE_WARMING)
+    monkeypatch.setattr(settings, "YOLO_WARMUP_WAIT_SECONDS", 0.1)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.get("/ml/status")
+        assert r.status_code == 200
+        assert r.json()["status"] == "warming"
+
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.98})
+        assert r.status_code == 503
+        assert r.json()["state"] == "warming"
+        assert int(r.headers["retry-after"]) >= 1
+
+        # A failed model only serves stub results when the fallback is enabled
+        monkeypatch.setattr(yolo_service, "_state", yolo_service.STATE_FAILED)
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.98})
+        assert r.status_code == 200
+
+        monkeypatch.setattr(settings, "ML_STUB_FALLBACK", False)
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.98})
+        assert r.status_code == 503
+        assert r.json()["state"] == "failed"
+
+def test_threshold_curve_matches_per_threshold_summaries():
+    """The vectorized curve equals build_prediction() at every grid threshold, in both modes."""
+    from src.core.settings import settings
+    from src.services.predictions import build_prediction, threshold_curve, threshold_grid
+
+    candidates = [
+        {"class": "brace", "confidence": 0.99, "box": [0.5, 0.5, 0.1, 0.1]},
+        {"class": "brace", "confidence": 0.3, "box": [0.1, 0.1, 0.1, 0.1]},
+        {"class": "pliers", "confidence": 0.6, "box": [0.2, 0.2, 0.1, 0.1]},
+        {"class": "nippers", "confidence": 0.5, "box": [0.3, 0.3, 0.1, 0.1]},
+    ]
+    grid = threshold_grid(0.05)
+    assert len(grid) == 21 and grid[0] == 0.0 and grid[-1] == 1.0
+
+    for drop in (False, True):
+        curve = threshold_curve(settings.CLASSES, candidates, grid, drop_below_threshold=drop)
+        for i, t in enumerate(curve["thresholds"]):
+            summary = build_prediction(settings.CLASSES, candidates, t, drop_below_threshold=drop)["summary"]
+            assert curve["passed_above_threshold"][i] == summary["passed_above_threshold"]
+            assert curve["not_found_count"][i] == summary["not_found_count"]
+            assert curve["requires_manual_count"][i] == summary["requires_manual_count"]
+
+@pytest.mark.asyncio
+async def test_predict_returns_threshold_curve_on_request():
+    """curve_step adds the threshold curve to /predict and /predict/upload; it is absent by default."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.9})
+        assert r.status_code == 200
+        assert r.json()["threshold_curve"] is None
+
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.9, "curve_step": 0.1})
+        assert r.status_code == 200
+        data = r.json()
+        curve = data["threshold_curve"]
+        assert len(curve["thresholds"]) == 11
+        i = curve["thresholds"].index(0.9)
+        assert curve["passed_above_threshold"][i] == data["summary"]["passed_above_threshold"]
+        assert curve["requires_manual_count"][i] == data["summary"]["requires_manual_count"]
+
+        r = await client.post(
+            "/predict/upload?threshold=0.9&curve_step=0.25",
+            content=b"\xff\xd8\xff-jpeg-bytes",
+            headers={"content-type": "image/jpeg"},
+        )
+        assert r.status_code == 200
+        assert r.json()["threshold_curve"]["thresholds"] == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "curve_step": 0})
+        assert r.status_code == 422
+
+def test_live_websocket_runs_newest_frame_and_smooths_presence(monkeypatch):
+    """Frames arriving during inference are dropped; presence is smoothed across frames."""
+    import asyncio
+    from starlette.testclient import TestClient
+    from src.api.routers import live as live_router
+    from src.core.settings import settings
+
+    from src.services.live import FrameError
+
+    async def fake_infer(image):
+        await asyncio.sleep(0.3 if image == b"frame-1" else 0)
+        if image == b"frame-corrupt":
+            raise FrameError("cannot decode image")
+        detections = [] if image == b"frame-empty" else [
+            {"class": "brace", "confidence": 0.99, "box": [0.5, 0.5, 0.1, 0.1]}
+        ]
+        return settings.CLASSES, detections, {"stage": "full", "passes": ["full"]}
+
+    monkeypatch.setattr(live_router, "infer_frame", fake_infer)
+    monkeypatch.setattr(settings, "LIVE_PRESENCE_ALPHA", 0.5)
+
+    # Not used as a context manager: the lifespan (model warm-up) is not needed here
+    client = TestClient(app)
+    with client.websocket_connect("/live?threshold=0.9") as ws:
+        for i in range(1, 6):
+            ws.send_bytes(f"frame-{i}".encode())
+        first = ws.receive_json()
+        assert first["frame"] == 1
+        assert first["detections"][0]["class"] == "brace"
+        assert first["presence"]["brace"] == {"score": 0.99, "present": True}
+
+        # Frames 2-4 arrived while frame 1 was running: only the newest is processed
+        newest = ws.receive_json()
+        assert newest["frame"] == 5
+        assert newest["dropped"] == 3
+
+        # One empty frame lowers the smoothed score but keeps the class present
+        ws.send_bytes(b"frame-empty")
+        msg = ws.receive_json()
+        assert msg["detections"] == []
+        assert msg["presence"]["brace"]["present"] is True
+        assert msg["presence"]["brace"]["score"] < 0.99
+        score = msg["presence"]["brace"]["score"]
+
+        # A corrupt frame is reported and leaves the presence state untouched
+        ws.send_bytes(b"frame-corrupt")
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["frame"] == 7
+        ws.send_bytes(b"frame-empty")
+        assert ws.receive_json()["presence"]["brace"]["score"] == round(score * 0.5, 4)
+
+        ws.send_text('{"threshold": 2}')
+        assert ws.receive_json()["type"] == "error"
+
+@pytest.mark.asyncio
+async def test_live_frame_inference_has_no_stub_fallback(monkeypatch):
+    """Live frames surface decode/inference failures and a missing model instead of stub detections."""
+    from src.ml import yolo_service
+    from src.services import live as live_service
+
+    def broken_model(image, conf, use_cache=True):
+        raise RuntimeError("cannot decode image")
+
+    async def ready():
+        return True
+
+    monkeypatch.setattr(live_service, "ensure_yolo_ready", ready)
+    monkeypatch.setattr(live_service, "infer_detailed_with_yolo", broken_model)
+    with pytest.raises(live_service.FrameError):
+        await live_service.infer_frame(b"not-a-jpeg")
+
+    async def stub_only():
+        return False
+
+    monkeypatch.setattr(live_service, "ensure_yolo_ready", stub_only)
+    with pytest.raises(yolo_service.ModelNotReady):
+        await live_service.infer_frame(b"\xff\xd8\xff")
+
+@pytest.mark.asyncio
+async def test_predict_reports_server_timing_and_histograms(monkeypatch):
+    """Stage timings reach the Server-Timing header (also from executor threads) and /metrics."""
+    from src.api.routers import predict as predict_router
+    from src.core.settings import settings
+    from src.core.timing import histograms, record
+    from src.ml.executor import run_inference
+
+    def fake_model(image, conf):
+        record("model", 12.5)  # runs in an inference executor thread
+        return settings.CLASSES, [], {"stage": "full", "passes": ["full"]}
+
+    async def fake_infer(image):
+        return await run_inference(fake_model, image, conf=0.25)
+
+    monkeypatch.setattr(predict_router, "_infer_with_fallback", fake_infer)
+    histograms.clear()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post("/predict", json={"image": TEST_IMAGE, "threshold": 0.9})
+        assert r.status_code == 200
+        timing = r.headers["server-timing"]
+        assert "model;dur=12.5" in timing
+        for stage in ("base64", "queue", "response", "total"):
+            assert f"{stage};dur=" in timing
+
+        r = await client.get("/metrics")
+        assert r.status_code == 200
+        assert 'http_stage_duration_ms_count{route="/predict",stage="model"} 1' in r.text
+        assert 'http_stage_duration_ms_bucket{route="/predict",stage="model",le="25"} 1' in r.text
+        assert 'http_stage_duration_ms_bucket{route="/predict",stage="model",le="10"} 0' in r.text
@@ -1,3 +1,4 @@
+import base64
 import pytest
 from httpx import AsyncClient, ASGITransport
 from src.app import app
@@ -167,7 +168,7 @@ async def test_rate_limiting_simulation():
         
         for i in range(10):
             r = await client.post("/predict", json={
-                "image": f"base64_test_{i}",
+                "image": base64.b64encode(f"test image {i}".encode()).decode(),
                 "threshold": 0.95
             })
             responses.append(r.status_code)
@@ -1,3 +1,4 @@
+import base64
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -8,6 +9,9 @@ ADMIN_EMP = "ADMIN_TEST"
 ADMIN_PWD = "admin123"
 SIMPLE_EMP = "SIMPLE_TEST"
 SIMPLE_PWD = "simple123"
+# Session photos are sent as base64; the bytes need not decode as an image
+TEST_IMAGE = base64.b64encode(b"handout test image").decode()
+HANDOVER_IMAGE = base64.b64encode(b"handover test image").decode()
 
 @pytest_asyncio.fixture
 async def admin_client():
@@ -82,7 +86,7 @@ async def test_handout_predict_flow(admin_client):
     
     # Test handout predict
     r = await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     
@@ -93,6 +97,117 @@ async def test_handout_predict_flow(admin_client):
     assert "not_found" in data
     assert "summary" in data
 
+@pytest.mark.asyncio
+async def test_handout_predict_decodes_base64_like_inference(admin_client):
+    """Line-wrapped base64 is stored decoded; a string that is not base64 is rejected."""
+
+    from src.core.blobs import blob_digest
+
+    r = await admin_client.post("/sessions/handout", json={"threshold": 0.95})
+    session_id = r.json()["session_id"]
+    photo = b"\xff\xd8\xff" + bytes(range(256)) * 2
+    r = await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
+        "image": base64.encodebytes(photo).decode(),
+        "threshold": 0.95
+    })
+    assert r.status_code == 200
+    r = await admin_client.get(f"/sessions/{session_id}")
+    assert r.json()["handout"]["image_sha256"] == blob_digest(photo)
+
+    r = await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
+        "image": "not base64!",
+        "threshold": 0.95
+    })
+    assert r.status_code == 422
+
+@pytest.mark.asyncio
+async def test_handout_predict_upload_flow(admin_client):
+    """Test binary handout predict; the image is kept in the session."""
+
+    r = await admin_client.post("/sessions/handout", json={
+        "threshold": 0.95,
+        "notes": "Test session"
+    })
+    session_id = r.json()["session_id"]
+    
+    image_bytes = b"\xff\xd8\xff-jpeg-bytes"
+    r = await admin_client.post(
+        f"/sessions/{session_id}/handout/predict/upload",
+        files={"image": ("photo.jpg", image_bytes, "image/jpeg")},
+        data={"threshold": "0.9"},
+    )
+    
+    assert r.status_code == 200
+    data = r.json()
+    assert data["threshold"] == 0.9
+    assert "detections" in data
+    assert "summary" in data
+    
+    r = await admin_client.get(f"/sessions/{session_id}")
+    assert r.status_code == 200
+    assert r.json()["handout"]["image_url"] == f"/sessions/{session_id}/images/handout"
+    r_image = await admin_client.get(r.json()["handout"]["image_url"])
+    assert r_image.content == image_bytes and r_image.headers["content-type"] == "image/jpeg"
+
+    # The row keeps only the hash; the raw bytes are in the blob store
+    from src.core.blobs import blob_digest, get_blob_store
+    assert r.json()["handout"]["image_sha256"] == blob_digest(image_bytes)
+    assert get_blob_store().get(blob_digest(image_bytes)) == image_bytes
+    
+    # Handover upload is not allowed before the session is issued
+    r = await admin_client.post(
+        f"/sessions/{session_id}/handover/predict/upload",
+        content=image_bytes,
+        headers={"content-type": "image/jpeg"},
+    )
+    assert r.status_code == 400
+
+@pytest.mark.asyncio
+async def test_handout_rethreshold_reuses_stored_candidates(admin_client, monkeypatch):
+    """Predict runs the model once at the base threshold; re-thresholding needs no inference."""
+
+    from src.api.routers import sessions as sessions_router
+    from src.core.settings import settings
+
+    calls = []
+
+    async def fake_infer(image, threshold):
+        calls.append(threshold)
+        return settings.CLASSES, [
+            {"class": "brace", "confidence": 0.99, "box": [0.5, 0.5, 0.1, 0.1]},
+            {"class": "pliers", "confidence": 0.6, "box": [0.2, 0.2, 0.1, 0.1]},
+        ], {"stage": "full", "passes": ["full"]}
+
+    monkeypatch.setattr(sessions_router, "_infer_with_fallback", fake_infer)
+
+    r = await admin_client.post("/sessions/handout", json={"threshold": 0.95})
+    session_id = r.json()["session_id"]
+    r = await admin_client.post(f"/sessions/{session_id}/handout/predict", json={"image": TEST_IMAGE, "threshold": 0.95})
+    assert r.status_code == 200
+    assert calls == [settings.YOLO_CONFIDENCE_THRESHOLD]
+    for stage in ("auth", "db_load", "db_commit", "total"):
+        assert f"{stage};dur=" in r.headers["server-timing"]
+    assert [d["class"] for d in r.json()["detections"]] == ["brace"]
+    assert "pliers" in r.json()["not_found"]
+
+    r = await admin_client.post(f"/sessions/{session_id}/handout/threshold", json={"threshold": 0.5})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["threshold"] == 0.5
+    assert [d["class"] for d in data["detections"]] == ["brace", "pliers"]
+    assert data["summary"]["not_found_count"] == len(settings.CLASSES) - 2
+    assert len(calls) == 1
+
+    r = await admin_client.get(f"/sessions/{session_id}")
+    assert r.json()["handout"]["predict"]["threshold"] == 0.5
+    assert r.json()["status"] == "handout_needs_manual"
+
+    # Below the stored candidates, and for a stage that has not been predicted
+    r = await admin_client.post(f"/sessions/{session_id}/handout/threshold", json={"threshold": 0.01})
+    assert r.status_code == 422
+    r = await admin_client.post(f"/sessions/{session_id}/handover/threshold", json={"threshold": 0.5})
+    assert r.status_code == 400
+
 @pytest.mark.asyncio
 async def test_handout_adjust_flow(admin_client):
     """Test handout adjust flow."""
@@ -105,7 +220,7 @@ async def test_handout_adjust_flow(admin_client):
     session_id = r.json()["session_id"]
     
     await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     
@@ -142,7 +257,7 @@ async def test_issue_session(admin_client):
     session_id = r.json()["session_id"]
     
     await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     
@@ -183,7 +298,7 @@ async def test_handover_flow(admin_client):
     
     # Complete handout phase
     await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     
@@ -205,7 +320,7 @@ async def test_handover_flow(admin_client):
     
     # Test handover predict
     r = await admin_client.post(f"/sessions/{session_id}/handover/predict", json={
-        "image": "base64_handover_image",
+        "image": HANDOVER_IMAGE,
         "threshold": 0.95
     })
     
@@ -248,7 +363,7 @@ async def test_session_diff(admin_client):
     
     # Handout phase
     await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image", "threshold": 0.95
+        "image": TEST_IMAGE, "threshold": 0.95
     })
     await admin_client.post(f"/sessions/{session_id}/handout/adjust", json={
         "annotations": annotations
@@ -257,7 +372,7 @@ async def test_session_diff(admin_client):
     
     # Handover phase
     await admin_client.post(f"/sessions/{session_id}/handover/predict", json={
-        "image": "base64_handover_image", "threshold": 0.95
+        "image": HANDOVER_IMAGE, "threshold": 0.95
     })
     await admin_client.post(f"/sessions/{session_id}/handover/adjust", json={
         "annotations": annotations
@@ -298,14 +413,14 @@ async def test_finalize_session(admin_client):
     
     # Complete handout and handover
     await admin_client.post(f"/sessions/{session_id}/handout/predict", json={
-        "image": "base64_test_image", "threshold": 0.95
+        "image": TEST_IMAGE, "threshold": 0.95
     })
     await admin_client.post(f"/sessions/{session_id}/handout/adjust", json={
         "annotations": annotations
     })
     await admin_client.post(f"/sessions/{session_id}/issue", json={"confirm": True})
     await admin_client.post(f"/sessions/{session_id}/handover/predict", json={
-        "image": "base64_handover_image", "threshold": 0.95
+        "image": HANDOVER_IMAGE, "threshold": 0.95
     })
     await admin_client.post(f"/sessions/{session_id}/handover/adjust", json={
         "annotations": annotations
@@ -392,7 +507,7 @@ async def test_session_access_denied(admin_client, simple_client):
     
     # Simple user should not be able to access admin's session for operations
     r = await simple_client.post(f"/sessions/{admin_session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     assert r.status_code == 404  # Session not found for simple user
@@ -409,10 +524,408 @@ async def test_invalid_session_operations(admin_client):
     fake_session_id = "00000000-0000-0000-0000-000000000000"
     
     r = await admin_client.post(f"/sessions/{fake_session_id}/handout/predict", json={
-        "image": "base64_test_image",
+        "image": TEST_IMAGE,
         "threshold": 0.95
     })
     assert r.status_code == 404
     
     r = await admin_client.get(f"/sessions/{fake_session_id}")
-    assert r.status_code == 404
\ No newline at end of file
+    assert r.status_code == 404
+
+class _FakeS3Error(Exception):
+    def __init__(self, code):
+        self.response = {"Error": {"Code": code}}
+
+
+class _FakeS3Client:
+    """In-memory stand-in for a boto3 S3 client (the calls S3BlobStore makes)."""
+
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+        self.puts = 0
+
+    def _stamp(self, Bucket, Key):
+        import datetime
+        self.modified[(Bucket, Key)] = datetime.datetime.now(datetime.timezone.utc)
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts += 1
+        self.objects[(Bucket, Key)] = bytes(Body)
+        self._stamp(Bucket, Key)
+
+    def copy_object(self, Bucket, Key, CopySource, MetadataDirective="COPY"):
+        source = (CopySource["Bucket"], CopySource["Key"])
+        if source not in self.objects:
+            raise _FakeS3Error("NoSuchKey")
+        self.objects[(Bucket, Key)] = self.objects[source]
+        self._stamp(Bucket, Key)
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _FakeS3Error("404")
+        return {"ContentLength": len(self.objects[(Bucket, Key)]), "LastModified": self.modified[(Bucket, Key)]}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def get_object(self, Bucket, Key, Range=None):
+        import io
+        if (Bucket, Key) not in self.objects:
+            raise _FakeS3Error("NoSuchKey")
+        data = self.objects[(Bucket, Key)]
+        if Range:
+            first, last = Range[len("bytes="):].split("-")
+            data = data[int(first):int(last) + 1 if last else None]
+        return {"Body": io.BytesIO(data)}
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix=""):
+                contents = [
+                    {"Key": key, "LastModified": client.modified[(bucket, key)]}
+                    for bucket, key in client.objects if bucket == Bucket and key.startswith(Prefix)
+                ]
+                yield {"Contents": contents[:1]}
+                yield {"Contents": contents[1:]}
+
+        return Paginator()
+
+
+@pytest.mark.parametrize("backend", ["local", "s3"])
+def test_blob_store_is_content_addressed(backend, tmp_path):
+    """Blobs are keyed by SHA-256, stored once, and missing hashes raise BlobNotFound."""
+
+    import hashlib
+    import time
+    from src.core.blobs import BlobNotFound, LocalBlobStore, S3BlobStore
+
+    client = _FakeS3Client()
+    store = LocalBlobStore(str(tmp_path)) if backend == "local" else S3BlobStore("bucket", "images", client=client)
+    data = b"\xff\xd8\xff" + bytes(range(256)) * 10
+    digest = store.put(data)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert store.put(data) == digest
+    assert store.exists(digest) and store.get(digest) == data
+    assert store.size(digest) == len(data)
+    assert b"".join(store.iter_range(digest)) == data
+    assert b"".join(store.iter_range(digest, 10, 1000)) == data[10:1001]
+
+    # Storing existing bytes again renews the blob's age instead of rewriting it
+    first_written = store.modified(digest)
+    time.sleep(0.01)
+    store.put(data)
+    assert store.modified(digest) > first_written
+    other = store.put(b"other blob")
+    assert sorted(d for d, _ in store.iter_blobs()) == sorted([digest, other])
+
+    missing = hashlib.sha256(b"other").hexdigest()
+    assert not store.exists(missing)
+    with pytest.raises(BlobNotFound):
+        store.get(missing)
+    with pytest.raises(BlobNotFound):
+        store.size(missing)
+    with pytest.raises(BlobNotFound):
+        store.modified(missing)
+    with pytest.raises(ValueError):
+        store.get("../../etc/passwd")
+
+    if backend == "local":
+        assert (tmp_path / digest[:2] / digest[2:4] / digest).read_bytes() == data
+    else:
+        assert client.puts == 2  # data once, then the other blob
+        assert ("bucket", f"images/{digest[:2]}/{digest[2:4]}/{digest}") in client.objects
+
+    store.delete(digest)
+    store.delete(digest)
+    assert not store.exists(digest)
+
+
+def test_incomplete_blob_store_fails_on_instantiation():
+    """A backend missing part of the BlobStore interface cannot be created."""
+
+    from src.core.blobs import BlobStore
+
+    class ReadOnlyStore(BlobStore):
+        def get(self, digest):
+            return b""
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore()
+
+
+def test_backfill_moves_base64_images_to_blob_store(tmp_path, caplog):
+    """The 0004 backfill decodes base64 columns into blobs batch by batch, and can be reversed."""
+
+    import base64
+    import hashlib
+    import logging
+    from sqlalchemy import create_engine, text
+    from src.core.blobs import LocalBlobStore
+    from src.services.session_images import backfill_session_images, restore_session_images
+
+    engine = create_engine("sqlite://")
+    store = LocalBlobStore(str(tmp_path))
+    jpeg = b"\xff\xd8\xff-photo"
+    rows = [
+        {"id": f"s{i}", "handout": base64.b64encode(jpeg + bytes([i])).decode(), "handover": None}
+        for i in range(5)
+    ]
+    rows.append({"id": "s5", "handout": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode(), "handover": "not base64!"})
+    rows.append({"id": "s6", "handout": None, "handover": None})
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE sessions (id TEXT PRIMARY KEY, handout_image TEXT, handover_image TEXT, "
+            "handout_image_sha256 TEXT, handover_image_sha256 TEXT)"
+        ))
+        conn.execute(text("INSERT INTO sessions (id, handout_image, handover_image) VALUES (:id, :handout, :handover)"), rows)
+        with caplog.at_level(logging.WARNING, logger="src.services.session_images"):
+            assert backfill_session_images(conn, store, batch_size=2) == 6
+        assert "Dropped 1 session images that were not valid base64 (sessions s5)" in caplog.text
+
+        result = {r.id: r for r in conn.execute(text("SELECT * FROM sessions"))}
+        assert all(r.handout_image is None and r.handover_image is None for r in result.values())
+        assert result["s0"].handout_image_sha256 == hashlib.sha256(jpeg + b"\x00").hexdigest()
+        assert store.get(result["s5"].handout_image_sha256) == jpeg
+        assert result["s5"].handover_image_sha256 is None  # not base64: dropped
+        assert result["s6"].handout_image_sha256 is None
+
+        assert restore_session_images(conn, store, batch_size=2) == 6
+        restored = conn.execute(text("SELECT handout_image FROM sessions WHERE id = 's1'")).scalar_one()
+        assert base64.b64decode(restored) == jpeg + b"\x01"
+
+
+def test_build_derivatives_caps_size_and_makes_thumbnail(monkeypatch):
+    """Large photos are downscaled and re-encoded; small originals in the target format are kept as-is."""
+
+    import cv2
+    import numpy as np
+    from src.core.settings import settings
+    from src.ml.imaging import decode_image
+    from src.services.session_images import build_derivatives, image_content_type
+
+    monkeypatch.setattr(settings, "IMAGE_STORE_MAX_SIDE", 1000)
+    monkeypatch.setattr(settings, "IMAGE_THUMB_SIDE", 200)
+    rng = np.random.default_rng(0)
+    photo = cv2.GaussianBlur(rng.integers(0, 255, (1500, 2000, 3), dtype=np.uint8), (9, 9), 0)
+
+    big = cv2.imencode(".png", photo)[1].tobytes()
+    derived = build_derivatives(big)
+    assert (derived["width"], derived["height"]) == (1000, 750)
+    assert image_content_type(derived["image"]) == "image/jpeg"
+    assert len(derived["image"]) < len(big)
+    assert decode_image(derived["image"]).shape == (750, 1000, 3)
+    assert decode_image(derived["thumbnail"]).shape == (150, 200, 3)
+
+    small = cv2.imencode(".jpg", photo[:600, :800], [cv2.IMWRITE_JPEG_QUALITY, 60])[1].tobytes()
+    derived = build_derivatives(small)
+    assert derived["image"] == small and (derived["width"], derived["height"]) == (800, 600)
+
+    monkeypatch.setattr(settings, "IMAGE_STORE_FORMAT", "webp")
+    assert image_content_type(build_derivatives(small)["thumbnail"]) == "image/webp"
+
+    with pytest.raises(ValueError):
+        build_derivatives(b"\xff\xd8\xff-not-really-a-jpeg")
+
+
+@pytest.mark.asyncio
+async def test_ingest_pipeline_stores_thumbnail_after_predict(admin_client, monkeypatch):
+    """After predict, the background pipeline re-encodes the photo and adds a thumbnail to the card."""
+
+    import cv2
+    import numpy as np
+    import uuid
+    from src.core.blobs import blob_digest, get_blob_store
+    from src.core.settings import settings
+    from src.services.session_images import process_stage_image
+
+    monkeypatch.setattr(settings, "IMAGE_STORE_MAX_SIDE", 800)
+    rng = np.random.default_rng(1)
+    photo = cv2.GaussianBlur(rng.integers(0, 255, (1200, 1600, 3), dtype=np.uint8), (9, 9), 0)
+    original = cv2.imencode(".png", photo)[1].tobytes()
+
+    r = await admin_client.post("/sessions/handout", json={"threshold": 0.95})
+    session_id = r.json()["session_id"]
+    r = await admin_client.post(
+        f"/sessions/{session_id}/handout/predict/upload",
+        content=original,
+        headers={"content-type": "image/png"},
+    )
+    assert r.status_code == 200
+
+    r = await admin_client.get(f"/sessions/{session_id}")
+    handout = r.json()["handout"]
+    assert (handout["width"], handout["height"]) == (800, 600)
+    assert handout["image_sha256"] != blob_digest(original)
+    thumb = (await admin_client.get(handout["thumbnail_url"])).content
+    assert thumb[:3] == b"\xff\xd8\xff" and blob_digest(thumb) == handout["thumbnail_sha256"]
+
+    stored = (await admin_client.get(handout["image_url"])).content
+    assert blob_digest(stored) == handout["image_sha256"] and len(stored) < len(original)
+
+    # The request path deletes nothing; the unreferenced original is left to blob GC
+    store = get_blob_store()
+    assert store.exists(blob_digest(original))
+
+    # A stale run (the row moved on) leaves the session as it is
+    await process_stage_image(uuid.UUID(session_id), "handout", blob_digest(original))
+    r = await admin_client.get(f"/sessions/{session_id}")
+    assert r.json()["handout"]["image_sha256"] == handout["image_sha256"]
+
+
+@pytest.mark.asyncio
+async def test_repredict_during_ingest_keeps_the_original(admin_client, monkeypatch):
+    """The same photo predicted for another session while the first ingest runs is never deleted under it."""
+
+    import asyncio
+    import cv2
+    import numpy as np
+    from src.api.routers import sessions as sessions_router
+    from src.core.blobs import blob_digest, get_blob_store
+    from src.services.session_images import collect_unreferenced_blobs, process_stage_image
+
+    rng = np.random.default_rng(2)
+    photo = cv2.GaussianBlur(rng.integers(0, 255, (600, 800, 3), dtype=np.uint8), (9, 9), 0)
+    original = cv2.imencode(".png", photo)[1].tobytes()
+    first = (await admin_client.post("/sessions/handout", json={"threshold": 0.95})).json()["session_id"]
+    second = (await admin_client.post("/sessions/handout", json={"threshold": 0.95})).json()["session_id"]
+
+    deferred = []
+
+    async def ingest(session_id, stage, original_sha256):
+        if str(session_id) != first:
+            deferred.append((session_id, stage, original_sha256))  # the second ingest waits until the end
+            return
+        running = asyncio.create_task(process_stage_image(session_id, stage, original_sha256))
+        r = await admin_client.post(
+            f"/sessions/{second}/handout/predict/upload", content=original, headers={"content-type": "image/png"}
+        )
+        assert r.status_code == 200
+        await running
+
+    monkeypatch.setattr(sessions_router, "process_stage_image", ingest)
+    r = await admin_client.post(
+        f"/sessions/{first}/handout/predict/upload", content=original, headers={"content-type": "image/png"}
+    )
+    assert r.status_code == 200
+    assert len(deferred) == 1
+
+    # The first session moved on to its derivative; the second still serves the original
+    handout = (await admin_client.get(f"/sessions/{first}")).json()["handout"]
+    assert handout["image_sha256"] != blob_digest(original)
+    second_handout = (await admin_client.get(f"/sessions/{second}")).json()["handout"]
+    assert second_handout["image_sha256"] == blob_digest(original)
+    r = await admin_client.get(second_handout["image_url"])
+    assert r.status_code == 200 and r.content == original
+
+    await process_stage_image(*deferred[0])
+    second_handout = (await admin_client.get(f"/sessions/{second}")).json()["handout"]
+    assert second_handout["image_sha256"] == handout["image_sha256"]
+
+    # Within the grace period the unreferenced original stays; after it, GC removes only that
+    store = get_blob_store()
+    assert await collect_unreferenced_blobs() == 0
+    assert store.exists(blob_digest(original))
+    assert await collect_unreferenced_blobs(grace_seconds=0) >= 1
+    assert not store.exists(blob_digest(original))
+    assert store.exists(handout["image_sha256"]) and store.exists(handout["thumbnail_sha256"])
+    assert (await admin_client.get(second_handout["thumbnail_url"])).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_session_image_endpoint_etag_range_and_access(admin_client, simple_client):
+    """Images stream with a strong ETag, 304 on If-None-Match and 206/416 for byte ranges."""
+
+    image_bytes = b"\xff\xd8\xff" + bytes(range(256)) * 40
+    r = await admin_client.post("/sessions/handout", json={"threshold": 0.95})
+    session_id = r.json()["session_id"]
+    url = f"/sessions/{session_id}/images/handout"
+
+    r = await admin_client.get(url)
+    assert r.status_code == 404  # no photo yet
+    await admin_client.post(
+        f"/sessions/{session_id}/handout/predict/upload",
+        content=image_bytes,
+        headers={"content-type": "image/jpeg"},
+    )
+
+    r = await admin_client.get(url)
+    assert r.status_code == 200 and r.content == image_bytes
+    etag = r.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert r.headers["accept-ranges"] == "bytes"
+    assert int(r.headers["content-length"]) == len(image_bytes)
+
+    r = await admin_client.get(url, headers={"if-none-match": etag})
+    assert r.status_code == 304 and r.content == b"" and r.headers["etag"] == etag
+
+    r = await admin_client.get(url, headers={"range": "bytes=100-199"})
+    assert r.status_code == 206 and r.content == image_bytes[100:200]
+    assert r.headers["content-range"] == f"bytes 100-199/{len(image_bytes)}"
+    r = await admin_client.get(url, headers={"range": "bytes=-10"})
+    assert r.status_code == 206 and r.content == image_bytes[-10:]
+    r = await admin_client.get(url, headers={"range": "bytes=100-", "if-range": '"stale"'})
+    assert r.status_code == 200 and r.content == image_bytes
+    r = await admin_client.get(url, headers={"range": f"bytes={len(image_bytes)}-"})
+    assert r.status_code == 416 and r.headers["content-range"] == f"bytes */{len(image_bytes)}"
+    # Invalid ranges are ignored (RFC 9110), not answered with 416
+    for invalid in ("bytes=5-3", "bytes=abc", "bytes=-"):
+        r = await admin_client.get(url, headers={"range": invalid})
+        assert r.status_code == 200 and r.content == image_bytes
+
+    r = await admin_client.get(f"/sessions/{session_id}/images/diff")
+    assert r.status_code == 422
+    r = await simple_client.get(url)
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_session_queries_load_snapshots_only_when_needed(admin_client):
+    """JSON snapshots are deferred; fields= picks what the card reads and returns."""
+
+    from sqlalchemy import event
+    from src.core.db import get_engine
+
+    r = await admin_client.post("/sessions/handout", json={"threshold": 0.95})
+    session_id = r.json()["session_id"]
+    await admin_client.post(f"/sessions/{session_id}/handout/predict", json={"image": TEST_IMAGE, "threshold": 0.95})
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM sessions" in statement:
+            statements.append(statement)
+
+    engine = get_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        statements.clear()
+        r = await admin_client.get(f"/sessions/{session_id}?fields=handout.image")
+        assert r.status_code == 200
+        handout = r.json()["handout"]
+        assert handout["image_url"] and handout["predict"] is None and r.json()["handover"] is None
+        assert statements and not any("_predict" in s or "_final" in s for s in statements)
+
+        statements.clear()
+        r = await admin_client.get(f"/sessions/{session_id}?fields=handout.predict")
+        handout = r.json()["handout"]
+        assert handout["predict"]["summary"] and handout["image_url"] is None
+        assert any("handout_predict" in s for s in statements)
+        assert not any("handover_predict" in s or "handout_final" in s for s in statements)
+
+        statements.clear()
+        r = await admin_client.post(f"/sessions/{session_id}/handout/threshold", json={"threshold": 0.9})
+        assert r.status_code == 200
+        assert any("handout_predict" in s for s in statements)
+        assert not any("handout_final" in s or "handover_predict" in s for s in statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    r = await admin_client.get(f"/sessions/{session_id}")
+    assert r.json()["handout"]["predict"] and r.json()["handout"]["image_url"]
+    r = await admin_client.get(f"/sessions/{session_id}?fields=handout.thumbnails")
+    assert r.status_code == 422
@@ -54,7 +54,7 @@ async def test_predict_endpoints(client):
 
     # Test predict
     r = await client.post("/predict", json={
-        "image": "base64_test",
+        "image": "YmFzZTY0X3Rlc3Q=",
         "threshold": 0.95
     })
     assert r.status_code == 200
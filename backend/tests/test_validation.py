@@ -98,21 +98,21 @@ async def test_predict_validation():
         
         # Test invalid threshold (too high)
         r = await client.post("/predict", json={
-            "image": "base64_test",
+            "image": "YmFzZTY0X3Rlc3Q=",
             "threshold": 1.5
         })
         assert r.status_code == 422
         
         # Test invalid threshold (negative)
         r = await client.post("/predict", json={
-            "image": "base64_test",
+            "image": "YmFzZTY0X3Rlc3Q=",
             "threshold": -0.1
         })
         assert r.status_code == 422
         
         # Test with valid data
         r = await client.post("/predict", json={
-            "image": "base64_test",
+            "image": "YmFzZTY0X3Rlc3Q=",
             "threshold": 0.95
         })
         assert r.status_code == 200
@@ -213,13 +213,13 @@ async def test_edge_cases():
         
         # Test predict with extreme threshold values (valid but edge cases)
         r = await client.post("/predict", json={
-            "image": "base64_test",
+            "image": "YmFzZTY0X3Rlc3Q=",
             "threshold": 0.0  # Minimum valid threshold
         })
         assert r.status_code == 200
         
         r = await client.post("/predict", json={
-            "image": "base64_test",
+            "image": "YmFzZTY0X3Rlc3Q=",
             "threshold": 1.0  # Maximum valid threshold
         })
         assert r.status_code == 200
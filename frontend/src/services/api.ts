@@ -117,7 +117,13 @@ export interface SessionPhase {
     annotations: FinalAnnotation[]
     validation?: AdjustResponse['validation']
   }
-  image?: string | null
+  image?: string | null  // photo just uploaded in this client (data URL)
+  image_url?: string | null  // stored photo, GET with auth (see getImageObjectUrl)
+  image_sha256?: string | null
+  thumbnail_url?: string | null
+  thumbnail_sha256?: string | null
+  width?: number | null
+  height?: number | null
   issued_at?: string
   returned_at?: string
 }
@@ -256,6 +262,18 @@ class ApiService {
     return this.request<T>(endpoint, { method: 'GET' })
   }
 
+  // Binary GET (with the auth header) as an object URL usable as an <img> source
+  async getImageObjectUrl(endpoint: string): Promise<string> {
+    const token = localStorage.getItem('aero-kit-token')
+    const response = await fetch(`${this.baseURL}${endpoint}`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return URL.createObjectURL(await response.blob())
+  }
+
   // POST request
   async post<T>(endpoint: string, data?: any): Promise<T> {
     return this.request<T>(endpoint, {